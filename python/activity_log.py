@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Activity Log Writer
+Shared JSONL writer for the detectors' once-per-interval activity logs. Keeps
+the file open, batches lines and flushes on size or time thresholds, rotates
+by size and gzips rotated segments in the background. A timer thread writes
+lines that sit in the buffer for flush_interval seconds. Uses orjson when it is
+installed and falls back to the standard json module.
+"""
+
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+import numpy as np
+from logging_setup import get_logger
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+
+def _json_default(obj):
+    """numpy scalars and arrays, plus sets and deques from detection histories"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple, deque)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if ORJSON_AVAILABLE:
+    def dumps_line(entry):
+        """Compact JSON line as bytes"""
+        return orjson.dumps(entry, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+else:
+    def dumps_line(entry):
+        """Compact JSON line as bytes"""
+        return (json.dumps(entry, separators=(",", ":"), default=_json_default) + "\n").encode("utf-8")
+
+
+def summarize_events(events, threshold=0.0):
+    """One-line console summary of detected events, e.g. "fire 0.82, running 0.61" """
+    detected = []
+    for event_type, value in events.items():
+        if isinstance(value, dict):
+            confidence = value.get("confidence", 0.0)
+            if value.get("status", "detected") != "detected":
+                continue
+        else:
+            confidence = value
+        if isinstance(confidence, (int, float, np.number)) and confidence > threshold:
+            detected.append(f"{event_type} {float(confidence):.2f}")
+    return ", ".join(detected) if detected else "no events"
+
+
+class ActivityLogWriter:
+    """Buffered, size-rotated JSONL file; write() is cheap and safe from any thread"""
+
+    def __init__(self, path, max_bytes=100 * 1024 * 1024, backup_count=5, compress=True,
+                 flush_bytes=64 * 1024, flush_interval=5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.errors = 0
+        self._buffer = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._compress_queue = None
+        self._timer_stop = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build from a LOG_SETTINGS style dict (filename, max_file_size_mb, backup_count, ...)"""
+        return cls(settings["filename"],
+                   max_bytes=int(settings["max_file_size_mb"] * 1024 * 1024),
+                   backup_count=settings["backup_count"],
+                   compress=settings.get("compress", True),
+                   flush_bytes=settings.get("flush_bytes", 64 * 1024),
+                   flush_interval=settings.get("flush_interval", 5.0))
+
+    def write(self, entry):
+        """Queue one entry; written once the batch is large or by the flush timer"""
+        line = dumps_line(entry)
+        with self._lock:
+            self._buffer.append(line)
+            self._buffered += len(line)
+            if self._buffered >= self.flush_bytes:
+                self._flush_locked()
+            elif self._timer_stop is None and self.flush_interval > 0:
+                self._timer_stop = threading.Event()
+                threading.Thread(target=self._flush_timer, args=(self._timer_stop,), daemon=True).start()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            if self._timer_stop is not None:
+                self._timer_stop.set()
+                self._timer_stop = None
+            self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _flush_timer(self, stop):
+        """Write whatever is buffered every flush_interval, so quiet writers do not hold lines"""
+        while not stop.wait(self.flush_interval):
+            self.flush()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        try:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+            self._file.write(data)
+            self._file.flush()
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate_locked()
+        except OSError as e:
+            self.errors += 1
+            if self.errors == 1:
+                logger.error(f"Error writing to log file {self.path}: {e}")
+
+    def _segment_path(self, index):
+        return f"{self.path}.{index}.gz" if self.compress else f"{self.path}.{index}"
+
+    def _rotate_locked(self):
+        """path -> path.1(.gz), path.1 -> path.2, ...; oldest beyond backup_count is removed"""
+        self._file.close()
+        self._file = None
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+
+        if not self.compress:
+            self._shift_segments()
+            os.replace(self.path, self._segment_path(1))
+            return
+
+        # Shifting and gzip happen in order on one background thread
+        pending = f"{self.path}.{time.time_ns()}.pending"
+        os.replace(self.path, pending)
+        if self._compress_queue is None:
+            self._compress_queue = queue.Queue()
+            threading.Thread(target=self._compress_worker, daemon=True).start()
+        self._compress_queue.put(pending)
+
+    def _shift_segments(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self._segment_path(index)
+            if os.path.exists(source):
+                os.replace(source, self._segment_path(index + 1))
+
+    def _compress_worker(self):
+        """gzip rotated segments off the writer's thread"""
+        while True:
+            pending = self._compress_queue.get()
+            target = self._segment_path(1)
+            try:
+                with open(pending, "rb") as f_in, gzip.open(target + ".tmp", "wb", compresslevel=6) as f_out:
+                    shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+                self._shift_segments()
+                os.replace(target + ".tmp", target)
+                os.remove(pending)
+            except OSError as e:
+                logger.error(f"Error compressing log segment {pending}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_activity_log(settings, source, camera=None):
+    """JSONL writer or indexed store sink for a detector, per settings["backend"]"""
+    backend = os.getenv("ACTIVITY_LOG_BACKEND", settings.get("backend", "jsonl"))
+    if backend == "store":
+        from activity_store import ActivityStore, StoreSink
+        store = ActivityStore(settings.get("store_dir", "activity_store"),
+                              flush_interval=settings.get("flush_interval", 5.0))
+        return StoreSink(store, source, camera)
+    return ActivityLogWriter.from_settings(settings)
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Activity Event Store
+Append-optimized local store for the detectors' activity log entries. Each
+source (advanced, multi_camera, ...) appends JSON lines to segment files; every
+sealed segment gets a sparse time index and per camera/event posting lists of
+(timestamp, offset, confidence), so "fire on camera 0 between T1 and T2" reads
+only the matching lines instead of scanning months of JSONL.
+
+    python activity_store.py import advanced_activity_log.jsonl multi_camera_activity_log.jsonl*
+    python activity_store.py query --event fire --camera 0 --since "2026-10-01" --until "2026-10-02 12:00"
+    python activity_store.py stats
+"""
+
+import argparse
+import datetime
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+from activity_log import dumps_line
+
+SEGMENT_PREFIX = "seg_"
+POSTING_DTYPE = np.dtype([("ts", "<f8"), ("offset", "<i8"), ("confidence", "<f4")])
+KEY_SEPARATOR = "\x1f"
+COMBINED_CAMERA = "combined"  # Camera key of the cross-camera events in multi-camera entries
+
+
+def parse_timestamp(value):
+    """Epoch seconds from an epoch number, "YYYY-mm-dd HH:MM:SS" (local time) or ISO 8601"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return datetime.datetime.fromisoformat(str(value).strip()).timestamp()
+
+
+def entry_events(entry, default_camera):
+    """(camera, event, confidence) for every detected event in an activity log entry
+
+    The single-camera detectors log one events dict for their camera. Multi-camera
+    entries carry per-camera results in individual_detections and the cross-camera
+    result in combined_events, indexed under COMBINED_CAMERA. Events with a status
+    only count while it is "detected".
+    """
+    sources = [(default_camera, entry.get("events")), (COMBINED_CAMERA, entry.get("combined_events"))]
+    sources.extend((entry.get("individual_detections") or {}).items())
+
+    for camera, events in sources:
+        if not events:
+            continue
+        camera = str(camera)
+        if camera.startswith("camera_"):
+            camera = camera[len("camera_"):]
+        for event_type, value in events.items():
+            if isinstance(value, dict):
+                if value.get("status", "detected") != "detected":
+                    continue
+                confidence = value.get("confidence", 0.0)
+            else:
+                confidence = value
+            if isinstance(confidence, (int, float)) and confidence > 0:
+                yield camera, event_type, float(confidence)
+
+
+class Segment:
+    """One segment file plus its in-memory index"""
+
+    def __init__(self, path, index_stride):
+        self.path = path
+        self.index_stride = index_stride
+        self.entries = 0
+        self.min_ts = None
+        self.max_ts = None
+        self.sparse_ts = []
+        self.sparse_offsets = []
+        self.postings = {}
+
+    @property
+    def index_path(self):
+        return self.path[:-len(".jsonl")] + ".idx.npz"
+
+    def add(self, ts, offset, events):
+        if self.entries % self.index_stride == 0:
+            self.sparse_ts.append(ts)
+            self.sparse_offsets.append(offset)
+        self.entries += 1
+        self.min_ts = ts if self.min_ts is None else min(self.min_ts, ts)
+        self.max_ts = ts if self.max_ts is None else max(self.max_ts, ts)
+        for camera, event_type, confidence in events:
+            self.postings.setdefault(camera + KEY_SEPARATOR + event_type, []).append((ts, offset, confidence))
+
+    def rebuild(self, default_camera):
+        """Re-index an unsealed segment after a restart, dropping a torn last line
+
+        Starts from the checkpoint index written by the last clean close and only
+        scans the lines appended after it.
+        """
+        offset = self.load_checkpoint()
+        with open(self.path, "rb+") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    f.truncate(offset)
+                    break
+                try:
+                    entry = json.loads(line)
+                    self.add(parse_timestamp(entry["timestamp"]), offset, entry_events(entry, default_camera))
+                except (ValueError, KeyError, TypeError):
+                    pass
+                offset += len(line)
+
+    def load_checkpoint(self):
+        """Restore the index saved by save_index, returns the data size it covers"""
+        if not os.path.exists(self.index_path):
+            return 0
+        try:
+            with np.load(self.index_path) as data:
+                entries, data_size, min_ts, max_ts = data["meta"]
+                if data_size > os.path.getsize(self.path):
+                    return 0
+                sparse_ts = data["sparse_ts"].tolist()
+                sparse_offsets = data["sparse_offsets"].tolist()
+                postings = {key: data[f"p{number}"].tolist() for number, key in enumerate(data["keys"])}
+        except (OSError, ValueError, KeyError):
+            return 0
+        self.entries = int(entries)
+        self.min_ts, self.max_ts = (float(min_ts), float(max_ts)) if self.entries else (None, None)
+        self.sparse_ts, self.sparse_offsets, self.postings = sparse_ts, sparse_offsets, postings
+        return int(data_size)
+
+    def save_index(self):
+        arrays = {
+            "meta": np.asarray([self.entries, os.path.getsize(self.path),
+                                self.min_ts or 0.0, self.max_ts or 0.0], dtype="<f8"),
+            "sparse_ts": np.asarray(self.sparse_ts, dtype="<f8"),
+            "sparse_offsets": np.asarray(self.sparse_offsets, dtype="<i8"),
+            "keys": np.asarray(list(self.postings), dtype=str)
+        }
+        for number, rows in enumerate(self.postings.values()):
+            postings = np.asarray(rows, dtype=POSTING_DTYPE)
+            arrays[f"p{number}"] = postings[np.argsort(postings["ts"], kind="stable")]
+        np.savez(self.index_path, **arrays)
+
+    def meta(self):
+        return {"name": os.path.basename(self.path), "entries": self.entries,
+                "min_ts": self.min_ts, "max_ts": self.max_ts}
+
+
+class SealedIndex:
+    """Read-only index of a sealed segment, loaded on first use"""
+
+    def __init__(self, index_path):
+        with np.load(index_path) as data:
+            self.sparse_ts = data["sparse_ts"]
+            self.sparse_offsets = data["sparse_offsets"]
+            self.postings = {key: data[f"p{number}"] for number, key in enumerate(data["keys"])}
+
+    @classmethod
+    def from_segment(cls, segment):
+        index = cls.__new__(cls)
+        index.sparse_ts = np.asarray(segment.sparse_ts, dtype="<f8")
+        index.sparse_offsets = np.asarray(segment.sparse_offsets, dtype="<i8")
+        index.postings = {}
+        for key, rows in segment.postings.items():
+            postings = np.asarray(rows, dtype=POSTING_DTYPE)
+            index.postings[key] = postings[np.argsort(postings["ts"], kind="stable")]
+        return index
+
+
+class SourceLog:
+    """Segments of one source in its own directory: append to the open segment, seal when full"""
+
+    def __init__(self, directory, default_camera="default", segment_entries=100000, index_stride=64,
+                 flush_interval=5.0):
+        self.directory = directory
+        self.default_camera = default_camera
+        self.segment_entries = segment_entries
+        self.index_stride = index_stride
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_flush = time.monotonic()
+        self._index_cache = {}      # Sealed segment path -> SealedIndex
+        self._active_index = None   # (path, entries, SealedIndex) view of the open segment
+        os.makedirs(directory, exist_ok=True)
+
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.sealed = []
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.sealed = json.load(f)["segments"]
+        sealed_names = {segment["name"] for segment in self.sealed}
+
+        self.active = None
+        for name in sorted(os.listdir(directory)):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(".jsonl") and name not in sealed_names:
+                self.active = Segment(os.path.join(directory, name), index_stride)
+                self.active.rebuild(default_camera)
+                break
+
+    def _new_segment(self):
+        number = len(self.sealed) + 1
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}.jsonl")
+        return Segment(path, self.index_stride)
+
+    def append(self, entry, camera=None):
+        """Append one activity log entry; returns its timestamp"""
+        ts = parse_timestamp(entry["timestamp"])
+        line = dumps_line(entry)
+        with self._lock:
+            if self.active is None:
+                self.active = self._new_segment()
+            if self._file is None:
+                self._file = open(self.active.path, "ab")
+            offset = self._file.tell()
+            self._file.write(line)
+            self.active.add(ts, offset, entry_events(entry, camera or self.default_camera))
+            if self.active.entries >= self.segment_entries:
+                self._seal_locked()
+            elif time.monotonic() - self._last_flush >= self.flush_interval:
+                self._file.flush()
+                self._last_flush = time.monotonic()
+        return ts
+
+    def _seal_locked(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.active is None or self.active.entries == 0:
+            return
+        self.active.save_index()
+        self.sealed.append(self.active.meta())
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segments": self.sealed}, f)
+        os.replace(tmp_path, self.manifest_path)
+        self.active = None
+        self._active_index = None
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        """Close the open segment and checkpoint its index; it stays open for appends"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                if self.active is not None and self.active.entries:
+                    self.active.save_index()
+
+    def seal(self):
+        with self._lock:
+            self._seal_locked()
+
+    def _segments_in_range(self, start, end):
+        """(path, index) for segments overlapping [start, end]"""
+        for meta in self.sealed:
+            if (start is not None and meta["max_ts"] < start) or (end is not None and meta["min_ts"] > end):
+                continue
+            path = os.path.join(self.directory, meta["name"])
+            index = self._index_cache.get(path)
+            if index is None:
+                index = self._index_cache[path] = SealedIndex(path[:-len(".jsonl")] + ".idx.npz")
+            yield path, index
+
+        active = self.active
+        if active is not None and active.entries:
+            if not ((start is not None and active.max_ts < start) or (end is not None and active.min_ts > end)):
+                self.flush()
+                # Reuse the array view of the open segment until something is appended
+                cached = self._active_index
+                if cached is None or cached[:2] != (active.path, active.entries):
+                    cached = self._active_index = (active.path, active.entries, SealedIndex.from_segment(active))
+                yield active.path, cached[2]
+
+    def query_events(self, event=None, camera=None, start=None, end=None, min_confidence=0.0):
+        """Matching (ts, camera, event, confidence, entry) from the posting lists"""
+        lo = -np.inf if start is None else start
+        hi = np.inf if end is None else end
+        for path, index in self._segments_in_range(start, end):
+            matches = []
+            for key, postings in index.postings.items():
+                key_camera, key_event = key.split(KEY_SEPARATOR, 1)
+                if (event is not None and key_event != event) or (camera is not None and key_camera != camera):
+                    continue
+                first = np.searchsorted(postings["ts"], lo, side="left")
+                last = np.searchsorted(postings["ts"], hi, side="right")
+                selected = postings[first:last]
+                if min_confidence:
+                    selected = selected[selected["confidence"] >= min_confidence]
+                matches.extend((float(row["ts"]), key_camera, key_event,
+                                round(float(row["confidence"]), 4), int(row["offset"]))
+                               for row in selected)
+            if not matches:
+                continue
+            matches.sort()
+            with open(path, "rb") as f:
+                for ts, key_camera, key_event, confidence, offset in matches:
+                    f.seek(offset)
+                    yield ts, key_camera, key_event, confidence, json.loads(f.readline())
+
+    def query_entries(self, start=None, end=None):
+        """All entries in [start, end], using the sparse time index to find the first one"""
+        for path, index in self._segments_in_range(start, end):
+            offset = 0
+            if start is not None and len(index.sparse_ts):
+                # Entries are appended in time order; start one stride before the first indexed hit
+                position = max(int(np.searchsorted(index.sparse_ts, start, side="left")) - 1, 0)
+                offset = int(index.sparse_offsets[position])
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    entry = json.loads(line)
+                    ts = parse_timestamp(entry["timestamp"])
+                    if end is not None and ts > end:
+                        break
+                    if start is None or ts >= start:
+                        yield ts, entry
+
+    def stats(self):
+        entries = sum(segment["entries"] for segment in self.sealed)
+        min_values = [segment["min_ts"] for segment in self.sealed]
+        max_values = [segment["max_ts"] for segment in self.sealed]
+        if self.active is not None and self.active.entries:
+            entries += self.active.entries
+            min_values.append(self.active.min_ts)
+            max_values.append(self.active.max_ts)
+        return {
+            "segments": len(self.sealed) + (1 if self.active is not None and self.active.entries else 0),
+            "entries": entries,
+            "first": min(min_values) if min_values else None,
+            "last": max(max_values) if max_values else None
+        }
+
+
+class ActivityStore:
+    """Directory of per-source logs; single writer per source"""
+
+    def __init__(self, root, **source_options):
+        self.root = root
+        self.source_options = source_options
+        self.sources = {}
+        os.makedirs(root, exist_ok=True)
+
+    def source(self, name, **options):
+        log = self.sources.get(name)
+        if log is None:
+            log = self.sources[name] = SourceLog(os.path.join(self.root, name),
+                                                 **dict(self.source_options, **options))
+        return log
+
+    def source_names(self):
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def query(self, event=None, camera=None, start=None, end=None, source=None, min_confidence=0.0, limit=None):
+        """Matching events (or entries when neither event nor camera is given) as dicts"""
+        start, end = parse_timestamp(start), parse_timestamp(end)
+        results = []
+        for name in ([source] if source else self.source_names()):
+            log = self.source(name)
+            if event is None and camera is None:
+                results.extend({"ts": ts, "source": name, "entry": entry}
+                               for ts, entry in log.query_entries(start, end))
+            else:
+                results.extend({"ts": ts, "source": name, "camera": key_camera, "event": key_event,
+                                "confidence": confidence, "entry": entry}
+                               for ts, key_camera, key_event, confidence, entry
+                               in log.query_events(event, camera, start, end, min_confidence))
+        results.sort(key=lambda result: result["ts"])
+        return results[:limit] if limit else results
+
+    def close(self):
+        for log in self.sources.values():
+            log.close()
+
+
+class StoreSink:
+    """ActivityLogWriter-compatible sink that appends to one source of an ActivityStore"""
+
+    def __init__(self, store, source, camera=None):
+        self.store = store
+        self.log = store.source(source, default_camera=camera or "default")
+
+    def write(self, entry):
+        self.log.append(entry)
+
+    def flush(self):
+        self.log.flush()
+
+    def close(self):
+        self.log.close()
+
+
+def source_name_for(path):
+    """advanced_activity_log.jsonl.2.gz -> advanced"""
+    name = os.path.basename(path).split(".jsonl")[0]
+    if name.endswith("_activity_log"):
+        name = name[:-len("_activity_log")]
+    return name or "activity"
+
+
+def import_jsonl(store, path, source=None, camera=None):
+    """Append every entry of a (possibly gzipped) JSONL activity log, returns (imported, skipped)"""
+    log = store.source(source or source_name_for(path), default_camera=camera or "default")
+    opener = gzip.open if path.endswith(".gz") else open
+    imported = skipped = 0
+    with opener(path, "rb") as f:
+        for line in f:
+            try:
+                log.append(json.loads(line))
+                imported += 1
+            except (ValueError, KeyError, TypeError):
+                skipped += 1
+    log.close()
+    return imported, skipped
+
+
+def format_ts(ts):
+    return datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts is not None else None
+
+
+def main():
+    from detection_config import LOG_SETTINGS
+
+    parser = argparse.ArgumentParser(description="Indexed activity event store")
+    parser.add_argument("--store", default=LOG_SETTINGS["store_dir"], help="Store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Import JSONL activity logs (.jsonl or .jsonl.N.gz)")
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--source", help="Source name (default: derived from the file name)")
+    import_parser.add_argument("--camera", default="default", help="Camera id for single-camera logs")
+    import_parser.add_argument("--seal", action="store_true", help="Seal and index the last segment too")
+
+    query_parser = commands.add_parser("query", help="Query events or entries")
+    query_parser.add_argument("--event", help="Event type, e.g. fire")
+    query_parser.add_argument("--camera", help="Camera id, e.g. 0")
+    query_parser.add_argument("--source", help="Only this source")
+    query_parser.add_argument("--since", help="Start time (epoch or ISO, e.g. '2026-10-01 08:00')")
+    query_parser.add_argument("--until", help="End time")
+    query_parser.add_argument("--min-confidence", type=float, default=0.0)
+    query_parser.add_argument("--limit", type=int, default=100)
+    query_parser.add_argument("--full", action="store_true", help="Print the full entry for each match")
+
+    commands.add_parser("stats", help="Segments, entries and time span per source")
+    args = parser.parse_args()
+
+    store = ActivityStore(args.store)
+    if args.command == "import":
+        for path in args.files:
+            imported, skipped = import_jsonl(store, path, args.source, args.camera)
+            print(f"📥 {path}: {imported} entries imported, {skipped} skipped")
+        if args.seal:
+            for log in store.sources.values():
+                log.seal()
+    elif args.command == "query":
+        started = time.perf_counter()
+        results = store.query(args.event, args.camera, args.since, args.until, args.source,
+                              args.min_confidence, args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for result in results:
+            if not args.full and "event" in result:
+                print(f"{format_ts(result['ts'])}  {result['source']:14s} camera {result['camera']:8s} "
+                      f"{result['event']:18s} {result['confidence']:.3f}")
+            else:
+                print(json.dumps(dict(result, time=format_ts(result["ts"]))))
+        print(f"🔎 {len(results)} result(s) in {elapsed_ms:.1f} ms", file=sys.stderr)
+    else:
+        for name in store.source_names():
+            stats = store.source(name).stats()
+            print(f"{name:20s} {stats['entries']:10d} entries in {stats['segments']:4d} segment(s), "
+                  f"{format_ts(stats['first'])} .. {format_ts(stats['last'])}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Admission Control
+Global inference budget shared by all cameras. Each camera reports how often it
+wants to run inference and what a frame costs; when the total demand exceeds the
+budget, cameras are shed from the lowest priority up along a ladder: no tiled
+inference, then a smaller model input size, then a capped frame rate. Cameras at
+the protected priority are never shed. Shedding applies at once, recovery only
+once demand also fits a tighter budget so decisions do not flap.
+"""
+
+import os
+import threading
+import time
+
+# Shedding ladder, from no shedding to the most degraded level
+LEVELS = ("full", "no_tiling", "low_resolution", "low_fps", "minimal")
+
+
+class CameraAdmission:
+    """Shedding decision for one camera, applied where its frames are inferred"""
+
+    def __init__(self, level="full", fps=None, imgsz=None, tiling=True):
+        self.level = level
+        self.fps = fps
+        self.imgsz = imgsz
+        self.tiling = tiling
+        self._last_admitted = None
+
+    def allow(self, now=None):
+        """Frame-rate cap of the decision; admitted frames are inferred"""
+        now = time.monotonic() if now is None else now
+        if self.fps and self._last_admitted is not None and now - self._last_admitted < 1.0 / self.fps:
+            return False
+        self._last_admitted = now
+        return True
+
+    def inference_kwargs(self, kwargs):
+        """Model kwargs with the decision's input size cap"""
+        if self.imgsz is None or kwargs.get("imgsz", 640) <= self.imgsz:
+            return kwargs
+        return dict(kwargs, imgsz=self.imgsz)
+
+    def as_dict(self):
+        return {"level": self.level, "fps": self.fps, "imgsz": self.imgsz, "tiling": self.tiling}
+
+
+class _CameraState:
+    def __init__(self, priority):
+        self.priority = priority
+        self.decision = CameraAdmission()
+        self.level = 0
+        self.offers = 0
+        self.offered_fps = None   # EWMA inference requests per second
+        self.cost = None          # EWMA seconds per frame at the requested settings
+        self.plain_cost = None    # ... over frames without tiling
+        self.imgsz = 640          # Input size the camera's profile asks for
+
+
+class AdmissionController:
+    """Allocates the inference budget across cameras by priority"""
+
+    def __init__(self, budget=None, target_utilization=0.8, interval=2.0, shed_imgsz=320,
+                 shed_fps=2.0, min_fps=0.5, recover_ratio=0.85, smoothing=0.3,
+                 priorities=None, default_priority="normal", protected_priority="critical",
+                 fixed_imgsz=None, listener=None):
+        # Budget: seconds of inference per second of wall time across all cameras
+        self.budget = budget or (os.cpu_count() or 1) * target_utilization
+        self.interval = interval
+        self.shed_imgsz = None if fixed_imgsz else shed_imgsz
+        self.shed_fps = shed_fps
+        self.min_fps = min_fps
+        self.recover_ratio = recover_ratio
+        self.smoothing = smoothing
+        self.priorities = dict(priorities or {"critical": 3, "high": 2, "normal": 1, "low": 0})
+        self.default_priority = default_priority
+        self.protected_priority = self.parse_priority(protected_priority)
+        # listener(camera_id, decision) runs when a camera's decision changes
+        self.listener = listener
+
+        self.cameras = {}
+        self.rebalances = 0
+        self.demand = 0.0
+        self._last_rebalance = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs):
+        """Build from ADMISSION_SETTINGS"""
+        options = dict(settings, **kwargs)
+        options.pop("enabled", None)
+        return cls(**options)
+
+    def parse_priority(self, priority):
+        """Numeric priority from a name ("critical", "high", ...) or number, raises ValueError"""
+        if priority is None:
+            priority = self.default_priority
+        if isinstance(priority, str) and not priority.lstrip("-").isdigit():
+            if priority not in self.priorities:
+                raise ValueError(f"Unknown camera priority '{priority}'")
+            return self.priorities[priority]
+        return int(priority)
+
+    def register(self, camera_id, priority=None):
+        """Track a camera; new cameras start unshed until the next rebalance"""
+        priority = self.parse_priority(priority)
+        with self._lock:
+            state = self.cameras.get(camera_id)
+            if state is None:
+                state = self.cameras[camera_id] = _CameraState(priority)
+            state.priority = priority
+        return state.decision
+
+    def unregister(self, camera_id):
+        with self._lock:
+            self.cameras.pop(camera_id, None)
+
+    def offer(self, camera_id, now=None):
+        """A camera wants to infer a frame; returns its current CameraAdmission"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self.cameras.get(camera_id)
+            if state is None:
+                return CameraAdmission()
+            state.offers += 1
+            if now - self._last_rebalance >= self.interval:
+                self._rebalance(now)
+            return state.decision
+
+    def record(self, camera_id, seconds, requested_imgsz=640, imgsz=None, tiled=False):
+        """Measured inference time of a frame the camera asked to run at requested_imgsz
+
+        imgsz is the input size actually used after shedding (None = as requested).
+        """
+        state = self.cameras.get(camera_id)
+        if state is None:
+            return
+        state.imgsz = requested_imgsz
+        # Normalize shed frames back to the requested size; cost scales with input pixels
+        if imgsz and imgsz < requested_imgsz:
+            seconds *= (requested_imgsz / imgsz) ** 2
+        state.cost = self._smooth(state.cost, seconds)
+        if not tiled:
+            state.plain_cost = self._smooth(state.plain_cost, seconds)
+
+    def _smooth(self, average, value):
+        return value if average is None else average + self.smoothing * (value - average)
+
+    def _cost(self, state, level):
+        """Estimated inference seconds per second for a camera at a shedding level"""
+        cost = state.cost if level == 0 else (state.plain_cost or state.cost)
+        if cost is None:
+            return 0.0
+        if level >= 2 and self.shed_imgsz and self.shed_imgsz < state.imgsz:
+            cost *= (self.shed_imgsz / state.imgsz) ** 2
+        fps = state.offered_fps or 0.0
+        if level >= 3:
+            fps = min(fps, self.shed_fps if level == 3 else self.min_fps)
+        return cost * fps
+
+    def _plan(self, budget):
+        """Shedding levels that fit the budget, lowest priority shed first"""
+        levels = {camera_id: 0 for camera_id in self.cameras}
+        total = sum(self._cost(state, 0) for state in self.cameras.values())
+        for priority in sorted({state.priority for state in self.cameras.values()}):
+            if total <= budget or priority >= self.protected_priority:
+                break
+            group = [camera_id for camera_id, state in self.cameras.items() if state.priority == priority]
+            # Step the whole group down the ladder together
+            for level in range(1, len(LEVELS)):
+                for camera_id in group:
+                    state = self.cameras[camera_id]
+                    total += self._cost(state, level) - self._cost(state, levels[camera_id])
+                    levels[camera_id] = level
+                if total <= budget:
+                    break
+        return levels
+
+    def _rebalance(self, now):
+        elapsed = max(now - self._last_rebalance, 1e-6)
+        self._last_rebalance = now
+        self.rebalances += 1
+        for state in self.cameras.values():
+            state.offered_fps = self._smooth(state.offered_fps, state.offers / elapsed)
+            state.offers = 0
+        self.demand = sum(self._cost(state, 0) for state in self.cameras.values())
+
+        shed = self._plan(self.budget)
+        relaxed = self._plan(self.budget * self.recover_ratio)
+        for camera_id, state in self.cameras.items():
+            level = max(shed[camera_id], min(state.level, relaxed[camera_id]))
+            if level == state.level:
+                continue
+            state.level = level
+            state.decision = CameraAdmission(
+                level=LEVELS[level],
+                fps={3: self.shed_fps, 4: self.min_fps}.get(level),
+                imgsz=self.shed_imgsz if level >= 2 else None,
+                tiling=level == 0
+            )
+            if self.listener is not None:
+                self.listener(camera_id, state.decision)
+
+    def stats(self):
+        with self._lock:
+            cameras = {
+                camera_id: dict(state.decision.as_dict(),
+                                priority=state.priority,
+                                offered_fps=round(state.offered_fps or 0.0, 2),
+                                cost_ms=round(state.cost * 1000, 2) if state.cost is not None else None,
+                                load=round(self._cost(state, state.level), 4))
+                for camera_id, state in self.cameras.items()
+            }
+            return {
+                "budget": round(self.budget, 4),
+                "demand": round(self.demand, 4),
+                "allocated": round(sum(camera["load"] for camera in cameras.values()), 4),
+                "rebalances": self.rebalances,
+                "cameras": cameras
+            }
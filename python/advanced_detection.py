@@ -5,20 +5,38 @@ Implements sophisticated heuristics and tracking for emergency detection
 """
 
 import cv2
-import json
 import time
 import datetime
 import numpy as np
-from ultralytics import YOLO
-from detection_config import TARGET_CLASSES, CLASS_MAPPING
+from detection_config import TARGET_CLASSES, CLASS_MAPPING, LOG_SETTINGS
+from activity_log import open_activity_log, summarize_events
+from model_runtime import load_detection_model
+from inference_profiles import predict_kwargs, profile_for_model
+from tiled_inference import TiledDetector
+from roi_mask import RoiMask
+from fire_smoke_cascade import FireSmokeCascade, union_rect
+from region_stats import RegionStats, extract_regions
+from smoke_background import StaticBackground
+from logging_setup import setup_logging
+from temporal_evidence import TemporalEvidence, RingWindow
 import math
 from collections import deque
 
 class AdvancedDetector:
     """Advanced detection with tracking and heuristics"""
     
-    def __init__(self):
-        self.model = YOLO("yolov8n.pt")
+    def __init__(self, inference_profile="people", roi=None, smoke_background=None):
+        self.model = load_detection_model()
+        # Only person boxes are used, so the model runs NMS for the person class alone
+        self.inference = predict_kwargs(profile_for_model(self.model, {"profile": inference_profile}))
+        # Dense crowds in large frames are counted on overlapping tiles
+        self.tiler = TiledDetector(self.model)
+        # Static ROI: inference, flow and color analysis only look inside it
+        self.roi = roi or RoiMask()
+        # Downscaled color screens gate the full-resolution fire/smoke masking
+        self.fire_smoke_cascade = FireSmokeCascade()
+        # Learned static surfaces (walls, floors) that smoke analysis skips
+        self.smoke_background = smoke_background or StaticBackground.from_settings()
         
         # Tracking variables
         self.person_tracks = {}  # Track people across frames
@@ -32,8 +50,8 @@ class AdvancedDetector:
         self.FIRE_CONFIDENCE_THRESHOLD = 0.5
         self.SMOKE_CONFIDENCE_THRESHOLD = 0.6  # Increased threshold for smoke detection
         
-        # Temporal analysis windows
-        self.temporal_window = deque(maxlen=5)  # 5-second window
+        # Per-event debounce, hysteresis and confidence decay
+        self.evidence = TemporalEvidence.from_settings()
         self.detection_history = {class_name: {"confidence": 0.0, "status": "not_detected"} 
                                  for class_name in TARGET_CLASSES}
         
@@ -46,11 +64,14 @@ class AdvancedDetector:
         self.flame_flicker_threshold = 0.3
         
         # Stampede detection history for temporal analysis
-        self.stampede_history = deque(maxlen=5)  # Store last 5 frames
+        self.stampede_scores = RingWindow(3)
+        self.stampede_counts = RingWindow(2)
+        self.stampede_motion = RingWindow(2)
         
     def calculate_optical_flow(self, frame):
-        """Calculate optical flow for motion detection"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        """Calculate optical flow for motion detection inside the ROI"""
+        view, _ = self.roi.crop(frame)
+        gray = cv2.cvtColor(view, cv2.COLOR_BGR2GRAY)
         
         if self.prev_frame is None:
             self.prev_frame = gray
@@ -63,7 +84,7 @@ class AdvancedDetector:
         
         # Calculate magnitude of flow
         magnitude = np.sqrt(flow[..., 0]**2 + flow[..., 1]**2)
-        average_motion = np.mean(magnitude)
+        average_motion = self.roi.masked_mean(magnitude, frame.shape)
         
         self.prev_frame = gray
         return average_motion
@@ -228,40 +249,26 @@ class AdvancedDetector:
                     stampede_score += 0.1
         
         # 5. Temporal Consistency Check
-        # Add current detection to temporal window
-        self.stampede_history.append({
-            'person_count': person_count,
-            'motion_level': motion_level,
-            'stampede_score': stampede_score
-        })
-        
-        # Analyze temporal pattern (last 5 frames)
-        if len(self.stampede_history) >= 3:
-            recent_scores = [h['stampede_score'] for h in list(self.stampede_history)[-3:]]
-            avg_recent_score = sum(recent_scores) / len(recent_scores)
-            
+        # Add current detection to the running windows
+        self.stampede_scores.push(stampede_score)
+        self.stampede_counts.push(person_count)
+        self.stampede_motion.push(motion_level)
+        
+        # Analyze temporal pattern (last 3 frames)
+        if self.stampede_scores.full and self.stampede_scores.mean() > 0.5:
             # Boost score if consistently high
-            if avg_recent_score > 0.5:
-                stampede_score = min(stampede_score + 0.1, 1.0)
+            stampede_score = min(stampede_score + 0.1, 1.0)
         
         # 6. Panic Behavior Analysis (Research-based)
         panic_indicators = 0
         
         # Check for sudden increase in person count
-        if len(self.stampede_history) >= 2:
-            recent_counts = [h['person_count'] for h in list(self.stampede_history)[-2:]]
-            if len(recent_counts) >= 2:
-                count_increase = recent_counts[-1] - recent_counts[0]
-                if count_increase > 5:  # Sudden crowd increase
-                    panic_indicators += 1
+        if self.stampede_counts.full and self.stampede_counts.delta() > 5:  # Sudden crowd increase
+            panic_indicators += 1
         
         # Check for sudden motion increase
-        if len(self.stampede_history) >= 2:
-            recent_motions = [h['motion_level'] for h in list(self.stampede_history)[-2:]]
-            if len(recent_motions) >= 2:
-                motion_increase = recent_motions[-1] - recent_motions[0]
-                if motion_increase > 1.0:  # Sudden motion increase
-                    panic_indicators += 1
+        if self.stampede_motion.full and self.stampede_motion.delta() > 1.0:  # Sudden motion increase
+            panic_indicators += 1
         
         # Boost score for panic indicators
         if panic_indicators >= 2:
@@ -347,8 +354,19 @@ class AdvancedDetector:
         fire_detections = []
         smoke_detections = []
         
-        # Process entire frame for fire detection (not just detected objects)
-        frame_hsv = cv2.cvtColor(self.current_frame, cv2.COLOR_BGR2HSV)
+        # Process the ROI for fire detection (not just detected objects), but only the
+        # areas where fire or smoke colors persisted in the downscaled cascade screen
+        view, (ox, oy) = self.roi.crop(self.current_frame)
+        self.smoke_background.update(view)
+        candidates = self.fire_smoke_cascade.candidates(view, self.smoke_background)
+        rect = union_rect(candidates.values())
+        if rect is None:
+            return fire_detections, smoke_detections
+        area_bgr = view[rect[1]:rect[3], rect[0]:rect[2]]
+        frame_hsv = cv2.cvtColor(area_bgr, cv2.COLOR_BGR2HSV)
+        ox, oy = ox + rect[0], oy + rect[1]  # Boxes are offset back to the frame
+        # Integral images: every candidate region's statistics are O(1) lookups
+        region_stats = RegionStats.from_hsv(frame_hsv, area_bgr)
         
         # Research-based fire detection using multiple color ranges
         fire_masks = []
@@ -375,37 +393,15 @@ class AdvancedDetector:
         combined_fire_mask = np.zeros_like(fire_mask1)
         for mask in fire_masks:
             combined_fire_mask = cv2.bitwise_or(combined_fire_mask, mask)
+        combined_fire_mask = self.roi.apply_to_mask(combined_fire_mask, self.current_frame.shape, rect)
+        if not candidates['fire']:
+            combined_fire_mask[:] = 0
         
         # Advanced fire detection using morphological operations
         kernel = np.ones((5,5), np.uint8)
         fire_mask_processed = cv2.morphologyEx(combined_fire_mask, cv2.MORPH_CLOSE, kernel)
         fire_mask_processed = cv2.morphologyEx(fire_mask_processed, cv2.MORPH_OPEN, kernel)
         
-        # Find fire contours
-        fire_contours, _ = cv2.findContours(fire_mask_processed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        for contour in fire_contours:
-            area = cv2.contourArea(contour)
-            if area > 500:  # Minimum fire area threshold
-                x, y, w, h = cv2.boundingRect(contour)
-                bbox = [x, y, x + w, y + h]
-                
-                # Calculate fire characteristics
-                fire_ratio = area / (w * h)
-                aspect_ratio = w / h if h > 0 else 0
-                
-                # Research-based fire validation
-                fire_confidence = self.validate_fire_detection(frame_hsv, x, y, w, h, fire_ratio, aspect_ratio)
-                
-                if fire_confidence > self.FIRE_CONFIDENCE_THRESHOLD:
-                    fire_detections.append({
-                        'bbox': bbox,
-                        'color_ratio': fire_ratio,
-                        'confidence': fire_confidence,
-                        'area': area,
-                        'aspect_ratio': aspect_ratio
-                    })
-        
         # Advanced smoke detection with stricter criteria
         # 1. Light gray smoke detection (more restrictive)
         lower_smoke1 = np.array([0, 0, 120])    # Brighter gray
@@ -425,154 +421,138 @@ class AdvancedDetector:
         # Combine smoke masks
         combined_smoke_mask = cv2.bitwise_or(smoke_mask1, smoke_mask2)
         combined_smoke_mask = cv2.bitwise_or(combined_smoke_mask, smoke_mask3)
+        combined_smoke_mask = self.roi.apply_to_mask(combined_smoke_mask, self.current_frame.shape, rect)
+        combined_smoke_mask = self.smoke_background.apply_to_mask(combined_smoke_mask, rect)
+        if not candidates['smoke']:
+            combined_smoke_mask[:] = 0
         
         # Process smoke mask
         smoke_mask_processed = cv2.morphologyEx(combined_smoke_mask, cv2.MORPH_CLOSE, kernel)
         smoke_mask_processed = cv2.morphologyEx(smoke_mask_processed, cv2.MORPH_OPEN, kernel)
         
-        # Find smoke contours
-        smoke_contours, _ = cv2.findContours(smoke_mask_processed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        for contour in smoke_contours:
-            area = cv2.contourArea(contour)
-            if area > 500:  # Increased minimum smoke area threshold
-                x, y, w, h = cv2.boundingRect(contour)
-                bbox = [x, y, x + w, y + h]
-                
-                # Calculate smoke characteristics
-                smoke_ratio = area / (w * h)
-                aspect_ratio = w / h if h > 0 else 0
-                
-                # Additional smoke validation checks
-                if aspect_ratio < 0.3 or aspect_ratio > 3.0:  # Smoke should be reasonably shaped
-                    continue
-                
-                if smoke_ratio < 0.4:  # Smoke should fill most of its bounding box
-                    continue
-                
-                # Research-based smoke validation
-                smoke_confidence = self.validate_smoke_detection(frame_hsv, x, y, w, h, smoke_ratio, aspect_ratio)
-                
-                if smoke_confidence > self.SMOKE_CONFIDENCE_THRESHOLD:
-                    smoke_detections.append({
-                        'bbox': bbox,
-                        'color_ratio': smoke_ratio,
-                        'confidence': smoke_confidence,
-                        'area': area,
-                        'aspect_ratio': aspect_ratio
-                    })
+        # Fire and smoke regions (areas, boxes, centroids) from connected components
+        regions = extract_regions({'fire': fire_mask_processed, 'smoke': smoke_mask_processed},
+                                  min_area=500)  # Minimum fire/smoke area threshold
+        fire_regions, smoke_regions = regions['fire'], regions['smoke']
+        fire_candidates, smoke_candidates = len(fire_regions), len(smoke_regions)
+        
+        # Additional smoke validation checks: smoke should be reasonably shaped
+        # and fill most of its bounding box
+        aspect_ratios = smoke_regions.aspect_ratios
+        smoke_regions = smoke_regions.select((aspect_ratios >= 0.3) & (aspect_ratios <= 3.0) &
+                                             (smoke_regions.fill_ratios >= 0.4))
+        
+        # Research-based validation of all candidates at once
+        for table, validate, threshold, detections_out in (
+                (fire_regions, self.validate_fire_regions, self.FIRE_CONFIDENCE_THRESHOLD, fire_detections),
+                (smoke_regions, self.validate_smoke_regions, self.SMOKE_CONFIDENCE_THRESHOLD, smoke_detections)):
+            if not len(table):
+                continue
+            confidences = validate(region_stats, table.boxes, table.fill_ratios, table.aspect_ratios)
+            bboxes = table.frame_boxes((ox, oy))
+            for i in np.flatnonzero(confidences > threshold):
+                detections_out.append({
+                    'bbox': [int(v) for v in bboxes[i]],
+                    'color_ratio': float(table.fill_ratios[i]),
+                    'confidence': float(confidences[i]),
+                    'area': float(table.areas[i]),
+                    'aspect_ratio': float(table.aspect_ratios[i])
+                })
         
+        if candidates['fire']:
+            self.fire_smoke_cascade.record('regions', 'fire', fire_candidates, len(fire_detections))
+        if candidates['smoke']:
+            self.fire_smoke_cascade.record('regions', 'smoke', smoke_candidates, len(smoke_detections))
         return fire_detections, smoke_detections
     
     def validate_fire_detection(self, hsv_frame, x, y, w, h, fire_ratio, aspect_ratio):
-        """Research-based fire validation using multiple criteria"""
-        roi = hsv_frame[y:y+h, x:x+w]
-        if roi.size == 0:
+        """Research-based fire validation of one region (see validate_fire_regions)"""
+        if w <= 0 or h <= 0:
             return 0.0
+        stats = RegionStats.from_hsv(hsv_frame[y:y+h, x:x+w])
+        return float(self.validate_fire_regions(stats, [[0, 0, w, h]], [fire_ratio], [aspect_ratio])[0])
+    
+    def validate_fire_regions(self, stats, rects, fire_ratios, aspect_ratios):
+        """Research-based fire validation using multiple criteria, for many regions at once
         
-        # 1. Color distribution analysis
-        h_channel = roi[:, :, 0]
-        s_channel = roi[:, :, 1]
-        v_channel = roi[:, :, 2]
+        stats is a RegionStats of the HSV frame and rects an (N, 4) x, y, w, h array;
+        returns an array of N confidences.
+        """
+        rects = stats.clip(rects)
+        fire_ratios = np.asarray(fire_ratios, dtype=np.float64)
+        aspect_ratios = np.asarray(aspect_ratios, dtype=np.float64)
         
-        # Calculate color statistics
-        h_mean = np.mean(h_channel)
-        s_mean = np.mean(s_channel)
-        v_mean = np.mean(v_channel)
+        # 1. Color distribution analysis
+        h_mean, s_mean, v_mean = stats.means(rects).T
         
         # 2. Fire color validation (research-based thresholds)
-        fire_score = 0.0
-        
         # Hue validation (fire colors: 0-30 and 170-180)
-        if (0 <= h_mean <= 30) or (170 <= h_mean <= 180):
-            fire_score += 0.3
+        fire_score = 0.3 * (((0 <= h_mean) & (h_mean <= 30)) | ((170 <= h_mean) & (h_mean <= 180)))
         
         # Saturation validation (fire has high saturation)
-        if s_mean > 100:
-            fire_score += 0.2
+        fire_score += 0.2 * (s_mean > 100)
         
         # Value validation (fire is bright)
-        if v_mean > 150:
-            fire_score += 0.2
+        fire_score += 0.2 * (v_mean > 150)
         
         # 3. Shape analysis (fire tends to be irregular)
-        if 0.5 < aspect_ratio < 2.0:
-            fire_score += 0.1
+        fire_score += 0.1 * ((0.5 < aspect_ratios) & (aspect_ratios < 2.0))
         
         # 4. Area ratio validation
-        if fire_ratio > 0.2:
-            fire_score += 0.2
+        fire_score += 0.2 * (fire_ratios > 0.2)
         
         # 5. Temporal consistency (if available)
         # This would require frame history - simplified for now
         fire_score += 0.1
         
-        return min(fire_score, 1.0)
+        empty = (rects[:, 2] == 0) | (rects[:, 3] == 0)
+        return np.where(empty, 0.0, np.minimum(fire_score, 1.0))
     
     def validate_smoke_detection(self, hsv_frame, x, y, w, h, smoke_ratio, aspect_ratio):
-        """Research-based smoke validation using multiple criteria"""
-        roi = hsv_frame[y:y+h, x:x+w]
-        if roi.size == 0:
+        """Research-based smoke validation of one region (see validate_smoke_regions)"""
+        if w <= 0 or h <= 0:
             return 0.0
+        stats = RegionStats.from_hsv(hsv_frame[y:y+h, x:x+w])
+        return float(self.validate_smoke_regions(stats, [[0, 0, w, h]], [smoke_ratio], [aspect_ratio])[0])
+    
+    def validate_smoke_regions(self, stats, rects, smoke_ratios, aspect_ratios):
+        """Research-based smoke validation using multiple criteria, for many regions at once
         
-        # 1. Color distribution analysis
-        h_channel = roi[:, :, 0]
-        s_channel = roi[:, :, 1]
-        v_channel = roi[:, :, 2]
+        Like validate_fire_regions; edge density comes from one Canny pass over the
+        whole stats image instead of one per region.
+        """
+        rects = stats.clip(rects)
+        smoke_ratios = np.asarray(smoke_ratios, dtype=np.float64)
+        aspect_ratios = np.asarray(aspect_ratios, dtype=np.float64)
         
-        # Calculate color statistics
-        h_mean = np.mean(h_channel)
-        s_mean = np.mean(s_channel)
-        v_mean = np.mean(v_channel)
+        # 1. Color distribution analysis
+        _, s_mean, v_mean = stats.means(rects).T
         
         # 2. Smoke color validation (stricter research-based thresholds)
-        smoke_score = 0.0
-        
         # Hue validation (smoke is grayish - very low saturation)
-        if s_mean < 30:  # Much stricter saturation requirement
-            smoke_score += 0.3
-        elif s_mean < 50:
-            smoke_score += 0.1  # Lower score for higher saturation
+        smoke_score = np.select([s_mean < 30, s_mean < 50], [0.3, 0.1], 0.0)
         
         # Value validation (smoke has specific brightness range)
-        if 80 < v_mean < 180:  # More restrictive brightness range
-            smoke_score += 0.2
-        elif 60 < v_mean < 200:
-            smoke_score += 0.1
+        smoke_score += np.select([(80 < v_mean) & (v_mean < 180), (60 < v_mean) & (v_mean < 200)], [0.2, 0.1], 0.0)
         
         # 3. Shape analysis (smoke tends to be vertical/irregular)
-        if 0.8 < aspect_ratio < 2.5:  # More restrictive aspect ratio
-            smoke_score += 0.2
-        elif aspect_ratio > 0.8:
-            smoke_score += 0.1
+        smoke_score += np.select([(0.8 < aspect_ratios) & (aspect_ratios < 2.5), aspect_ratios > 0.8],
+                                 [0.2, 0.1], 0.0)
         
         # 4. Area ratio validation (stricter)
-        if smoke_ratio > 0.5:  # Higher ratio requirement
-            smoke_score += 0.2
-        elif smoke_ratio > 0.3:
-            smoke_score += 0.1
+        smoke_score += np.select([smoke_ratios > 0.5, smoke_ratios > 0.3], [0.2, 0.1], 0.0)
         
         # 5. Texture analysis (smoke has very soft edges)
-        # Calculate edge density
-        gray_roi = cv2.cvtColor(roi, cv2.COLOR_HSV2BGR)
-        gray_roi = cv2.cvtColor(gray_roi, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray_roi, 50, 150)
-        edge_density = np.sum(edges > 0) / edges.size
-        
-        if edge_density < 0.05:  # Much stricter edge requirement
-            smoke_score += 0.2
-        elif edge_density < 0.1:
-            smoke_score += 0.1
+        edge_density = stats.edge_density(rects)
+        smoke_score += np.select([edge_density < 0.05, edge_density < 0.1], [0.2, 0.1], 0.0)
         
         # 6. Additional validation: check for uniform color distribution
         # Smoke should have relatively uniform color
-        s_std = np.std(s_channel)
-        v_std = np.std(v_channel)
-        
-        if s_std < 15 and v_std < 25:  # Low color variation
-            smoke_score += 0.1
+        _, s_std, v_std = stats.stds(rects).T
+        smoke_score += 0.1 * ((s_std < 15) & (v_std < 25))
         
-        return min(smoke_score, 1.0)
+        empty = (rects[:, 2] == 0) | (rects[:, 3] == 0)
+        return np.where(empty, 0.0, np.minimum(smoke_score, 1.0))
     
     def find_person_clusters(self, positions, max_distance=150):
         """Find clusters of people using distance-based clustering"""
@@ -699,8 +679,9 @@ class AdvancedDetector:
         # Calculate optical flow for motion detection
         motion_level = self.calculate_optical_flow(frame)
         
-        # Run YOLOv8 detection
-        results = self.model(frame, verbose=False)
+        # Run YOLOv8 detection on the ROI crop; results come back in frame coordinates
+        view, offset = self.roi.crop(frame)
+        results = self.roi.restore_results(self.tiler(view, **self.inference), frame, offset)
         
         # Extract detections
         detections = []
@@ -712,7 +693,7 @@ class AdvancedDetector:
                         confidence = float(box.conf[0])
                         class_id = int(box.cls[0])
                         
-                        if confidence >= 0.3:
+                        if confidence >= self.inference["conf"]:
                             bbox = box.xyxy[0].cpu().numpy()
                             detections.append({
                                 'class': 'person',  # Simplified for demo
@@ -736,64 +717,23 @@ class AdvancedDetector:
         # Update fire history for temporal analysis
         self.fire_history.append(self.current_frame.copy())
         
-        # Update detection history with proper float conversion
-        self.detection_history['stampede'] = {
-            'confidence': float(stampede_conf),
-            'status': 'detected' if stampede_detected else 'not_detected'
-        }
-        
-        self.detection_history['running'] = {
-            'confidence': float(max([d['confidence'] for d in running_detections], default=0.0)),
-            'status': 'detected' if running_detections else 'not_detected'
-        }
-        
-        self.detection_history['fallen'] = {
-            'confidence': float(max([d['confidence'] for d in fallen_detections], default=0.0)),
-            'status': 'detected' if fallen_detections else 'not_detected'
-        }
-        
-        self.detection_history['fire'] = {
-            'confidence': float(max([d['confidence'] for d in fire_detections], default=0.0)),
-            'status': 'detected' if fire_detections else 'not_detected'
-        }
-        
-        self.detection_history['smoke'] = {
-            'confidence': float(max([d['confidence'] for d in smoke_detections], default=0.0)),
-            'status': 'detected' if smoke_detections else 'not_detected'
-        }
-        
-        # Medical emergency detection (simplified for now)
-        self.detection_history['medical emergency'] = {
-            'confidence': 0.0,  # Placeholder for medical emergency detection
-            'status': 'not_detected'
-        }
-        
-        # Add temporal analysis
-        self.temporal_window.append({
-            'stampede': stampede_detected,
-            'running': len(running_detections) > 0,
-            'fallen': len(fallen_detections) > 0,
-            'fire': len(fire_detections) > 0,
-            'smoke': len(smoke_detections) > 0,
-            'medical emergency': False  # Placeholder
-        })
-        
-        # Apply temporal filtering (require detection in multiple frames)
-        if len(self.temporal_window) >= 3:
-            recent_detections = list(self.temporal_window)[-3:]
-
-            # Different temporal requirements for different event types
-            for event_type in ['stampede', 'running', 'fallen', 'fire', 'smoke', 'medical emergency']:
-                # Fallen detection is more responsive - only needs 1 detection in recent frames
-                required_detections = 1 if event_type == 'fallen' else 2
-                if sum(1 for frame in recent_detections if frame[event_type]) >= required_detections:
-                    if self.detection_history[event_type]['confidence'] > 0:
-                        self.detection_history[event_type]['status'] = 'detected'
+        # Update detection history: per-frame observations go through the temporal
+        # state machines (debounce, hysteresis and confidence decay per event)
+        self.detection_history.update(self.evidence.update_all({
+            'stampede': (stampede_detected, float(stampede_conf)),
+            'running': (running_detections, max([d['confidence'] for d in running_detections], default=0.0)),
+            'fallen': (fallen_detections, max([d['confidence'] for d in fallen_detections], default=0.0)),
+            'fire': (fire_detections, max([d['confidence'] for d in fire_detections], default=0.0)),
+            'smoke': (smoke_detections, max([d['confidence'] for d in smoke_detections], default=0.0)),
+            # Medical emergency detection (simplified for now)
+            'medical emergency': (False, 0.0)
+        }))
         
         return results[0].plot() if results else frame
 
 def main():
     """Main function for advanced detection"""
+    setup_logging()
     print("🚀 Starting Advanced Real-Time Detection")
     print("=" * 50)
     
@@ -831,6 +771,8 @@ def main():
             print("❌ Please enter a valid number (0, 1, or 2)")
     
     print(f"🎥 Using camera {camera_source}")
+    detector.roi = RoiMask.from_config(key=camera_source)
+    detector.smoke_background = StaticBackground.from_settings(camera=camera_source)
     
     # Initialize video capture
     cap = cv2.VideoCapture(camera_source)
@@ -838,6 +780,8 @@ def main():
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
     
     last_log_time = time.time()
+    activity_log = open_activity_log(dict(LOG_SETTINGS, filename="advanced_activity_log.jsonl"),
+                                     "advanced", camera=str(camera_source))
     
     try:
         while True:
@@ -856,14 +800,10 @@ def main():
                     "timestamp": timestamp,
                     "events": detector.detection_history.copy()
                 }
-                print(json.dumps(log_entry, indent=2))
+                print(f"{timestamp} {summarize_events(log_entry['events'])}")
                 
-                # Save to file
-                try:
-                    with open("advanced_activity_log.jsonl", "a", encoding="utf-8") as f:
-                        f.write(json.dumps(log_entry) + '\n')
-                except Exception as e:
-                    print(f"Error writing to log file: {e}")
+                # Save to file (batched, flushed and rotated by the writer)
+                activity_log.write(log_entry)
                 
                 last_log_time = current_time
             
@@ -878,6 +818,9 @@ def main():
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        activity_log.close()
+        detector.smoke_background.save()
+        print(f"🔥 Fire/smoke cascade pass rates: {detector.fire_smoke_cascade.summary()}")
         print("✅ Advanced detection stopped")
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Async Server Support
+Helpers for serving the video streaming service on eventlet or gevent green
+threads: native threads for CPU-bound camera loops, a shared per-camera JPEG
+broadcaster and connection limits for viewers. Monkey patching lives in
+green_threads.py, which has to run before this module's imports.
+"""
+
+import logging
+import os
+from collections import deque
+import cv2
+from detection_config import SERVER_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MODE = os.getenv("VIDEO_SERVICE_ASYNC_MODE", SERVER_SETTINGS["async_mode"])
+
+
+def start_native_thread(target, args=(), async_mode=ASYNC_MODE):
+    """Run target on a real OS thread so inference never blocks the event loop"""
+    if async_mode == "eventlet":
+        from eventlet import patcher
+        patcher.original("_thread").start_new_thread(target, args)
+        return None
+    if async_mode == "gevent":
+        from gevent import monkey
+        monkey.get_original("_thread", "start_new_thread")(target, args)
+        return None
+
+    import threading
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+class ConnectionLimiter:
+    """Counts concurrent connections and rejects new ones above a limit"""
+
+    def __init__(self, limit):
+        import threading
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Reserve a slot, returns False when the limit is reached"""
+        with self._lock:
+            if self.limit and self.active >= self.limit:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active = max(0, self.active - 1)
+
+
+class FrameBroadcaster:
+    """Latest annotated frame per camera, JPEG-encoded once for all viewers"""
+
+    def __init__(self, jpeg_quality=85):
+        import threading
+        self.jpeg_quality = jpeg_quality
+        self._frames = {}  # camera_id -> (seq, frame), replaced atomically by producers
+        self._jpegs = {}   # camera_id -> (seq, jpeg bytes)
+        self._lock = threading.Lock()
+
+    def publish(self, camera_id, frame):
+        """Store a new frame (called from the camera thread, never blocks)"""
+        seq = self._frames.get(camera_id, (0, None))[0] + 1
+        self._frames[camera_id] = (seq, frame)
+
+    def remove(self, camera_id):
+        self._frames.pop(camera_id, None)
+        self._jpegs.pop(camera_id, None)
+
+    def get_jpeg(self, camera_id, after_seq=0):
+        """Return (seq, jpeg) newer than after_seq, or None"""
+        entry = self._frames.get(camera_id)
+        if entry is None or entry[0] <= after_seq:
+            return None
+
+        cached = self._jpegs.get(camera_id)
+        if cached is not None and cached[0] >= entry[0]:
+            return cached
+
+        with self._lock:
+            cached = self._jpegs.get(camera_id)
+            if cached is not None and cached[0] >= entry[0]:
+                return cached
+            ret, buffer = cv2.imencode('.jpg', entry[1], [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ret:
+                return None
+            cached = (entry[0], buffer.tobytes())
+            self._jpegs[camera_id] = cached
+            return cached
+
+
+class MainLoopOutbox:
+    """Hands work from native threads to a task running on the server's event loop"""
+
+    def __init__(self, deliver, sleep, poll_interval=0.01, maxlen=1000):
+        self.deliver = deliver
+        self.sleep = sleep
+        self.poll_interval = poll_interval
+        self._items = deque(maxlen=maxlen)  # oldest items are dropped when full
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, *item):
+        if len(self._items) == self._items.maxlen:
+            self.dropped += 1
+        self._items.append(item)
+
+    def run(self):
+        """Drain forever; start with socketio.start_background_task"""
+        while True:
+            while self._items:
+                try:
+                    self.deliver(*self._items.popleft())
+                except Exception as e:
+                    logger.exception(f"Error delivering from outbox: {e}")
+            self.sleep(self.poll_interval)
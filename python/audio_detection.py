@@ -13,6 +13,7 @@ import time
 from collections import deque
 import librosa
 import soundfile as sf
+from temporal_evidence import TemporalEvidence
 
 class AudioDetector:
     """Audio-based emergency detection using sound analysis"""
@@ -32,6 +33,8 @@ class AudioDetector:
         # Audio analysis parameters
         self.audio_buffer = deque(maxlen=50)  # Store recent audio chunks
         self.feature_history = deque(maxlen=20)  # Store audio features
+        # Ring counters of the last 5 distress/fire/panic results
+        self.evidence = TemporalEvidence.from_settings(rules={'default': {'window': 5, 'on': 4, 'off': 2}})
         
         # Emergency sound patterns
         self.distress_patterns = {
@@ -249,6 +252,8 @@ class AudioDetector:
             'panic': panic_result,
             'timestamp': time.time()
         })
+        for kind, result in (('distress', distress_result), ('fire', fire_result), ('panic', panic_result)):
+            self.evidence.update(kind, result['detected'], result['confidence'])
         
         return {
             'distress': distress_result,
@@ -259,25 +264,14 @@ class AudioDetector:
     
     def temporal_consistency_check(self):
         """Check temporal consistency of audio detections"""
-        if len(self.feature_history) < 5:
-            return {}
-        
-        recent_results = list(self.feature_history)[-5:]
-        
-        # Calculate consistency scores
-        distress_consistency = sum(1 for r in recent_results if r['distress']['detected']) / len(recent_results)
-        fire_consistency = sum(1 for r in recent_results if r['fire']['detected']) / len(recent_results)
-        panic_consistency = sum(1 for r in recent_results if r['panic']['detected']) / len(recent_results)
-        
-        # Boost confidence if consistently detected
         boosted_results = {}
-        
-        if distress_consistency > 0.6:
-            boosted_results['distress_boosted'] = True
-        if fire_consistency > 0.6:
-            boosted_results['fire_boosted'] = True
-        if panic_consistency > 0.6:
-            boosted_results['panic_boosted'] = True
+        for kind in ('distress', 'fire', 'panic'):
+            # Share of detections in the last 5 chunks, None until 5 were analyzed
+            consistency = self.evidence.state(kind).consistency()
+            
+            # Boost confidence if consistently detected
+            if consistency is not None and consistency > 0.6:
+                boosted_results[f'{kind}_boosted'] = True
         
         return boosted_results
     
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Camera Count Scaling Benchmark
+Starts increasing numbers of cameras in the video streaming service, each fed
+by a real-time paced offline source (recorded footage or a synthetic scene),
+and measures processed fps per camera, CPU and memory at each camera count.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+os.environ.setdefault("VIDEO_SERVICE_AUTODETECT", "0")
+
+from benchmark_pipeline import ResourceSampler, run_metadata
+from logging_setup import setup_logging
+
+
+def camera_source_spec(base_spec, index, stagger):
+    """Give each camera its own start offset so they don't process identical frames"""
+    separator = "&" if "?" in base_spec else "?"
+    if base_spec.startswith("synthetic"):
+        return f"{base_spec}{separator}seed={index}&pacing=realtime"
+    if base_spec.startswith(("file:", "images:")):
+        return f"{base_spec}{separator}loop=1&pacing=realtime&start={index * stagger:.2f}"
+    return f"file:{base_spec}?loop=1&pacing=realtime&start={index * stagger:.2f}"
+
+
+def start_stand_in_server(spec):
+    """Run the MJPEG stand-in server in its own process, returns (process, url)"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frame_sources.py")
+    process = subprocess.Popen([sys.executable, script, spec, "--port", str(port)])
+
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process, f"http://127.0.0.1:{port}/video"
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Stand-in MJPEG server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Video streaming service camera-count scaling benchmark")
+    parser.add_argument("--source", default="synthetic", help="Frame source spec or video file for every camera")
+    parser.add_argument("--counts", default="1,2,4,8,16,32", help="Comma-separated camera counts")
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per camera count")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds after starting cameras before measuring")
+    parser.add_argument("--stagger", type=float, default=1.7, help="Start offset in seconds between cameras")
+    parser.add_argument("--via-http", action="store_true",
+                        help="Serve the source through the local MJPEG stand-in server (IP camera path)")
+    parser.add_argument("--full-publish", action="store_true",
+                        help="Keep MongoDB writes and WebSocket emits in the measured path")
+    parser.add_argument("--output", help="Results file (default: benchmark_results/cameras_<time>.json)")
+    args = parser.parse_args()
+
+    setup_logging()
+    from video_streaming_service import video_service
+
+    # Count processed frames per camera where results leave the pipeline
+    processed = Counter()
+    counter_lock = threading.Lock()
+    deliver = video_service.deliver_detections
+
+    def counting_deliver(camera_id, detections):
+        with counter_lock:
+            processed[camera_id] += 1
+        if args.full_publish:
+            deliver(camera_id, detections)
+
+    video_service.deliver_detections = counting_deliver
+
+    server, server_url = None, None
+    if args.via_http:
+        server, server_url = start_stand_in_server(args.source)
+
+    steps = []
+    for count in [int(c) for c in args.counts.split(",")]:
+        cameras = [{
+            "id": f"load_cam_{index:02d}",
+            "name": f"Load Camera {index + 1}",
+            "zone": f"load_zone_{index % 4}",
+            "location": "Scaling benchmark",
+            "source": server_url or camera_source_spec(args.source, index, args.stagger),
+            "autostart": True
+        } for index in range(count)]
+
+        _, started = video_service.assign_cameras(cameras)
+        time.sleep(args.warmup)
+
+        with counter_lock:
+            processed.clear()
+        sampler = ResourceSampler()
+        sampler.start()
+        measure_start = time.perf_counter()
+        while time.perf_counter() - measure_start < args.duration:
+            time.sleep(0.5)
+            sampler.sample()
+        elapsed = time.perf_counter() - measure_start
+        with counter_lock:
+            per_camera = {camera["id"]: processed[camera["id"]] / elapsed for camera in cameras}
+        resources = sampler.stop()
+
+        fps_values = sorted(per_camera.values())
+        step = {
+            "cameras": count,
+            "started": len(started),
+            "total_fps": sum(fps_values),
+            "per_camera_fps_mean": sum(fps_values) / len(fps_values),
+            "per_camera_fps_min": fps_values[0],
+            "per_camera_fps": per_camera,
+            "resources": resources
+        }
+        steps.append(step)
+        print(f"{count:3d} cameras ({len(started)} started): total {step['total_fps']:7.1f} fps, "
+              f"per camera mean {step['per_camera_fps_mean']:5.1f} min {step['per_camera_fps_min']:5.1f}, "
+              f"CPU {resources['cpu_percent']:5.0f}%, RSS {resources['rss_peak_mb']:6.0f} MB")
+
+        video_service.assign_cameras([])
+        time.sleep(1.0)
+
+    if server is not None:
+        server.terminate()
+
+    report = {
+        "run": dict(run_metadata(argparse.Namespace(source=args.source, width=None, height=None,
+                                                    frames=None, warmup=args.warmup)),
+                    execution_mode=video_service.execution_mode, via_http=args.via_http,
+                    duration_s=args.duration),
+        "steps": steps
+    }
+    output = args.output or os.path.join(
+        "benchmark_results", f"cameras_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
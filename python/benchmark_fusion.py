@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Fusion Micro-Benchmark
+Measures the cost of multi-modal fusion on synthetic detector results: encoding
+one camera's results as evidence, fusing cameras one at a time, and fusing a
+whole batch of cameras in a single matrix operation.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import time
+import numpy as np
+from benchmark_pipeline import run_metadata
+from fusion_engine import FusionEngine, MODALITIES, EVENTS
+
+
+def synthetic_results(rng):
+    """Detector results of one camera, as EnhancedMultiModalDetector passes them to fusion"""
+    person_bboxes = [{'bbox': [x, y, x + w, y + h]}
+                     for x, y, w, h in rng.uniform([0, 0, 20, 20], [600, 400, 200, 200], (rng.integers(0, 30), 4))]
+    pose_results = [{'emergency_detected': bool(rng.random() < 0.2), 'fallen_detected': bool(rng.random() < 0.2),
+                     'confidence': float(rng.random())} for _ in range(rng.integers(0, 4))]
+    fire_smoke_results = {'fire_detected': bool(rng.random() < 0.1), 'smoke_detected': bool(rng.random() < 0.1),
+                          'max_fire_confidence': float(rng.random()), 'max_smoke_confidence': float(rng.random())}
+    crowd_results = {'stampede_detected': bool(rng.random() < 0.1), 'stampede_confidence': float(rng.random()),
+                     'motion_level': float(rng.uniform(0, 4))}
+    audio_results = {kind: {'detected': bool(rng.random() < 0.1), 'confidence': float(rng.random())}
+                     for kind in ('panic', 'distress', 'fire')}
+    return person_bboxes, pose_results, fire_smoke_results, crowd_results, audio_results
+
+
+def timed(function, iterations):
+    """Mean microseconds per call"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure multi-modal fusion cost per camera")
+    parser.add_argument("--cameras", default="1,16,256,4096", help="Camera counts to fuse in one batch")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Results file (default: benchmark_results/fusion_<time>.json)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    engine = FusionEngine.from_settings()
+    samples = [synthetic_results(rng) for _ in range(256)]
+    single = engine.evidence(*samples[0])
+
+    report = {
+        "run": dict(run_metadata(argparse.Namespace(source="synthetic", width=None, height=None,
+                                                    frames=args.iterations, warmup=0)),
+                    modalities=len(MODALITIES), events=len(EVENTS)),
+        "per_camera_us": {
+            "encode": timed(lambda: engine.evidence(*samples[rng.integers(len(samples))]), args.iterations),
+            "fuse": timed(lambda: engine.fuse(single), args.iterations),
+            "fuse_to_dict": timed(lambda: engine.results(single), args.iterations)
+        },
+        "batched": {}
+    }
+    per_camera = report["per_camera_us"]
+    print(f"per camera   encode {per_camera['encode']:7.2f} µs  fuse {per_camera['fuse']:6.2f} µs  "
+          f"fuse+dict {per_camera['fuse_to_dict']:6.2f} µs")
+
+    for cameras in (int(value) for value in args.cameras.split(",")):
+        evidence = np.empty((cameras, len(MODALITIES), len(EVENTS)))
+        for camera in range(cameras):
+            engine.evidence(*samples[camera % len(samples)], out=evidence[camera])
+        iterations = max(args.iterations * 16 // max(cameras, 16), 10)
+        loop_us = timed(lambda: [engine.fuse(camera_evidence) for camera_evidence in evidence], iterations)
+        batch_us = timed(lambda: engine.fuse(evidence), iterations)
+        report["batched"][str(cameras)] = {
+            "loop_us": loop_us,
+            "batch_us": batch_us,
+            "batch_us_per_camera": batch_us / cameras,
+            "speedup": loop_us / batch_us
+        }
+        print(f"{cameras:6d} cameras  one by one {loop_us:10.1f} µs  batched {batch_us:8.1f} µs  "
+              f"({batch_us / cameras:6.3f} µs/camera, {loop_us / batch_us:6.1f}x)")
+
+    output = args.output or os.path.join(
+        "benchmark_results", f"fusion_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Model Backend Benchmark
+Runs the same frames through the YOLO model on each available backend and
+precision (PyTorch, ONNX Runtime, OpenVINO; FP32 and INT8 exports) and reports
+fps, latency percentiles and accuracy drift against the PyTorch FP32 results.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import time
+import numpy as np
+from frame_sources import open_frame_source
+from benchmark_pipeline import run_metadata
+from logging_setup import setup_logging
+from model_runtime import (CPU_BACKENDS, backend_available, exported_model_path, load_detection_model,
+                           load_settings)
+
+
+def box_iou(a, b):
+    """IoU matrix between two (N, 4) and (M, 4) xyxy arrays"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+
+def result_arrays(results):
+    """(boxes xyxy, confidences, classes) from ultralytics results"""
+    if not results or results[0].boxes is None or len(results[0].boxes) == 0:
+        return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=int)
+    boxes = results[0].boxes
+    return (np.asarray(boxes.xyxy.cpu() if hasattr(boxes.xyxy, "cpu") else boxes.xyxy, dtype=float),
+            np.asarray(boxes.conf.cpu() if hasattr(boxes.conf, "cpu") else boxes.conf, dtype=float),
+            np.asarray(boxes.cls.cpu() if hasattr(boxes.cls, "cpu") else boxes.cls, dtype=int))
+
+
+def compare_to_reference(reference, candidate, iou_threshold):
+    """Greedy same-class matching; returns (matched, reference count, candidate count, ious, conf deltas)"""
+    ref_boxes, ref_conf, ref_cls = reference
+    boxes, conf, cls = candidate
+    ious = box_iou(ref_boxes, boxes)
+    ious[ref_cls[:, None] != cls[None, :]] = 0.0
+    matched_ious, conf_deltas = [], []
+    while ious.size and ious.max() >= iou_threshold:
+        i, j = np.unravel_index(np.argmax(ious), ious.shape)
+        matched_ious.append(float(ious[i, j]))
+        conf_deltas.append(float(conf[j] - ref_conf[i]))
+        ious[i, :] = 0.0
+        ious[:, j] = 0.0
+    return len(matched_ious), len(ref_boxes), len(boxes), matched_ious, conf_deltas
+
+
+def variants(requested_backends, requested_precisions, settings):
+    """(backend, precision) pairs that can run here; PyTorch FP32 first as the reference"""
+    found = [("pytorch", "fp32")]
+    for backend in requested_backends:
+        if backend not in CPU_BACKENDS or not backend_available(backend):
+            continue
+        for precision in requested_precisions:
+            path = exported_model_path(settings["weights"], backend, precision, settings["imgsz"],
+                                       settings["export_dir"])
+            if os.path.exists(path):
+                found.append((backend, precision))
+            else:
+                print(f"⏭️  {backend} {precision}: no export at {path} (python model_runtime.py export ...)")
+    return found
+
+
+def main():
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Compare YOLO runtime backends on fps and accuracy drift")
+    parser.add_argument("--source", default="synthetic", help="Frame source spec (see frame_sources.py)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=200, help="Measured frames per backend")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--backends", default="openvino,onnx")
+    parser.add_argument("--precisions", default="fp32,int8")
+    parser.add_argument("--conf", type=float, default=0.3, help="Confidence threshold, as in the service")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU for matching boxes to the reference")
+    parser.add_argument("--output", help="Results file (default: benchmark_results/models_<time>.json)")
+    args = parser.parse_args()
+
+    settings = load_settings()
+    source = open_frame_source(args.source, pacing="max", loop=True, width=args.width, height=args.height)
+    if source is None or not source.isOpened():
+        raise SystemExit(f"Could not open source {args.source}")
+    frames = []
+    for _ in range(args.frames):
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+
+    reference = None
+    report = {
+        "run": dict(run_metadata(argparse.Namespace(source=args.source, width=args.width, height=args.height,
+                                                    frames=len(frames), warmup=args.warmup)),
+                    weights=settings["weights"], imgsz=settings["imgsz"]),
+        "variants": {}
+    }
+    for backend, precision in variants(args.backends.split(","), args.precisions.split(","), settings):
+        name = f"{backend}_{precision}"
+        model = load_detection_model(backend=backend, precision=precision)
+        if model.runtime_backend != backend:
+            print(f"⚠️ {name}: fell back to {model.runtime_backend}, skipping")
+            continue
+        for frame in frames[:args.warmup]:
+            model(frame, conf=args.conf, verbose=False)
+
+        latencies, outputs = [], []
+        for frame in frames:
+            started = time.perf_counter()
+            results = model(frame, conf=args.conf, verbose=False)
+            latencies.append(time.perf_counter() - started)
+            outputs.append(result_arrays(results))
+        ms = np.asarray(latencies) * 1000.0
+        result = {
+            "path": model.runtime_path,
+            "fps": len(frames) / max(sum(latencies), 1e-9),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "detections": int(sum(len(output[0]) for output in outputs))
+        }
+
+        if reference is None:
+            reference = outputs
+        else:
+            matched = ref_total = cand_total = 0
+            ious, deltas = [], []
+            for ref_output, output in zip(reference, outputs):
+                m, r, c, frame_ious, frame_deltas = compare_to_reference(ref_output, output, args.iou)
+                matched, ref_total, cand_total = matched + m, ref_total + r, cand_total + c
+                ious.extend(frame_ious)
+                deltas.extend(frame_deltas)
+            result["drift"] = {
+                "recall_vs_reference": matched / ref_total if ref_total else 1.0,
+                "precision_vs_reference": matched / cand_total if cand_total else 1.0,
+                "mean_matched_iou": float(np.mean(ious)) if ious else None,
+                "mean_confidence_delta": float(np.mean(deltas)) if deltas else None,
+                "max_abs_confidence_delta": float(np.max(np.abs(deltas))) if deltas else None
+            }
+        report["variants"][name] = result
+
+        drift = result.get("drift")
+        drift_text = (f"recall {drift['recall_vs_reference']:.3f} precision {drift['precision_vs_reference']:.3f} "
+                      f"vs pytorch_fp32" if drift else "reference")
+        print(f"{name:16s} {result['fps']:7.1f} fps  p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms  "
+              f"{result['detections']:6d} detections  {drift_text}")
+
+    output = args.output or os.path.join(
+        "benchmark_results", f"models_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
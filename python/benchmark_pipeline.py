@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+End-to-End Pipeline Benchmark
+Feeds recorded video or synthetic frames through the detection pipelines at
+maximum speed and reports fps, per-stage p50/p95/p99 latency, CPU and RSS.
+Results are written as JSON so runs can be compared over time.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+import cv2
+import numpy as np
+from frame_sources import open_frame_source
+from logging_setup import setup_logging
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    import resource
+    PSUTIL_AVAILABLE = False
+
+TARGETS = ["service", "advanced", "multimodal", "multi_camera"]
+
+
+class StageTimer:
+    """Collects latency samples per named stage"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def record(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    def time(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.samples[stage].append(time.perf_counter() - start)
+
+    def summary(self):
+        """Latency percentiles in milliseconds per stage"""
+        stages = {}
+        for stage, values in self.samples.items():
+            ms = np.asarray(values) * 1000.0
+            stages[stage] = {
+                "count": int(ms.size),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max())
+            }
+        return stages
+
+
+class TimedCallable:
+    """Wraps a callable attribute (e.g. a YOLO model) and times each call"""
+
+    def __init__(self, target, timer, stage):
+        self._target = target
+        self._timer = timer
+        self._stage = stage
+
+    def __call__(self, *args, **kwargs):
+        return self._timer.time(self._stage, self._target, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+def instrument(obj, names, timer, prefix):
+    """Time calls to the named methods/attributes of obj under prefix.name"""
+    for name in names:
+        target = getattr(obj, name, None)
+        if target is not None and callable(target):
+            setattr(obj, name, TimedCallable(target, timer, f"{prefix}.{name}"))
+
+
+class ResourceSampler:
+    """Process CPU utilisation and resident memory during a run"""
+
+    def __init__(self):
+        self.process = psutil.Process() if PSUTIL_AVAILABLE else None
+        self.peak_rss = 0
+
+    def rss_bytes(self):
+        if self.process is not None:
+            return self.process.memory_info().rss
+        # ru_maxrss is in KiB on Linux (peak, not current)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def start(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = sum(os.times()[:2])
+        self.peak_rss = self.rss_bytes()
+
+    def sample(self):
+        self.peak_rss = max(self.peak_rss, self.rss_bytes())
+
+    def stop(self):
+        wall = time.perf_counter() - self.wall_start
+        cpu = sum(os.times()[:2]) - self.cpu_start
+        return {
+            "cpu_percent": 100.0 * cpu / wall if wall > 0 else 0.0,
+            "cpu_cores": os.cpu_count(),
+            "rss_peak_mb": self.peak_rss / 1e6,
+            "rss_end_mb": self.rss_bytes() / 1e6
+        }
+
+
+def build_service_runner(timer, args):
+    """VideoStreamingService: inference, post-processing, drawing and JPEG encoding"""
+    os.environ.setdefault("VIDEO_SERVICE_AUTODETECT", "0")
+    from video_streaming_service import video_service
+
+    def run(camera_id, frame):
+        results = timer.time("service.inference", video_service.model, frame,
+                             conf=video_service.CONFIDENCE_THRESHOLD, verbose=False)
+        detections = timer.time("service.postprocess", video_service.process_detections,
+                                results, frame, camera_id)
+        annotated = timer.time("service.draw", video_service.draw_detections, frame, detections)
+        timer.time("service.encode", cv2.imencode, '.jpg', annotated, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        if args.with_storage:
+            timer.time("service.store", video_service.store_detection_results, camera_id, detections)
+
+    return run
+
+
+def build_advanced_runner(timer, args):
+    """AdvancedDetector.process_frame with its main stages instrumented"""
+    from advanced_detection import AdvancedDetector
+    detector = AdvancedDetector()
+    # Inference goes through the tiler: time it whole and the model calls inside it
+    instrument(detector.tiler, ["model"], timer, "advanced.tiler")
+    instrument(detector, ["tiler", "calculate_optical_flow", "update_person_tracking", "detect_stampede",
+                          "detect_running", "detect_fallen", "detect_fire_smoke"], timer, "advanced")
+    return lambda camera_id, frame: detector.process_frame(frame)
+
+
+def build_multimodal_runner(timer, args):
+    """EnhancedMultiModalDetector.process_frame with its detectors instrumented"""
+    from enhanced_multimodal_detection import EnhancedMultiModalDetector
+    detector = EnhancedMultiModalDetector()
+    instrument(detector.yolo_tiler, ["model"], timer, "multimodal.yolo_tiler")
+    instrument(detector, ["yolo_tiler", "extract_person_bboxes", "fuse_detections"], timer, "multimodal")
+    for attr in ["pose_detector", "fire_smoke_detector", "crowd_detector"]:
+        component = getattr(detector, attr, None)
+        if component is not None:
+            instrument(component, ["detect_poses", "process_frame", "detect_fire_smoke", "analyze_crowd"],
+                       timer, f"multimodal.{attr}")
+    return lambda camera_id, frame: detector.process_frame(frame)
+
+
+def build_multi_camera_runner(timer, args):
+    """MultiCameraDetector.process_camera_frame (headless) plus aggregation snapshots"""
+    from multi_camera_detection import MultiCameraDetector
+    detector = MultiCameraDetector(execution_mode="threads", display_mode="headless")
+    instrument(detector, ["model"], timer, "multi_camera")
+    detector.aggregator.start(detector.detection_bus)
+
+    def run(camera_id, frame):
+        if camera_id not in detector.camera_info:
+            detector.setup_camera_info(camera_id, camera_id)
+        detector.process_camera_frame(camera_id, frame, render=False)
+        timer.time("multi_camera.snapshot", detector.aggregator.snapshot)
+
+    return run
+
+
+RUNNER_BUILDERS = {
+    "service": build_service_runner,
+    "advanced": build_advanced_runner,
+    "multimodal": build_multimodal_runner,
+    "multi_camera": build_multi_camera_runner
+}
+
+
+def run_target(name, args):
+    """Benchmark one target, returns its result dict"""
+    timer = StageTimer()
+    runner = RUNNER_BUILDERS[name](timer, args)
+    cameras = args.cameras if name == "multi_camera" else 1
+    sources = [open_frame_source(args.source, pacing="max", loop=True, width=args.width, height=args.height)
+               for _ in range(cameras)]
+    if not all(source is not None and source.isOpened() for source in sources):
+        raise RuntimeError(f"Could not open source {args.source}")
+
+    def next_frame(index):
+        ret, frame = sources[index % cameras].read()
+        if not ret:
+            raise RuntimeError(f"Source {args.source} returned no frame")
+        return f"bench_cam_{index % cameras}", frame
+
+    for index in range(args.warmup):
+        runner(*next_frame(index))
+
+    sampler = ResourceSampler()
+    errors = 0
+    frames = 0
+    sampler.start()
+    started = time.perf_counter()
+    while frames < args.frames and time.perf_counter() - started < args.max_seconds:
+        camera_id, frame = timer.time("source.read", next_frame, frames)
+        frame_start = time.perf_counter()
+        try:
+            runner(camera_id, frame)
+        except Exception as e:
+            errors += 1
+            if errors == 1:
+                print(f"⚠️ {name}: {e}")
+        timer.record("total", time.perf_counter() - frame_start)
+        frames += 1
+        if frames % 10 == 0:
+            sampler.sample()
+    elapsed = time.perf_counter() - started
+
+    for source in sources:
+        source.release()
+
+    return {
+        "frames": frames,
+        "cameras": cameras,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "stages": timer.summary(),
+        "resources": sampler.stop()
+    }
+
+
+def run_metadata(args):
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                         stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "source": args.source,
+        "frame_size": [args.width, args.height],
+        "frames": args.frames,
+        "warmup": args.warmup
+    }
+
+
+def print_comparison(report, baseline_path):
+    """Print fps and p95 deltas against an earlier results file"""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    print(f"\nComparison with {baseline_path} ({baseline['run'].get('git_commit')}):")
+    for name, result in report["targets"].items():
+        previous = baseline["targets"].get(name)
+        if not previous or "fps" not in previous or "fps" not in result:
+            continue
+        fps_delta = (result["fps"] / previous["fps"] - 1) * 100 if previous["fps"] else 0.0
+        print(f"  {name:13s} fps {previous['fps']:8.1f} -> {result['fps']:8.1f} ({fps_delta:+.1f}%)")
+        for stage, stats in result["stages"].items():
+            before = previous["stages"].get(stage)
+            if before:
+                print(f"    {stage:40s} p95 {before['p95_ms']:8.2f} -> {stats['p95_ms']:8.2f} ms")
+
+
+def main():
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Offline end-to-end detection pipeline benchmark")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help=f"Comma-separated subset of {','.join(TARGETS)}")
+    parser.add_argument("--source", default="synthetic",
+                        help="Frame source spec (see frame_sources.py): video file, images:..., synthetic")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=300, help="Measured frames per target")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured frames per target")
+    parser.add_argument("--max-seconds", type=float, default=120.0, help="Time cap per target")
+    parser.add_argument("--cameras", type=int, default=4, help="Camera count for the multi_camera target")
+    parser.add_argument("--with-storage", action="store_true", help="Include MongoDB writes in the service target")
+    parser.add_argument("--output", help="Results file (default: benchmark_results/pipeline_<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = {"run": run_metadata(args), "targets": {}}
+    for name in [t.strip() for t in args.targets.split(",") if t.strip()]:
+        print(f"⏱️  Benchmarking {name}...")
+        try:
+            result = run_target(name, args)
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+            report["targets"][name] = {"error": str(e)}
+            continue
+        report["targets"][name] = result
+
+        print(f"   {result['fps']:.1f} fps over {result['frames']} frames, "
+              f"CPU {result['resources']['cpu_percent']:.0f}%, RSS peak {result['resources']['rss_peak_mb']:.0f} MB, "
+              f"{result['errors']} errors")
+        for stage, stats in sorted(result["stages"].items()):
+            print(f"     {stage:40s} p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  "
+                  f"p99 {stats['p99_ms']:8.2f} ms")
+
+    output = args.output or os.path.join(
+        "benchmark_results", f"pipeline_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+    if args.compare:
+        print_comparison(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
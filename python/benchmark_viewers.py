@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Concurrent Viewer Load Benchmark
+Opens increasing numbers of simultaneous MJPEG viewers against a running video
+streaming service and reports per-viewer frame rates, rejections and the
+largest viewer count the node sustains.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlparse
+import requests
+
+BOUNDARY = b"--frame"
+
+
+async def run_viewer(host, port, path, duration):
+    """Read one MJPEG stream for duration seconds, returns a result dict"""
+    result = {"status": None, "frames": 0, "bytes": 0, "first_frame_s": None, "error": None}
+    started = time.perf_counter()
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=10)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+
+        status_line = await asyncio.wait_for(reader.readline(), timeout=10)
+        result["status"] = int(status_line.split()[1])
+        if result["status"] != 200:
+            return result
+
+        deadline = started + duration
+        tail = b""
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(reader.read(65536), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            data = tail + chunk
+            frames = data.count(BOUNDARY)
+            if frames and result["first_frame_s"] is None:
+                result["first_frame_s"] = time.perf_counter() - started
+            result["frames"] += frames
+            result["bytes"] += len(chunk)
+            tail = data[-(len(BOUNDARY) - 1):]
+    except Exception as e:
+        result["error"] = repr(e)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    result["fps"] = result["frames"] / duration
+    return result
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+async def run_step(host, port, path, viewers, duration, ramp_seconds):
+    """Run one load step with the given number of concurrent viewers"""
+    tasks = []
+    for index in range(viewers):
+        tasks.append(asyncio.create_task(run_viewer(host, port, path, duration)))
+        if ramp_seconds:
+            await asyncio.sleep(ramp_seconds / viewers)
+    return await asyncio.gather(*tasks)
+
+
+def summarize(viewers, results, duration, min_fps):
+    connected = [r for r in results if r["status"] == 200 and r["error"] is None]
+    fps = [r["fps"] for r in connected]
+    first_frame = [r["first_frame_s"] for r in connected if r["first_frame_s"] is not None]
+    summary = {
+        "viewers": viewers,
+        "connected": len(connected),
+        "rejected": sum(1 for r in results if r["status"] == 503),
+        "errors": sum(1 for r in results if r["error"] is not None),
+        "fps_median": statistics.median(fps) if fps else 0.0,
+        "fps_p5": percentile(fps, 5),
+        "first_frame_p95_s": percentile(first_frame, 95),
+        "throughput_mbps": sum(r["bytes"] for r in connected) * 8 / duration / 1e6
+    }
+    summary["sustained"] = summary["connected"] == viewers and summary["fps_p5"] >= min_fps
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent MJPEG viewer benchmark")
+    parser.add_argument("--url", default="http://localhost:5001", help="Video service base URL")
+    parser.add_argument("--camera", default="camo_studio_01")
+    parser.add_argument("--start-camera", action="store_true", help="POST /start for the camera first")
+    parser.add_argument("--viewers", default="10,50,100,200,400", help="Comma-separated load steps")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step")
+    parser.add_argument("--ramp", type=float, default=1.0, help="Seconds to open all viewers in a step")
+    parser.add_argument("--min-fps", type=float, default=5.0, help="p5 viewer fps required to count as sustained")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    parsed = urlparse(args.url)
+    host, port = parsed.hostname, parsed.port or 80
+    path = f"/api/video_feed/{args.camera}"
+
+    if args.start_camera:
+        response = requests.post(f"{args.url}/api/cameras/{args.camera}/start", timeout=60)
+        print(f"Start camera {args.camera}: {response.json().get('message')}")
+
+    steps = []
+    for viewers in [int(v) for v in args.viewers.split(",")]:
+        results = asyncio.run(run_step(host, port, path, viewers, args.duration, args.ramp))
+        summary = summarize(viewers, results, args.duration, args.min_fps)
+        try:
+            summary["server"] = requests.get(f"{args.url}/api/server/stats", timeout=5).json().get("data")
+        except (requests.exceptions.RequestException, ValueError):
+            summary["server"] = None
+        steps.append(summary)
+
+        print(f"{viewers:5d} viewers: connected={summary['connected']} rejected={summary['rejected']} "
+              f"errors={summary['errors']} fps median={summary['fps_median']:.1f} p5={summary['fps_p5']:.1f} "
+              f"first frame p95={summary['first_frame_p95_s']:.2f}s {summary['throughput_mbps']:.1f} Mbit/s "
+              f"{'✅' if summary['sustained'] else '❌'}")
+
+    sustained = [step["viewers"] for step in steps if step["sustained"]]
+    report = {
+        "url": args.url,
+        "camera": args.camera,
+        "duration_s": args.duration,
+        "min_fps": args.min_fps,
+        "max_sustained_viewers": max(sustained) if sustained else 0,
+        "steps": steps
+    }
+    print(f"\nMax sustained viewers: {report['max_sustained_viewers']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
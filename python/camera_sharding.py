@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Zone-Sharded Camera Coordinator
+Spreads cameras across several video streaming service workers, sharded by the
+camera's zone. The coordinator exposes the usual camera, detection and video
+feed routes and proxies each request to the worker that owns the camera.
+Zones are reassigned to the surviving workers when a worker dies. Every
+assignment carries a version that workers echo in their heartbeat; a worker
+that missed its assignment or restarted empty gets it pushed again.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import requests
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+from flask_socketio import SocketIO
+from logging_setup import get_logger, setup_logging
+
+try:
+    import socketio as socketio_client
+    EVENT_RELAY_AVAILABLE = True
+except ImportError:
+    EVENT_RELAY_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+CORS_ORIGINS = ["http://localhost:3000", "http://localhost:5173", "http://localhost:5174"]
+
+
+def rendezvous_owner(zone, worker_ids):
+    """Pick the owner of a zone with highest-random-weight hashing"""
+    if not worker_ids:
+        return None
+    return max(worker_ids, key=lambda worker_id: hashlib.md5(f"{zone}:{worker_id}".encode()).hexdigest())
+
+
+class ShardCoordinator:
+    """Tracks worker health and owns the zone -> worker assignment"""
+
+    def __init__(self, camera_configs, heartbeat_interval=2.0, max_failures=3, on_event=None, shard_token=None):
+        self.camera_configs = {config["id"]: dict(config) for config in camera_configs}
+        # Workers only accept assignments carrying their VIDEO_SERVICE_SHARD_TOKEN
+        self.shard_token = shard_token
+        self.heartbeat_interval = heartbeat_interval
+        self.max_failures = max_failures
+        self.on_event = on_event
+        self.workers = {}          # worker_id -> {"url", "alive", "failures", "last_seen", "assignment_version"}
+        self.camera_owner = {}     # camera_id -> worker_id
+        self.assignment_version = 0
+        self.desired_active = set()
+        self.relays = {}
+        self.lock = threading.RLock()
+        self.running = False
+
+    def register_worker(self, worker_id, url):
+        """Add a worker; it receives cameras once its first health check passes"""
+        with self.lock:
+            self.workers[worker_id] = {"url": url.rstrip("/"), "alive": False, "failures": 0, "last_seen": None,
+                                       "assignment_version": None}
+
+    def alive_workers(self):
+        return sorted(worker_id for worker_id, worker in self.workers.items() if worker["alive"])
+
+    def owner_url(self, camera_id):
+        """Base URL of the worker that owns a camera, or None"""
+        with self.lock:
+            worker_id = self.camera_owner.get(camera_id)
+            if worker_id is None or not self.workers[worker_id]["alive"]:
+                return None
+            return self.workers[worker_id]["url"]
+
+    def rebalance(self):
+        """Assign every zone to a live worker and push camera sets to workers"""
+        with self.lock:
+            alive = self.alive_workers()
+            self.camera_owner = {}
+            for camera_id, config in self.camera_configs.items():
+                owner = rendezvous_owner(config.get("zone", "default"), alive)
+                if owner is not None:
+                    self.camera_owner[camera_id] = owner
+            self.assignment_version += 1
+
+        for worker_id in alive:
+            self.push_assignment(worker_id)
+
+    def push_assignment(self, worker_id):
+        """Send a worker its current camera set; it is acknowledged once the worker accepts it"""
+        with self.lock:
+            worker = self.workers[worker_id]
+            version = self.assignment_version
+            cameras = [dict(config, autostart=camera_id in self.desired_active)
+                       for camera_id, config in self.camera_configs.items()
+                       if self.camera_owner.get(camera_id) == worker_id]
+        try:
+            response = requests.post(f"{worker['url']}/api/shard/assign",
+                                     json={"worker_id": worker_id, "cameras": cameras, "version": version},
+                                     headers={"X-Shard-Token": self.shard_token or ""}, timeout=30)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Failed to assign cameras to worker {worker_id}, retrying on the next heartbeat: {e}")
+            return False
+        with self.lock:
+            if version == self.assignment_version:
+                worker["assignment_version"] = version
+        logger.info(f"📦 Worker {worker_id} owns {len(cameras)} camera(s) (assignment {version})")
+        return True
+
+    def check_workers(self):
+        """Run one round of health checks, rebalancing when membership changes
+
+        Live workers whose heartbeat reports an older assignment version (a failed
+        push, or a restart that came back without cameras) get theirs pushed again.
+        """
+        membership_changed = False
+        stale = []
+        with self.lock:
+            workers = list(self.workers.items())
+
+        for worker_id, worker in workers:
+            reported_version = None
+            try:
+                response = requests.get(f"{worker['url']}/api/shard/health", timeout=2)
+                healthy = response.status_code == 200
+                if healthy:
+                    reported_version = (response.json().get("data") or {}).get("assignment_version")
+            except (requests.exceptions.RequestException, ValueError):
+                healthy = False
+
+            with self.lock:
+                if healthy:
+                    if worker["alive"] and reported_version != self.assignment_version:
+                        worker["assignment_version"] = reported_version
+                        stale.append(worker_id)
+                    worker["failures"] = 0
+                    worker["last_seen"] = time.time()
+                    if not worker["alive"]:
+                        logger.info(f"✅ Worker {worker_id} is up at {worker['url']}")
+                        worker["alive"] = True
+                        membership_changed = True
+                        self.start_event_relay(worker_id, worker["url"])
+                else:
+                    worker["failures"] += 1
+                    if worker["alive"] and worker["failures"] >= self.max_failures:
+                        logger.warning(f"⚠️ Worker {worker_id} is down, rebalancing its zones")
+                        worker["alive"] = False
+                        membership_changed = True
+
+        if membership_changed:
+            self.rebalance()
+            return
+        for worker_id in stale:
+            logger.warning(f"⚠️ Worker {worker_id} reports a stale assignment, pushing it again")
+            self.push_assignment(worker_id)
+
+    def heartbeat_loop(self):
+        while self.running:
+            self.check_workers()
+            time.sleep(self.heartbeat_interval)
+
+    def start(self):
+        """Start the heartbeat thread"""
+        self.running = True
+        thread = threading.Thread(target=self.heartbeat_loop, daemon=True)
+        thread.start()
+
+    def start_event_relay(self, worker_id, url):
+        """Re-emit a worker's WebSocket detection updates to coordinator clients"""
+        if not EVENT_RELAY_AVAILABLE or self.on_event is None or worker_id in self.relays:
+            return
+
+        client = socketio_client.Client(reconnection=True)
+        client.on("detection_update", lambda data: self.on_event("detection_update", data))
+
+        def connect():
+            try:
+                client.connect(url)
+                self.relays[worker_id] = client
+            except Exception as e:
+                logger.warning(f"⚠️ Could not relay events from worker {worker_id}: {e}")
+
+        threading.Thread(target=connect, daemon=True).start()
+
+    def status(self):
+        with self.lock:
+            return {
+                "workers": {worker_id: dict(worker) for worker_id, worker in self.workers.items()},
+                "camera_owner": dict(self.camera_owner),
+                "desired_active": sorted(self.desired_active)
+            }
+
+
+def create_coordinator_app(coordinator):
+    """Build the Flask app that proxies camera routes to their owning worker"""
+    app = Flask(__name__)
+    CORS(app, origins=CORS_ORIGINS, supports_credentials=True)
+    socketio = SocketIO(app, cors_allowed_origins=CORS_ORIGINS)
+    coordinator.on_event = socketio.emit
+
+    def unavailable(camera_id):
+        return jsonify({
+            "success": False,
+            "message": f"No live worker owns camera {camera_id}"
+        }), 503
+
+    def proxy_json(camera_id, method, path):
+        url = coordinator.owner_url(camera_id)
+        if url is None:
+            return unavailable(camera_id)
+        try:
+            response = requests.request(method, f"{url}{path}", json=request.get_json(silent=True), timeout=30)
+            return Response(response.content, status=response.status_code,
+                            mimetype=response.headers.get("Content-Type", "application/json"))
+        except requests.exceptions.RequestException as e:
+            return jsonify({"success": False, "message": f"Worker request failed: {e}"}), 502
+
+    @app.route('/api/cameras', methods=['GET'])
+    def get_cameras():
+        """List cameras from every worker, unassigned ones from the coordinator"""
+        cameras = {}
+        with coordinator.lock:
+            worker_urls = [coordinator.workers[w]["url"] for w in coordinator.alive_workers()]
+            for camera_id, config in coordinator.camera_configs.items():
+                cameras[camera_id] = dict(config, status="unassigned")
+
+        for url in worker_urls:
+            try:
+                for camera in requests.get(f"{url}/api/cameras", timeout=5).json().get("data", []):
+                    if camera.get("id") in cameras:
+                        cameras[camera["id"]] = camera
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.warning(f"⚠️ Could not list cameras from {url}: {e}")
+
+        return jsonify({
+            "success": True,
+            "data": list(cameras.values())
+        })
+
+    @app.route('/api/cameras/<camera_id>/start', methods=['POST'])
+    def start_camera(camera_id):
+        coordinator.desired_active.add(camera_id)
+        return proxy_json(camera_id, "POST", f"/api/cameras/{camera_id}/start")
+
+    @app.route('/api/cameras/<camera_id>/stop', methods=['POST'])
+    def stop_camera(camera_id):
+        coordinator.desired_active.discard(camera_id)
+        return proxy_json(camera_id, "POST", f"/api/cameras/{camera_id}/stop")
+
+    @app.route('/api/cameras/<camera_id>/detections', methods=['GET'])
+    def get_camera_detections(camera_id):
+        return proxy_json(camera_id, "GET", f"/api/cameras/{camera_id}/detections")
+
+    @app.route('/api/video_feed/<camera_id>')
+    def video_feed(camera_id):
+        """Stream the MJPEG feed from the owning worker"""
+        url = coordinator.owner_url(camera_id)
+        if url is None:
+            return unavailable(camera_id)
+        try:
+            upstream = requests.get(f"{url}/api/video_feed/{camera_id}", stream=True, timeout=(5, None))
+        except requests.exceptions.RequestException as e:
+            return jsonify({"success": False, "message": f"Worker request failed: {e}"}), 502
+        if upstream.status_code != 200:
+            return Response(upstream.content, status=upstream.status_code, mimetype="application/json")
+
+        def relay():
+            try:
+                for chunk in upstream.iter_content(chunk_size=64 * 1024):
+                    yield chunk
+            except requests.exceptions.RequestException:
+                pass
+            finally:
+                upstream.close()
+
+        return Response(relay(), mimetype=upstream.headers.get(
+            "Content-Type", "multipart/x-mixed-replace; boundary=frame"))
+
+    @app.route('/api/shard/status', methods=['GET'])
+    def shard_status():
+        return jsonify({
+            "success": True,
+            "data": coordinator.status()
+        })
+
+    return app, socketio
+
+
+def load_camera_configs(path):
+    """Load the camera list (JSON array of camera configs)"""
+    if path is None:
+        return [{
+            "id": "camo_studio_01",
+            "name": "Camo Studio Camera",
+            "zone": "studio_zone",
+            "location": "Camo Studio Virtual Camera",
+            "source": None,
+            "status": "inactive"
+        }]
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def spawn_local_workers(count, base_port, shard_token):
+    """Start worker service processes on this machine for local testing"""
+    service_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "video_streaming_service.py")
+    env = dict(os.environ, VIDEO_SERVICE_AUTODETECT="0", VIDEO_SERVICE_SHARD_TOKEN=shard_token)
+    workers = []
+    for index in range(count):
+        port = base_port + index
+        # One log file per worker; rotating handlers must not share a file across processes
+        worker_env = dict(env, LOG_FILE=f"video_service_worker_{index + 1}.log")
+        process = subprocess.Popen([sys.executable, service_path, "--port", str(port), "--no-debug"],
+                                   env=worker_env, cwd=os.path.dirname(service_path))
+        workers.append((f"worker_{index + 1}", f"http://127.0.0.1:{port}", process))
+        logger.info(f"🚀 Spawned worker_{index + 1} on port {port} (pid {process.pid})")
+    return workers
+
+
+def main():
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Zone-sharded camera coordinator")
+    parser.add_argument("--port", type=int, default=int(os.getenv("VIDEO_SERVICE_PORT", 5001)))
+    parser.add_argument("--host", default=os.getenv("VIDEO_SERVICE_HOST", "0.0.0.0"))
+    parser.add_argument("--cameras", help="JSON file with the camera configurations")
+    parser.add_argument("--worker", action="append", default=[],
+                        help="Worker as id=url (repeatable), e.g. w1=http://10.0.0.5:5001")
+    parser.add_argument("--spawn-workers", type=int, default=0,
+                        help="Start N local worker processes for testing")
+    parser.add_argument("--worker-base-port", type=int, default=5101)
+    parser.add_argument("--heartbeat", type=float, default=2.0)
+    parser.add_argument("--shard-token", default=os.getenv("VIDEO_SERVICE_SHARD_TOKEN", ""),
+                        help="Token workers require on assignments (their VIDEO_SERVICE_SHARD_TOKEN)")
+    args = parser.parse_args()
+
+    # Spawned workers share a generated token; remote workers need it configured on both sides
+    shard_token = args.shard_token or (secrets.token_hex(16) if args.spawn_workers else "")
+    if args.worker and not shard_token:
+        logger.error("❌ No shard token: set VIDEO_SERVICE_SHARD_TOKEN here and on the workers")
+    coordinator = ShardCoordinator(load_camera_configs(args.cameras), heartbeat_interval=args.heartbeat,
+                                   shard_token=shard_token)
+    for spec in args.worker:
+        worker_id, url = spec.split("=", 1)
+        coordinator.register_worker(worker_id, url)
+
+    local_workers = spawn_local_workers(args.spawn_workers, args.worker_base_port, shard_token)
+    for worker_id, url, _ in local_workers:
+        coordinator.register_worker(worker_id, url)
+
+    app, socketio = create_coordinator_app(coordinator)
+    coordinator.start()
+
+    print(f"Coordinator listening on http://{args.host}:{args.port} with {len(coordinator.workers)} worker(s)")
+    try:
+        socketio.run(app, host=args.host, port=args.port, allow_unsafe_werkzeug=True)
+    finally:
+        for _, _, process in local_workers:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
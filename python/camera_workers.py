@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Multi-Process Camera Workers
+Runs capture, inference and JPEG encoding for each camera in separate processes.
+Frames move between the stages through shared-memory ring buffers, so only the
+small detection dicts are ever pickled.
+"""
+
+import importlib
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from frame_sources import open_capture
+from logging_setup import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+# Per-slot metadata: sequence number, payload bytes, ndim, up to 3 dimensions
+SLOT_META_FIELDS = 6
+# Ring header: slots, slot_bytes, latest written sequence
+RING_HEADER_FIELDS = 3
+
+
+class SharedFrameRing:
+    """Single-producer ring of uint8 arrays stored in shared memory"""
+
+    def __init__(self, name=None, slots=4, slot_bytes=1080 * 1920 * 3, create=True):
+        if create:
+            size = self._header_bytes(slots) + slots * slot_bytes
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            header = np.ndarray((RING_HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+            header[:] = (slots, slot_bytes, 0)
+        else:
+            # Workers are started by multiprocessing and share the parent's
+            # resource tracker, so attaching here does not transfer ownership
+            self.shm = shared_memory.SharedMemory(name=name)
+            header = np.ndarray((RING_HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+            slots, slot_bytes = int(header[0]), int(header[1])
+
+        self.name = self.shm.name
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._owner = create
+
+        offset = RING_HEADER_FIELDS * 8
+        self._header = header
+        self._meta = np.ndarray((slots, SLOT_META_FIELDS), dtype=np.int64,
+                                buffer=self.shm.buf, offset=offset)
+        offset += slots * SLOT_META_FIELDS * 8
+        self._timestamps = np.ndarray((slots,), dtype=np.float64,
+                                      buffer=self.shm.buf, offset=offset)
+        offset += slots * 8
+        self._data = np.ndarray((slots, slot_bytes), dtype=np.uint8,
+                                buffer=self.shm.buf, offset=offset)
+
+    @staticmethod
+    def _header_bytes(slots):
+        return 8 * (RING_HEADER_FIELDS + slots * (SLOT_META_FIELDS + 1))
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a ring created by another process"""
+        return cls(name=name, create=False)
+
+    @property
+    def latest_seq(self):
+        return int(self._header[2])
+
+    def write(self, array, timestamp=None):
+        """Copy an array into the next slot and publish it, returns its sequence"""
+        array = np.ascontiguousarray(array, dtype=np.uint8)
+        if array.nbytes > self.slot_bytes:
+            raise ValueError(f"Array of {array.nbytes} bytes exceeds ring slot size {self.slot_bytes}")
+        if array.ndim > 3:
+            raise ValueError("Only arrays with up to 3 dimensions are supported")
+
+        seq = self.latest_seq + 1
+        slot = seq % self.slots
+        meta = self._meta[slot]
+
+        # Mark the slot as in-flight so readers discard a torn copy
+        meta[0] = -1
+        self._data[slot, :array.nbytes] = array.reshape(-1)
+        shape = array.shape + (1,) * (3 - array.ndim)
+        meta[1:] = (array.nbytes, array.ndim) + shape
+        self._timestamps[slot] = time.time() if timestamp is None else timestamp
+        meta[0] = seq
+        self._header[2] = seq
+        return seq
+
+    def read_latest(self, after_seq=0):
+        """Return (seq, timestamp, array) for the newest entry after after_seq"""
+        for _ in range(3):
+            seq = self.latest_seq
+            if seq <= after_seq:
+                return None
+
+            slot = seq % self.slots
+            if self._meta[slot, 0] != seq:
+                continue
+
+            nbytes, ndim = int(self._meta[slot, 1]), int(self._meta[slot, 2])
+            shape = tuple(int(v) for v in self._meta[slot, 3:3 + ndim])
+            timestamp = float(self._timestamps[slot])
+            data = self._data[slot, :nbytes].copy()
+
+            # Writer lapped us while copying, try again with the newer entry
+            if self._meta[slot, 0] != seq:
+                continue
+            return seq, timestamp, data.reshape(shape)
+        return None
+
+    def close(self):
+        """Release the mapping, unlinking it when this process created the ring"""
+        # Views must be dropped before the buffer can be closed
+        self._header = self._meta = self._timestamps = self._data = None
+        self.shm.close()
+        if self._owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def load_processor(processor_path, processor_kwargs=None):
+    """Instantiate a frame processor from a 'module:ClassName' path"""
+    module_name, class_name = processor_path.split(":")
+    processor_class = getattr(importlib.import_module(module_name), class_name)
+    return processor_class(**(processor_kwargs or {}))
+
+
+def fit_frame_to_slot(frame, slot_bytes):
+    """Downscale a frame so it fits into a ring slot"""
+    if frame.nbytes <= slot_bytes:
+        return frame
+    scale = (slot_bytes / frame.nbytes) ** 0.5
+    width = max(1, int(frame.shape[1] * scale))
+    height = max(1, int(frame.shape[0] * scale))
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def capture_worker(camera_id, source, ring_name, stop_event, backend=None):
+    """Capture process: read frames from the camera into the capture ring"""
+    setup_logging()
+    ring = SharedFrameRing.attach(ring_name)
+    cap = open_capture(source, backend)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    try:
+        if not cap.isOpened():
+            logger.error(f"❌ Worker could not open camera {camera_id} ({source})")
+            raise SystemExit(1)
+
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                logger.error(f"❌ Worker failed to read from camera {camera_id}")
+                raise SystemExit(1)
+            ring.write(fit_frame_to_slot(frame, ring.slot_bytes))
+    finally:
+        cap.release()
+        ring.close()
+
+
+def inference_worker(camera_id, input_ring_name, output_ring_name, result_queue,
+                     stop_event, processor_path, processor_kwargs, control_queue=None):
+    """Inference process: run the frame processor on the newest captured frame
+
+    Options put on control_queue are applied with processor.configure(**options)
+    between frames, so settings change without restarting the worker.
+    """
+    setup_logging()
+    processor = load_processor(processor_path, processor_kwargs)
+    input_ring = SharedFrameRing.attach(input_ring_name)
+    output_ring = SharedFrameRing.attach(output_ring_name)
+    last_seq = 0
+
+    try:
+        while not stop_event.is_set():
+            while control_queue is not None:
+                try:
+                    options = control_queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    processor.configure(**options)
+                except Exception as e:
+                    logger.error(f"❌ Could not reconfigure processor for camera {camera_id}: {e}")
+
+            item = input_ring.read_latest(last_seq)
+            if item is None:
+                time.sleep(0.002)
+                continue
+
+            last_seq, captured_at, frame = item
+            annotated_frame, result = processor.process(camera_id, frame)
+            if annotated_frame is not None:
+                output_ring.write(fit_frame_to_slot(annotated_frame, output_ring.slot_bytes),
+                                  timestamp=captured_at)
+
+            result["frame_seq"] = last_seq
+            result["captured_at"] = captured_at
+            result["processed_at"] = time.time()
+            try:
+                result_queue.put_nowait((camera_id, result))
+            except queue.Full:
+                pass  # Consumer is behind, drop the result rather than stall inference
+    finally:
+        input_ring.close()
+        output_ring.close()
+
+
+def encoder_worker(camera_id, frame_ring_name, jpeg_ring_name, stop_event, jpeg_quality):
+    """Encoding process: JPEG-encode annotated frames for MJPEG viewers"""
+    setup_logging()
+    frame_ring = SharedFrameRing.attach(frame_ring_name)
+    jpeg_ring = SharedFrameRing.attach(jpeg_ring_name)
+    last_seq = 0
+    oversized = 0
+
+    try:
+        while not stop_event.is_set():
+            item = frame_ring.read_latest(last_seq)
+            if item is None:
+                time.sleep(0.002)
+                continue
+
+            last_seq, captured_at, frame = item
+            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+            if not ret:
+                continue
+            if buffer.nbytes > jpeg_ring.slot_bytes:
+                oversized += 1
+                if oversized == 1:
+                    logger.warning(f"⚠️ Camera {camera_id}: {buffer.nbytes} byte JPEG exceeds the "
+                                   f"{jpeg_ring.slot_bytes} byte ring slot, dropping oversized frames")
+                continue
+            jpeg_ring.write(buffer, timestamp=captured_at)
+    finally:
+        frame_ring.close()
+        jpeg_ring.close()
+
+
+class CameraWorkerPool:
+    """Supervises per-camera capture, inference and encoding processes"""
+
+    STAGES = ("capture", "inference", "encoder")
+
+    def __init__(self, processor_path, processor_kwargs=None, ring_slots=4,
+                 max_frame_shape=(1080, 1920, 3), jpeg_quality=85, encode_jpeg=True, jpeg_slot_ratio=0.2,
+                 supervise_interval=0.5, restart_backoff=1.0, start_method=None):
+        self.processor_path = processor_path
+        self.processor_kwargs = processor_kwargs or {}
+        self.ring_slots = ring_slots
+        self.slot_bytes = int(np.prod(max_frame_shape))
+        # Encoded frames are a fraction of the raw size; larger ones are dropped by the encoder
+        self.jpeg_slot_bytes = int(self.slot_bytes * jpeg_slot_ratio)
+        self.jpeg_quality = jpeg_quality
+        self.encode_jpeg = encode_jpeg
+        self.supervise_interval = supervise_interval
+        self.restart_backoff = restart_backoff
+
+        self._ctx = mp.get_context(start_method) if start_method else mp.get_context()
+        self.result_queue = self._ctx.Queue(maxsize=256)
+        self.workers = {}
+        self._lock = threading.RLock()
+        self._running = False
+        self._supervisor = None
+
+    def start(self):
+        """Start the supervisor thread"""
+        if self._running:
+            return
+        self._running = True
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+
+    def add_camera(self, camera_id, source, backend=None, processor_options=None):
+        """Create rings for a camera and start its worker processes
+
+        processor_options are per-camera processor kwargs on top of processor_kwargs.
+        """
+        with self._lock:
+            if camera_id in self.workers:
+                return False
+
+            rings = {
+                "capture": SharedFrameRing(slots=self.ring_slots, slot_bytes=self.slot_bytes),
+                "annotated": SharedFrameRing(slots=self.ring_slots, slot_bytes=self.slot_bytes),
+            }
+            if self.encode_jpeg:
+                rings["jpeg"] = SharedFrameRing(slots=self.ring_slots, slot_bytes=self.jpeg_slot_bytes)
+
+            self.workers[camera_id] = {
+                "source": source,
+                "backend": backend,
+                "rings": rings,
+                "stop_event": self._ctx.Event(),
+                "control_queue": self._ctx.Queue(),
+                "processor_options": dict(processor_options or {}),
+                "processes": {},
+                "restarts": {stage: 0 for stage in self.STAGES},
+                "next_restart": {stage: 0.0 for stage in self.STAGES},
+            }
+            for stage in self.STAGES:
+                if stage == "encoder" and not self.encode_jpeg:
+                    continue
+                self._spawn(camera_id, stage)
+
+        self.start()
+        return True
+
+    def configure_camera(self, camera_id, **options):
+        """Send new processor options to a running camera's inference worker"""
+        with self._lock:
+            worker = self.workers.get(camera_id)
+            if worker is None:
+                return False
+            # Kept so a restarted inference worker starts with the latest options
+            worker["processor_options"].update(options)
+            worker["control_queue"].put(options)
+        return True
+
+    def remove_camera(self, camera_id):
+        """Stop a camera's worker processes and release its rings"""
+        with self._lock:
+            worker = self.workers.pop(camera_id, None)
+        if worker is None:
+            return False
+
+        worker["stop_event"].set()
+        for process in worker["processes"].values():
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1)
+        worker["control_queue"].close()
+
+        with self._lock:
+            for ring in worker["rings"].values():
+                ring.close()
+        return True
+
+    def _spawn(self, camera_id, stage):
+        """Start one stage process for a camera"""
+        worker = self.workers[camera_id]
+        rings = worker["rings"]
+        stop_event = worker["stop_event"]
+
+        if stage == "capture":
+            target = capture_worker
+            args = (camera_id, worker["source"], rings["capture"].name, stop_event, worker["backend"])
+        elif stage == "inference":
+            target = inference_worker
+            args = (camera_id, rings["capture"].name, rings["annotated"].name, self.result_queue,
+                    stop_event, self.processor_path, dict(self.processor_kwargs, **worker["processor_options"]),
+                    worker["control_queue"])
+        else:
+            target = encoder_worker
+            args = (camera_id, rings["annotated"].name, rings["jpeg"].name, stop_event,
+                    self.jpeg_quality)
+
+        process = self._ctx.Process(target=target, args=args,
+                                    name=f"camera-{camera_id}-{stage}", daemon=True)
+        process.start()
+        worker["processes"][stage] = process
+
+    def _supervise(self):
+        """Restart dead worker processes with exponential backoff"""
+        while self._running:
+            now = time.time()
+            with self._lock:
+                for camera_id, worker in self.workers.items():
+                    if worker["stop_event"].is_set():
+                        continue
+                    for stage, process in list(worker["processes"].items()):
+                        if process.is_alive() or now < worker["next_restart"][stage]:
+                            continue
+
+                        process.join(timeout=0)
+                        restarts = worker["restarts"][stage] + 1
+                        worker["restarts"][stage] = restarts
+                        worker["next_restart"][stage] = now + self.restart_backoff * (2 ** min(restarts, 5))
+                        logger.warning(f"⚠️ Restarting {stage} worker for camera {camera_id} "
+                                       f"(exit code {process.exitcode}, restart #{restarts})")
+                        self._spawn(camera_id, stage)
+            time.sleep(self.supervise_interval)
+
+    def _read_ring(self, camera_id, ring_key, after_seq):
+        with self._lock:
+            worker = self.workers.get(camera_id)
+            if worker is None or ring_key not in worker["rings"]:
+                return None
+            return worker["rings"][ring_key].read_latest(after_seq)
+
+    def read_frame(self, camera_id, after_seq=0):
+        """Return (seq, frame) for the newest annotated frame, or None"""
+        item = self._read_ring(camera_id, "annotated", after_seq)
+        return (item[0], item[2]) if item else None
+
+    def read_jpeg(self, camera_id, after_seq=0):
+        """Return (seq, jpeg_bytes) for the newest encoded frame, or None"""
+        item = self._read_ring(camera_id, "jpeg", after_seq)
+        return (item[0], item[2].tobytes()) if item else None
+
+    def get_results(self, timeout=0.1, max_items=64):
+        """Drain detection results as (camera_id, result) pairs"""
+        results = []
+        try:
+            results.append(self.result_queue.get(timeout=timeout))
+            while len(results) < max_items:
+                results.append(self.result_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return results
+
+    def stats(self):
+        """Liveness and restart counters per camera"""
+        with self._lock:
+            return {
+                camera_id: {
+                    "alive": {stage: process.is_alive() for stage, process in worker["processes"].items()},
+                    "restarts": dict(worker["restarts"]),
+                    "captured_frames": worker["rings"]["capture"].latest_seq,
+                    "processed_frames": worker["rings"]["annotated"].latest_seq,
+                }
+                for camera_id, worker in self.workers.items()
+            }
+
+    def shutdown(self):
+        """Stop every camera and the supervisor"""
+        self._running = False
+        for camera_id in list(self.workers.keys()):
+            self.remove_camera(camera_id)
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=2)
@@ -7,13 +7,17 @@ Detects stampede and overcrowding using density analysis
 import cv2
 import numpy as np
 import math
-from collections import deque
 import scipy.spatial.distance as distance
+from roi_mask import RoiMask
+from temporal_evidence import RingWindow
 
 class CrowdDensityDetector:
     """Advanced crowd density and stampede detection"""
     
-    def __init__(self):
+    def __init__(self, roi=None):
+        # Static ROI: flow, density and the grid only cover the monitored area
+        self.roi = roi or RoiMask()
+
         # Crowd density parameters
         self.critical_density_threshold = 0.8  # Critical crowd density
         self.high_density_threshold = 0.6      # High crowd density
@@ -29,16 +33,17 @@ class CrowdDensityDetector:
         self.max_person_distance = 150  # Maximum distance for clustering
         
         # Temporal analysis
-        self.density_history = deque(maxlen=10)
-        self.motion_history = deque(maxlen=10)
-        self.stampede_history = deque(maxlen=5)
+        self.density_history = RingWindow(10)
+        self.motion_history = RingWindow(10)
+        self.stampede_history = RingWindow(3)
         
         # Optical flow for motion detection
         self.prev_frame = None
         
     def calculate_optical_flow(self, frame):
-        """Calculate optical flow for motion detection"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        """Calculate optical flow for motion detection inside the ROI"""
+        view, _ = self.roi.crop(frame)
+        gray = cv2.cvtColor(view, cv2.COLOR_BGR2GRAY)
         
         if self.prev_frame is None:
             self.prev_frame = gray
@@ -51,7 +56,7 @@ class CrowdDensityDetector:
         
         # Calculate magnitude of flow
         magnitude = np.sqrt(flow[..., 0]**2 + flow[..., 1]**2)
-        average_motion = np.mean(magnitude)
+        average_motion = self.roi.masked_mean(magnitude, frame.shape)
         
         self.prev_frame = gray
         return average_motion
@@ -73,7 +78,7 @@ class CrowdDensityDetector:
             centroids.append(centroid)
         
         # 1. Density Analysis
-        frame_area = frame_shape[0] * frame_shape[1]
+        frame_area = self.roi.area(frame_shape)
         person_area = sum([(bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) for bbox in person_bboxes])
         density_ratio = person_area / frame_area
         density_score = min(density_ratio * 10, 1.0)  # Normalize
@@ -184,6 +189,12 @@ class CrowdDensityDetector:
         
         # Initialize density grid
         density_grid = [[0 for _ in range(grid_cols)] for _ in range(grid_rows)]
+
+        # Cells whose center lies outside the ROI are not part of the monitored area
+        centers = [(col * self.grid_size + self.grid_size // 2, row * self.grid_size + self.grid_size // 2)
+                   for row in range(grid_rows) for col in range(grid_cols)]
+        cell_boxes = [(x, y, x + 1, y + 1) for x, y in centers]
+        in_roi = self.roi.keep_boxes(cell_boxes, frame_shape).reshape(grid_rows, grid_cols)
         
         # Count people in each grid cell
         for bbox in person_bboxes:
@@ -199,16 +210,18 @@ class CrowdDensityDetector:
         
         # Analyze grid density patterns
         high_density_cells = 0
-        total_cells = grid_rows * grid_cols
+        total_cells = int(in_roi.sum())
         
-        for row in density_grid:
-            for cell_count in row:
+        for row, roi_row in zip(density_grid, in_roi):
+            for cell_count, cell_in_roi in zip(row, roi_row):
+                if not cell_in_roi:
+                    continue
                 if cell_count >= 3:  # High density cell
                     high_density_cells += 1
                 elif cell_count >= 2:  # Medium density cell
                     high_density_cells += 0.5
         
-        density_ratio = high_density_cells / total_cells
+        density_ratio = high_density_cells / total_cells if total_cells else 0.0
         
         return {
             'grid_density_ratio': density_ratio,
@@ -254,14 +267,10 @@ class CrowdDensityDetector:
         stampede_score += person_count_score * 0.2
         
         # 5. Temporal consistency
-        self.stampede_history.append(stampede_score)
-        if len(self.stampede_history) >= 3:
-            recent_scores = list(self.stampede_history)[-3:]
-            avg_score = sum(recent_scores) / len(recent_scores)
-            
+        self.stampede_history.push(stampede_score)
+        if self.stampede_history.full and self.stampede_history.mean() > 0.5:
             # Boost score if consistently high
-            if avg_score > 0.5:
-                stampede_score = min(stampede_score + 0.2, 1.0)
+            stampede_score = min(stampede_score + 0.2, 1.0)
         
         # 6. Determine stampede type
         stampede_type = 'none'
@@ -285,6 +294,11 @@ class CrowdDensityDetector:
     
     def process_frame(self, frame, person_bboxes):
         """Process frame for crowd density and stampede detection"""
+        # People outside the ROI are ignored
+        if self.roi.enabled and person_bboxes:
+            keep = self.roi.keep_boxes(person_bboxes, frame.shape)
+            person_bboxes = [bbox for bbox, inside in zip(person_bboxes, keep) if inside]
+
         # Calculate optical flow
         motion_level = self.calculate_optical_flow(frame)
         
@@ -292,8 +306,8 @@ class CrowdDensityDetector:
         stampede_result = self.detect_stampede(person_bboxes, motion_level, frame.shape)
         
         # Update history
-        self.density_history.append(stampede_result.get('density_score', 0.0))
-        self.motion_history.append(motion_level)
+        self.density_history.push(stampede_result.get('density_score', 0.0))
+        self.motion_history.push(motion_level)
         
         return {
             'stampede_detected': stampede_result['detected'],
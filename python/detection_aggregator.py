@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Cross-Camera Detection Aggregation
+Cameras publish immutable per-frame summaries to a queue-based bus; a single
+aggregator thread folds them into sliding-window statistics in O(1) per update
+and serves consistent snapshots across all cameras.
+"""
+
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+# Immutable per-frame summary published by a camera
+# events is a tuple of (event_type, confidence) pairs
+CameraFrameSummary = namedtuple(
+    "CameraFrameSummary",
+    ["camera_id", "zone", "timestamp", "person_count", "events"]
+)
+
+
+def make_frame_summary(camera_id, zone, person_count, detection_history, timestamp=None):
+    """Build a CameraFrameSummary from a per-camera detection history dict"""
+    events = tuple(
+        (event_type, float(event["confidence"]) if event["status"] == "detected" else 0.0)
+        for event_type, event in detection_history.items()
+    )
+    return CameraFrameSummary(camera_id, zone, timestamp or time.time(), int(person_count), events)
+
+
+class DetectionBus:
+    """Multi-producer, single-consumer bounded queue of frame summaries"""
+
+    def __init__(self, max_pending=1024):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def publish(self, summary):
+        """Publish a summary (non-blocking, safe from any camera thread)
+
+        When the consumer falls behind the oldest pending summary is dropped;
+        the aggregator only needs each camera's latest frames.
+        """
+        while True:
+            try:
+                self._queue.put_nowait(summary)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Return the next summary, or None on timeout"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class WindowMax:
+    """Sliding-window maximum using a monotonic deque (amortized O(1))"""
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self._entries = deque()  # (timestamp, value) with decreasing values
+
+    def add(self, timestamp, value):
+        while self._entries and self._entries[-1][1] <= value:
+            self._entries.pop()
+        self._entries.append((timestamp, value))
+
+    def value(self, now):
+        while self._entries and self._entries[0][0] < now - self.window_seconds:
+            self._entries.popleft()
+        return self._entries[0][1] if self._entries else 0.0
+
+
+class WindowMean:
+    """Sliding-window mean with a running sum (amortized O(1))"""
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self._entries = deque()
+        self._sum = 0.0
+
+    def add(self, timestamp, value):
+        self._entries.append((timestamp, value))
+        self._sum += value
+
+    def value(self, now):
+        while self._entries and self._entries[0][0] < now - self.window_seconds:
+            self._sum -= self._entries.popleft()[1]
+        return self._sum / len(self._entries) if self._entries else 0.0
+
+
+class SlidingWindowAggregator:
+    """Incremental cross-camera statistics fed by a DetectionBus"""
+
+    def __init__(self, window_seconds=5.0):
+        self.window_seconds = window_seconds
+        self.latest = {}        # camera_id -> last CameraFrameSummary
+        self.total_persons = 0
+        self.zone_persons = {}
+        self.updates = 0
+        self.total_persons_mean = WindowMean(window_seconds)
+        self.total_persons_peak = WindowMax(window_seconds)
+        self.event_maxima = {}  # event_type -> WindowMax
+        self.removed = {}       # camera_id -> removal time, later summaries bring the camera back
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+    @property
+    def running(self):
+        """True while a consumer thread drains the bus"""
+        return self._running
+
+    def apply(self, summary):
+        """Fold one summary into the running statistics"""
+        with self._lock:
+            # Summaries still queued on the bus when their camera was removed
+            if summary.timestamp <= self.removed.get(summary.camera_id, float("-inf")):
+                return
+            previous = self.latest.get(summary.camera_id)
+            self.latest[summary.camera_id] = summary
+
+            # Totals change by the delta against this camera's previous frame
+            delta = summary.person_count - (previous.person_count if previous else 0)
+            self.total_persons += delta
+            if previous is not None and previous.zone != summary.zone:
+                self.zone_persons[previous.zone] -= previous.person_count
+                delta = summary.person_count
+            self.zone_persons[summary.zone] = self.zone_persons.get(summary.zone, 0) + delta
+
+            self.total_persons_mean.add(summary.timestamp, self.total_persons)
+            self.total_persons_peak.add(summary.timestamp, self.total_persons)
+            for event_type, confidence in summary.events:
+                if event_type not in self.event_maxima:
+                    self.event_maxima[event_type] = WindowMax(self.window_seconds)
+                self.event_maxima[event_type].add(summary.timestamp, confidence)
+            self.updates += 1
+
+    def remove_camera(self, camera_id, timestamp=None):
+        """Drop a camera's contribution to the current totals"""
+        with self._lock:
+            self.removed[camera_id] = timestamp or time.time()
+            previous = self.latest.pop(camera_id, None)
+            if previous is not None:
+                self.total_persons -= previous.person_count
+                self.zone_persons[previous.zone] -= previous.person_count
+
+    def snapshot(self, now=None):
+        """Return a consistent view of all cameras at a single point in time"""
+        now = now or time.time()
+        with self._lock:
+            return {
+                "as_of": now,
+                "updates": self.updates,
+                "total_persons": self.total_persons,
+                "zone_persons": dict(self.zone_persons),
+                "window_seconds": self.window_seconds,
+                "window_mean_persons": self.total_persons_mean.value(now),
+                "window_peak_persons": self.total_persons_peak.value(now),
+                "event_maxima": {event_type: window_max.value(now)
+                                 for event_type, window_max in self.event_maxima.items()},
+                "cameras": {
+                    camera_id: {
+                        "zone": summary.zone,
+                        "person_count": summary.person_count,
+                        "timestamp": summary.timestamp,
+                        "events": dict(summary.events)
+                    }
+                    for camera_id, summary in self.latest.items()
+                }
+            }
+
+    def start(self, bus):
+        """Consume summaries from the bus on a background thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._consume, args=(bus,), daemon=True)
+        self._thread.start()
+
+    def _consume(self, bus):
+        while self._running:
+            summary = bus.get(timeout=0.5)
+            if summary is not None:
+                self.apply(summary)
+
+    def stop(self):
+        """Stop the consumer thread"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
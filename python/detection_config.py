@@ -150,11 +150,139 @@ EMERGENCY_SETTINGS = {
     }
 }
 
+# YOLO model runtime (see model_runtime.py); YOLO_MODEL_PATH, MODEL_BACKEND and
+# MODEL_PRECISION override these. "auto" uses an exported OpenVINO or ONNX model
+# when one exists for the weights/precision/size, otherwise PyTorch.
+MODEL_SETTINGS = {
+    "weights": "yolov8n.pt",
+    "backend": "auto",            # "auto", "pytorch", "onnx" or "openvino"
+    "precision": "fp32",          # "fp32" or "int8" (exported with a calibration set)
+    "imgsz": 640,
+    "export_dir": "models",
+    "auto_export": False,         # Export at startup when the chosen model is missing
+    "calibration_data": None,     # Directory of representative frames for INT8
+    "calibration_images": 300,
+    "enable_gpu": False           # Prefer PyTorch on CUDA when a GPU is present
+}
+
+# Per-camera inference profiles (see inference_profiles.py). A camera config picks
+# one with {"inference": {"profile": "people"}} and may override any field there.
+# "classes" is "all" or a list of COCO names/ids; the model only runs NMS and
+# post-processing for those classes. imgsz is rounded up to a multiple of 32 and
+# is fixed to MODEL_SETTINGS["imgsz"] for exported ONNX/OpenVINO models.
+# iou 0.7 is the ultralytics default the cameras ran with before profiles existed;
+# lower values merge more overlapping boxes, e.g. people close together.
+INFERENCE_PROFILES = {
+    "default": {"imgsz": 640, "classes": "all", "conf": 0.3, "iou": 0.7},
+    "people": {"imgsz": 640, "classes": ["person"], "conf": 0.3, "iou": 0.7},
+    "people_fast": {"imgsz": 416, "classes": ["person"], "conf": 0.35, "iou": 0.5},
+    "safety": {"imgsz": 640, "classes": ["person", "bicycle", "car", "motorcycle", "bus", "truck",
+                                         "backpack", "handbag", "suitcase"],
+               "conf": 0.3, "iou": 0.7}
+}
+
+# Static regions of interest (see roi_mask.py) for cameras whose config has no
+# "roi" entry, keyed by camera id or source (e.g. "0" for the default webcam).
+# Each value is {"polygons": [[[x, y], ...], ...], "anchor": "center" | "bottom"};
+# coordinates are pixels or fractions of the frame size.
+CAMERA_ROIS = {}
+
+# Tiled inference for dense crowds (see tiled_inference.py). Frames at least
+# min_frame_side pixels on a side are split into overlapping tiles once a frame
+# has density_on people, until the count drops below density_off.
+TILED_INFERENCE_SETTINGS = {
+    "enabled": True,
+    "tile_size": 640,          # Tile side; tiles and the whole frame run at this input size
+    "overlap": 0.2,            # Share of a tile overlapping its neighbour
+    "min_frame_side": 1280,    # Smaller frames are never tiled
+    "density_on": 15,          # People in a frame that switch tiling on
+    "density_off": 8,          # ... and below which it switches off again
+    "nms_iou": 0.5,            # Cross-tile NMS IoU
+    "edge_ios": 0.6,           # Drop boxes cut by a tile border that mostly lie inside another box
+    "edge_margin": 2           # Pixels from a tile border that count as touching it
+}
+
+# Motion gate (see motion_gate.py): skip YOLO while a camera's view is unchanged
+# and reuse the last detections. VIDEO_SERVICE_MOTION_GATE=0 disables it; a camera
+# config can set "motion_gate": false or override any field in a dict.
+MOTION_GATE_SETTINGS = {
+    "enabled": True,
+    "width": 160,                   # Downscaled width used for differencing
+    "pixel_threshold": 25,          # Gray-level change that counts a pixel as changed
+    "min_changed_fraction": 0.002,  # Changed pixel share that counts as motion
+    "refresh_interval": 2.0,        # Seconds between inferences on a static scene
+    "hold_seconds": 1.0,            # Keep full-rate inference this long after motion
+    "blur": 5                       # Gaussian kernel that suppresses sensor noise
+}
+
+# Event-triggered quality control (see quality_controller.py). Cameras run at
+# low_imgsz and low_fps until an event score reaches its pre-threshold, then at the
+# profile's full size and high_fps for hold_seconds after the last candidate.
+# VIDEO_SERVICE_QUALITY_CONTROL=0 disables it; a camera config can set
+# "quality": false or override any field in a dict.
+QUALITY_CONTROL_SETTINGS = {
+    "enabled": True,
+    "low_imgsz": 320,          # Model input size in low mode (ignored by fixed-size exports)
+    "low_fps": 5.0,            # Inferred frames per second in low mode
+    "high_fps": 0,             # ... in high mode, 0 infers every captured frame
+    "hold_seconds": 10.0,      # Stay upshifted this long after the last candidate event
+    "pre_thresholds": {        # Event scores that upshift, below the alert thresholds
+        "fallen": 0.2,
+        "fire": 0.25,
+        "smoke": 0.25,
+        "stampede": 0.6        # Share of the service's STAMPEDE_THRESHOLD people in view
+    }
+}
+
+# Priority-aware admission control (see admission_control.py). Camera configs
+# set "priority" to a name below or a number. When measured inference demand
+# exceeds the budget, the lowest priorities are shed first: no tiling, then
+# shed_imgsz, then shed_fps and finally min_fps. VIDEO_SERVICE_ADMISSION=0
+# disables it and VIDEO_SERVICE_INFERENCE_BUDGET overrides the budget.
+ADMISSION_SETTINGS = {
+    "enabled": True,
+    "budget": None,                 # Inference seconds per second; None = CPU cores x target_utilization
+    "target_utilization": 0.8,
+    "interval": 2.0,                # Seconds between budget allocations
+    "shed_imgsz": 320,              # Model input size of cameras shed by resolution
+    "shed_fps": 2.0,                # Inference rate of cameras shed by frame rate
+    "min_fps": 0.5,                 # ... at the last ladder step
+    "recover_ratio": 0.85,          # Un-shed only while demand fits this share of the budget
+    "smoothing": 0.3,               # EWMA weight of new cost and rate measurements
+    "priorities": {"critical": 3, "high": 2, "normal": 1, "low": 0},
+    "default_priority": "normal",
+    "protected_priority": "critical"  # Cameras at or above this priority are never shed
+}
+
 # Log file settings
 LOG_SETTINGS = {
     "filename": "activity_log.jsonl",
     "max_file_size_mb": 100,
-    "backup_count": 5
+    "backup_count": 5,
+    "compress": True,         # gzip rotated segments
+    "flush_bytes": 65536,     # Write the batch once this many bytes are buffered
+    "flush_interval": 5.0,    # ... and by a timer every this many seconds, so a line waits at most this long
+    "backend": "jsonl",       # "jsonl" files or "store" (indexed, see activity_store.py)
+    "store_dir": "activity_store"
+}
+
+# Service logging (see logging_setup.py); LOG_LEVEL, LOG_FILE and
+# LOG_MODULE_LEVELS ("name=LEVEL,...") override these
+SERVICE_LOG_SETTINGS = {
+    "level": "INFO",
+    "file": "video_service.log",  # Empty string disables the file sink
+    "max_file_size_mb": 50,
+    "backup_count": 5,
+    "console": True,
+    "module_levels": {
+        "werkzeug": "WARNING",
+        "engineio": "WARNING",
+        "socketio": "WARNING",
+        "urllib3": "WARNING"
+    },
+    "queue_size": 10000,        # Records buffered for the writer before the oldest are dropped
+    "flush_interval": 0.05,     # Seconds between writer drains
+    "throttle_interval": 5.0    # Seconds between repeats of a per-frame log line
 }
 
 # Video display settings
@@ -162,5 +290,39 @@ DISPLAY_SETTINGS = {
     "window_name": "Real-time Detection",
     "show_fps": True,
     "show_confidence": True,
-    "show_class_names": True
-} 
\ No newline at end of file
+    "show_class_names": True,
+    "mode": "windows",          # "windows" (one per camera), "mosaic" or "headless"
+    "mosaic_fps": 5,            # Compositor refresh rate in mosaic mode
+    "mosaic_tile_size": (480, 360)
+}
+
+# Camera execution settings
+# "threads" runs one thread per camera, "processes" runs capture, inference and
+# encoding in separate worker processes connected by shared-memory rings
+# Process mode keeps 2 raw rings (capture, annotated) and a JPEG ring per camera in
+# /dev/shm: 4 slots of 1080p are ~25 MB per raw ring, ~55 MB per camera in total
+EXECUTION_SETTINGS = {
+    "mode": "threads",
+    "ring_slots": 4,
+    "max_frame_shape": (1080, 1920, 3),
+    "jpeg_slot_ratio": 0.2,     # JPEG ring slot size as a fraction of a raw frame
+    "supervise_interval": 0.5,  # seconds between worker liveness checks
+    "restart_backoff": 1.0      # base delay before restarting a dead worker
+}
+
+# Cross-camera aggregation settings
+AGGREGATION_SETTINGS = {
+    "window_seconds": 5.0,  # Sliding window for mean/peak persons and event maxima
+    "max_pending": 1024     # Bus capacity; the oldest summaries are dropped beyond it
+}
+
+# Web server settings
+# "threading" uses the Werkzeug server, "eventlet" or "gevent" serve long-lived
+# video and WebSocket connections on green threads (see production_server.py)
+SERVER_SETTINGS = {
+    "async_mode": "threading",
+    "max_stream_connections": 200,  # Concurrent MJPEG viewers (0 = unlimited)
+    "max_socket_connections": 500,  # Concurrent WebSocket clients (0 = unlimited)
+    "stream_poll_interval": 0.02,   # Seconds between new-frame checks per viewer
+    "jpeg_quality": 85
+}
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+YOLO Detection Post-Processing
+Shared helpers that turn raw YOLO results into the streaming service's detection
+schema. Kept free of import-time side effects so worker processes can use them.
+"""
+
+import time
+import cv2
+from detection_config import CLASS_MAPPING
+from inference_profiles import predict_kwargs, profile_for_model
+from motion_gate import MotionGate
+from tiled_inference import TiledDetector
+from quality_controller import QualityController
+from admission_control import CameraAdmission
+from roi_mask import RoiMask
+from frame_pipeline import FramePipeline
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Colors used when drawing detections (BGR)
+DETECTION_COLORS = {
+    "fire": (0, 0, 255),      # Red
+    "smoke": (128, 128, 128),  # Gray
+    "running": (0, 255, 0),    # Green
+    "fallen": (255, 0, 0),     # Blue
+    "medical emergency": (255, 0, 255),  # Magenta
+    "stampede": (0, 255, 255), # Cyan
+    "person": (0, 255, 0),     # Green for people
+    "laptop": (255, 255, 0),   # Yellow for laptops
+    "chair": (128, 255, 128),  # Light green for furniture
+    "tv": (255, 128, 0),       # Orange for electronics
+}
+
+
+def extract_detections(results, model_names, camera_id, confidence_threshold):
+    """Convert YOLO results into detection dicts, returns (detections, raw_count)"""
+    detections = []
+    raw_detections_count = 0
+
+    for result in results:
+        boxes = result.boxes
+        if boxes is not None:
+            for box in boxes:
+                # Get bounding box coordinates
+                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+                confidence = box.conf[0].cpu().numpy()
+                class_id = int(box.cls[0].cpu().numpy())
+                raw_detections_count += 1
+
+                # Debug: Log what YOLO is actually detecting
+                if raw_detections_count <= 5:  # Only log first 5 to avoid spam
+                    logger.debug("YOLO detected: class_id=%d, confidence=%.2f", class_id, confidence)
+
+                # For now, let's detect ALL objects above confidence threshold, not just mapped ones
+                if confidence >= confidence_threshold:
+                    # Get class name from YOLO model
+                    class_name = model_names.get(class_id, f"class_{class_id}")
+
+                    # Use mapped label if available, otherwise use original class name
+                    label = CLASS_MAPPING.get(class_id, class_name)
+
+                    detections.append({
+                        "label": label,
+                        "confidence": float(confidence),
+                        "bbox": [float(x1), float(y1), float(x2-x1), float(y2-y1)],
+                        "camera_id": camera_id,
+                        "timestamp": time.time(),
+                        "original_class": class_name,
+                        "class_id": class_id
+                    })
+
+    return detections, raw_detections_count
+
+
+def detect_fallen_people(results, aspect_ratio_threshold):
+    """Detect fallen people based on bounding box aspect ratio"""
+    fallen_detections = []
+
+    for result in results:
+        boxes = result.boxes
+        if boxes is not None:
+            for box in boxes:
+                class_id = int(box.cls[0].cpu().numpy())
+
+                # Only check person class (class_id = 0 in COCO)
+                if class_id == 0:  # person class
+                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+
+                    width = x2 - x1
+                    height = y2 - y1
+
+                    if width > 0 and height > 0:
+                        aspect_ratio = width / height
+
+                        # Check if person is lying down (wide bounding box)
+                        if aspect_ratio > aspect_ratio_threshold:
+                            # Improved confidence calculation for better sensitivity
+                            base_confidence = 0.6
+                            ratio_bonus = (aspect_ratio - aspect_ratio_threshold) * 0.4
+                            fallen_confidence = min(base_confidence + ratio_bonus, 1.0)
+
+                            fallen_detections.append({
+                                "label": "fallen",
+                                "confidence": float(fallen_confidence),
+                                "bbox": [float(x1), float(y1), float(width), float(height)],
+                                "camera_id": "unknown",  # Will be set by caller
+                                "timestamp": time.time(),
+                                "aspect_ratio": float(aspect_ratio)
+                            })
+
+    return fallen_detections
+
+
+def draw_detections(frame, detections):
+    """Draw bounding boxes and labels on a copy of the frame"""
+    annotated_frame = frame.copy()
+
+    for detection in detections:
+        x, y, w, h = detection["bbox"]
+        x, y, w, h = int(x), int(y), int(w), int(h)
+
+        color = DETECTION_COLORS.get(detection["label"], (255, 255, 255))  # White for unknown
+
+        # Draw bounding box
+        cv2.rectangle(annotated_frame, (x, y), (x + w, y + h), color, 2)
+
+        # Draw label
+        label = f"{detection['label']}: {detection['confidence']:.2f}"
+        cv2.putText(annotated_frame, label, (x, y - 10),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    return annotated_frame
+
+
+class YoloDetectionProcessor:
+    """Frame processor producing the streaming service detection schema"""
+
+    def __init__(self, model_path=None, confidence_threshold=0.3,
+                 fall_aspect_ratio_threshold=1.3, inference=None, motion_gate=None, tiling=None,
+                 roi=None, quality=None, quality_mode="low", admission=None):
+        from model_runtime import load_detection_model
+        self.model = load_detection_model(model_path)
+        self.tiler = TiledDetector(self.model, tiling)
+        self.roi = RoiMask.from_config(roi)
+        self.fall_aspect_ratio_threshold = fall_aspect_ratio_threshold
+        # motion_gate: MotionGate settings dict, None runs inference on every frame
+        self.motion_gate = MotionGate.from_settings(motion_gate) if motion_gate else None
+        # quality: QualityController settings dict; the service decides the mode
+        self.quality = None
+        if quality:
+            self.quality = QualityController.from_settings(
+                quality, fixed_imgsz=getattr(self.model, "runtime_imgsz", None))
+            self.quality.set_mode(quality_mode)
+        # admission: the service's shedding decision for this camera, None when admission is off
+        self.admission = CameraAdmission(**admission) if admission is not None else None
+        self.pipeline = FramePipeline(self.model, self.tiler, self.roi, self.motion_gate, self.quality,
+                                      admission=lambda: self.admission)
+        self.detections = []
+        # Without a camera profile the default profile runs at the given threshold
+        self.configure(inference if inference is not None else {"conf": confidence_threshold})
+
+    def configure(self, inference=None, quality_mode=None, admission=None):
+        """Apply a camera's inference spec (see inference_profiles.py), quality mode and/or admission"""
+        if quality_mode is not None and self.quality is not None:
+            self.quality.set_mode(quality_mode)
+        if admission is not None:
+            self.admission = CameraAdmission(**admission)
+        if inference is None and (quality_mode is not None or admission is not None):
+            return
+        self.profile = profile_for_model(self.model, inference)
+        self.predict_kwargs = predict_kwargs(self.profile)
+        if self.motion_gate is not None:
+            self.motion_gate.force()
+
+    def process(self, camera_id, frame):
+        """Run detection on a frame, returns (annotated_frame, result)
+
+        When the quality mode's rate cap, the motion gate or the admission cap skips
+        the frame the last detections are redrawn and the result is marked
+        inference_skipped.
+        """
+        outcome = self.pipeline.run(frame, self.predict_kwargs)
+        if outcome.skipped is not None:
+            result = {"detections": self.detections, "inference_skipped": True}
+            if outcome.skipped == "motion":
+                result["motion_gate"] = self.motion_gate.stats()
+            elif outcome.skipped == "admission":
+                result["admission_skipped"] = True
+            return draw_detections(frame, self.detections), result
+
+        results = outcome.results
+        detections, _ = extract_detections(results, self.model.names, camera_id,
+                                           self.profile["conf"])
+        fallen_detections = detect_fallen_people(results, self.fall_aspect_ratio_threshold)
+        for fallen_det in fallen_detections:
+            fallen_det["camera_id"] = camera_id
+        detections.extend(fallen_detections)
+        self.detections = detections
+
+        result = {"detections": detections}
+        if outcome.cost is not None:
+            result["cost"] = outcome.cost
+        if self.motion_gate is not None:
+            result["motion_gate"] = self.motion_gate.stats()
+        return draw_detections(frame, detections), result
@@ -74,7 +74,13 @@ TEMPORAL_SETTINGS = {
     'window_size': 10,          # Number of frames to analyze
     'min_detection_frames': 3,  # Minimum frames for positive detection
     'confidence_decay': 0.9,    # Confidence decay factor over time
-    'temporal_smoothing': True  # Enable temporal smoothing
+    'temporal_smoothing': True,  # Enable temporal smoothing
+    # Per-event state machines (temporal_evidence.py): switch on at `on` hits in the last
+    # `window` frames, off again at `off` hits or fewer after at least `hold` frames
+    'event_rules': {
+        'default': {'window': 3, 'on': 2, 'off': 0, 'hold': 0},
+        'fallen': {'window': 3, 'on': 1, 'off': 0, 'hold': 0}  # Fallen people are reported at once
+    }
 }
 
 # Camera and Video Settings
@@ -97,13 +103,42 @@ AUDIO_SETTINGS = {
 }
 
 # Fire/Smoke Detection Settings
+# The cascade (see fire_smoke_cascade.py) screens a downscaled frame for fire and
+# smoke colors; the region analysis only runs once a color has persisted for
+# persist_frames of the last persist_window frames, and only around the hits.
 FIRE_SMOKE_SETTINGS = {
     'use_cnn': True,
     'cnn_model': 'MobileNetV2',
+    'cnn_head': None,             # Keras model: MobileNetV2 features -> [fire, smoke] probabilities
+    'cnn_threshold': 0.5,         # Head probability a region needs to survive the CNN stage
     'color_analysis': True,
     'flicker_detection': True,
     'min_region_size': 100,
-    'temporal_validation': True
+    'temporal_validation': True,
+    'temporal_rule': {'window': 5, 'on': 4, 'off': 2},  # Consistent fire/smoke boosts region confidence
+    'cascade': True,
+    'screen_width': 160,          # Width of the downscaled color screen
+    'screen_min_fraction': {      # Share of screen pixels in the color ranges that passes
+        'fire': 0.002,
+        'smoke': 0.02
+    },
+    'persist_frames': 2,
+    'persist_window': 4,
+    'candidate_margin': 16        # Pixels around the screen hits that the region analysis covers
+}
+
+# Smoke Background Model (static walls, floors and concrete are excluded from smoke analysis)
+SMOKE_BACKGROUND_SETTINGS = {
+    'enabled': True,
+    'width': 160,                     # Width of the downscaled background
+    'update_every': 5,                # Frames between background updates
+    'learning_rate': 0.05,
+    'foreground_learning_rate': 0.005,  # Learning rate of changed pixels (lingering smoke)
+    'pixel_threshold': 12,            # Gray-level difference that counts as a change
+    'recent_updates': 30,             # Updates a pixel stays "changed" for (and warm-up length)
+    'margin': 2,                      # Background pixels added around changed areas
+    'save_interval': 60.0,            # Seconds between saves of the model
+    'state_dir': 'state/smoke_background'  # <camera>.npz per camera
 }
 
 # Pose Detection Settings
@@ -132,7 +167,11 @@ LOGGING_SETTINGS = {
     'log_interval': 1.0,  # seconds
     'log_file': 'enhanced_multimodal_activity_log.jsonl',
     'max_log_size': 100,  # MB
-    'backup_count': 5
+    'backup_count': 5,
+    'compress_backups': True,
+    'flush_interval': 5.0,  # seconds between batched writes
+    'backend': 'jsonl',  # 'jsonl' or 'store' (indexed, see activity_store.py)
+    'store_dir': 'activity_store'
 }
 
 # Alert Settings
@@ -5,13 +5,10 @@ Combines YOLO + Pose + Fire/Smoke + Crowd + Audio detection with your existing s
 """
 
 import cv2
-import json
 import time
 import datetime
 import numpy as np
-from ultralytics import YOLO
 import threading
-from collections import deque
 import os
 import sys
 
@@ -30,21 +27,43 @@ except ImportError as e:
 
 # Import existing detection config
 from detection_config import TARGET_CLASSES, CLASS_MAPPING
+from enhanced_detection_config import LOGGING_SETTINGS, MODEL_PATHS, PERFORMANCE_SETTINGS
+from model_runtime import load_detection_model
+from inference_profiles import predict_kwargs, profile_for_model
+from tiled_inference import TiledDetector
+from roi_mask import RoiMask
+from smoke_background import StaticBackground
+from temporal_evidence import TemporalEvidence
+from fusion_engine import FusionEngine
+from logging_setup import get_logger, setup_logging, LogThrottle
+from activity_log import open_activity_log, summarize_events
+
+logger = get_logger(__name__)
 
 class EnhancedMultiModalDetector:
     """Enhanced multi-modal emergency detection system"""
     
-    def __init__(self):
+    def __init__(self, roi=None, smoke_background=None):
+        # Static ROI shared by YOLO, color and crowd analysis
+        self.roi = roi or RoiMask()
+        # Learned static surfaces that smoke analysis skips
+        self.smoke_background = smoke_background or StaticBackground.from_settings()
+
         # Initialize YOLO model
-        self.yolo_model = YOLO("yolov8n.pt")
+        self.yolo_model = load_detection_model(MODEL_PATHS['yolo_model'],
+                                               enable_gpu=PERFORMANCE_SETTINGS['enable_gpu'])
+        # YOLO only supplies person boxes here
+        self.yolo_inference = predict_kwargs(profile_for_model(self.yolo_model, {"profile": "people"}))
+        self.yolo_tiler = TiledDetector(self.yolo_model)
+        self.log_throttle = LogThrottle()
 
         # Initialize specialized detectors if available
         self.multimodal_available = MULTIMODAL_AVAILABLE
         if self.multimodal_available:
             try:
                 self.pose_detector = PoseDetector()
-                self.fire_smoke_detector = FireSmokeDetector()
-                self.crowd_detector = CrowdDensityDetector()
+                self.fire_smoke_detector = FireSmokeDetector(roi=self.roi, background=self.smoke_background)
+                self.crowd_detector = CrowdDensityDetector(roi=self.roi)
                 self.audio_detector = AudioDetector()
                 print("✅ All specialized detectors initialized")
             except Exception as e:
@@ -64,7 +83,16 @@ class EnhancedMultiModalDetector:
         
         # System parameters
         self.running = False
-        self.log_interval = 1.0  # Log every second
+        self.log_interval = LOGGING_SETTINGS['log_interval']
+        self.activity_log = open_activity_log({
+            'filename': LOGGING_SETTINGS['log_file'],
+            'max_file_size_mb': LOGGING_SETTINGS['max_log_size'],
+            'backup_count': LOGGING_SETTINGS['backup_count'],
+            'compress': LOGGING_SETTINGS['compress_backups'],
+            'flush_interval': LOGGING_SETTINGS['flush_interval'],
+            'backend': LOGGING_SETTINGS['backend'],
+            'store_dir': LOGGING_SETTINGS['store_dir']
+        }, "enhanced_multimodal") if LOGGING_SETTINGS['log_to_file'] else None
         
         # Detection history
         self.detection_history = {
@@ -78,17 +106,11 @@ class EnhancedMultiModalDetector:
             "audio_distress": {"confidence": 0.0, "status": "not_detected"}
         }
         
-        # Multi-modal fusion weights
-        self.fusion_weights = {
-            'yolo': 0.3,
-            'pose': 0.2,
-            'fire_smoke': 0.2,
-            'crowd': 0.2,
-            'audio': 0.1
-        }
+        # Multi-modal fusion: FUSION_WEIGHTS over per-modality evidence, DETECTION_THRESHOLDS per event
+        self.fusion = FusionEngine.from_settings()
         
-        # Temporal analysis
-        self.temporal_window = deque(maxlen=10)
+        # Temporal analysis: per-event debounce, hysteresis and confidence decay
+        self.evidence = TemporalEvidence.from_settings()
         
         # Tracking variables (from your existing system)
         self.person_tracks = {}
@@ -173,115 +195,18 @@ class EnhancedMultiModalDetector:
         if not self.multimodal_available:
             return self.basic_yolo_detection(None, person_bboxes or [])
         
-        fused_results = {}
-        
-        # 1. Stampede Detection (Crowd + Audio + YOLO)
-        stampede_score = 0.0
-        person_count = len(person_bboxes) if person_bboxes else 0
-        
-        if crowd_results and crowd_results.get('stampede_detected', False):
-            stampede_score += crowd_results.get('stampede_confidence', 0) * self.fusion_weights['crowd']
-        
-        if audio_results and audio_results.get('panic', {}).get('detected', False):
-            stampede_score += audio_results['panic']['confidence'] * self.fusion_weights['audio']
-        
-        # Add YOLO person count contribution
-        if person_count > self.STAMPEDE_THRESHOLD:
-            stampede_score += min(person_count / 30.0, 1.0) * self.fusion_weights['yolo']
-        
-        fused_results['stampede'] = {
-            'detected': stampede_score > 0.3,
-            'confidence': min(stampede_score, 1.0)
-        }
-        
-        # 2. Medical Emergency Detection (Pose + Audio)
-        medical_score = 0.0
-        if pose_results:
-            for pose_result in pose_results:
-                if pose_result.get('emergency_detected', False):
-                    medical_score += pose_result.get('confidence', 0) * self.fusion_weights['pose']
-        
-        if audio_results and audio_results.get('distress', {}).get('detected', False):
-            medical_score += audio_results['distress']['confidence'] * self.fusion_weights['audio']
-        
-        fused_results['medical_emergency'] = {
-            'detected': medical_score > 0.25,
-            'confidence': min(medical_score, 1.0)
-        }
-        
-        # 3. Fire Detection (Fire/Smoke + Audio)
-        fire_score = 0.0
-        if fire_smoke_results and fire_smoke_results.get('fire_detected', False):
-            fire_score += fire_smoke_results.get('max_fire_confidence', 0) * self.fusion_weights['fire_smoke']
-        
-        if audio_results and audio_results.get('fire', {}).get('detected', False):
-            fire_score += audio_results['fire']['confidence'] * self.fusion_weights['audio']
-        
-        fused_results['fire'] = {
-            'detected': fire_score > 0.3,
-            'confidence': min(fire_score, 1.0)
-        }
-        
-        # 4. Smoke Detection
-        smoke_score = 0.0
-        if fire_smoke_results and fire_smoke_results.get('smoke_detected', False):
-            smoke_score = fire_smoke_results.get('max_smoke_confidence', 0) * self.fusion_weights['fire_smoke']
-        
-        fused_results['smoke'] = {
-            'detected': smoke_score > 0.4,
-            'confidence': min(smoke_score, 1.0)
-        }
-        
-        # 5. Fallen Person Detection (YOLO + Pose)
-        fallen_score = 0.0
-        
-        # YOLO-based fallen detection
-        if person_bboxes:
-            fallen_count = 0
-            for person in person_bboxes:
-                bbox = person['bbox']
-                width = bbox[2] - bbox[0]
-                height = bbox[3] - bbox[1]
-                if height > 0:
-                    aspect_ratio = width / height
-                    if aspect_ratio > self.FALL_ASPECT_RATIO_THRESHOLD:
-                        fallen_count += 1
-            
-            if fallen_count > 0:
-                fallen_score += min(fallen_count / 3.0, 1.0) * self.fusion_weights['yolo']
-        
-        # Pose-based fallen detection
-        if pose_results:
-            for pose_result in pose_results:
-                if pose_result.get('fallen_detected', False):
-                    fallen_score += pose_result.get('confidence', 0) * self.fusion_weights['pose']
-        
-        fused_results['fallen'] = {
-            'detected': fallen_score > 0.2,
-            'confidence': min(fallen_score, 1.0)
-        }
-        
-        # 6. Running Detection (Motion + Pose)
-        running_score = 0.0
-        if crowd_results:
-            motion_level = crowd_results.get('motion_level', 0)
-            if motion_level > 1.5:
-                running_score += min(motion_level / 3.0, 1.0) * self.fusion_weights['crowd']
-        
-        fused_results['running'] = {
-            'detected': running_score > 0.3,
-            'confidence': min(running_score, 1.0)
-        }
-        
-        return fused_results
+        evidence = self.fusion.evidence(person_bboxes, pose_results, fire_smoke_results,
+                                        crowd_results, audio_results)
+        return self.fusion.results(evidence)
 
     def process_frame(self, frame):
         """Process a single frame with all detection methods"""
         self.frame_count += 1
         current_time = time.time()
 
-        # Run YOLO detection
-        yolo_results = self.yolo_model(frame, verbose=False)
+        # Run YOLO detection on the ROI crop
+        view, offset = self.roi.crop(frame)
+        yolo_results = self.roi.restore_results(self.yolo_tiler(view, **self.yolo_inference), frame, offset)
         person_bboxes = self.extract_person_bboxes(yolo_results)
 
         # Initialize results
@@ -309,7 +234,7 @@ class EnhancedMultiModalDetector:
                     audio_results = self.audio_detector.get_latest_results()
 
             except Exception as e:
-                print(f"⚠️ Error in multimodal detection: {e}")
+                self.log_throttle.warning(logger, "multimodal", "⚠️ Error in multimodal detection: %s", e)
 
         # Fuse all detection results
         fused_results = self.fuse_detections(
@@ -317,15 +242,11 @@ class EnhancedMultiModalDetector:
             crowd_results, audio_results, person_bboxes
         )
 
-        # Update detection history
-        for event_type, result in fused_results.items():
-            self.detection_history[event_type] = {
-                "confidence": result['confidence'],
-                "status": "detected" if result['detected'] else "not_detected"
-            }
-
-        # Add temporal analysis
-        self.temporal_window.append(fused_results)
+        # Update detection history through the temporal state machines
+        self.detection_history.update(self.evidence.update_all({
+            event_type: (result['detected'], result['confidence'])
+            for event_type, result in fused_results.items()
+        }))
 
         return fused_results, person_bboxes
 
@@ -373,8 +294,8 @@ class EnhancedMultiModalDetector:
 
         return frame
 
-    def log_detections(self, fused_results):
-        """Log detection results to console and file"""
+    def log_detections(self):
+        """Log the temporally filtered detection history to console and file"""
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         log_entry = {
@@ -382,21 +303,19 @@ class EnhancedMultiModalDetector:
             "events": {}
         }
 
-        for event_type, result in fused_results.items():
+        for event_type, event in self.detection_history.items():
             log_entry["events"][event_type] = {
-                "confidence": round(result['confidence'], 3),
-                "status": "detected" if result['detected'] else "not_detected"
+                "confidence": round(event['confidence'], 3),
+                "status": event['status']
             }
 
-        # Print to console
-        print(json.dumps(log_entry, indent=2))
+        # One-line summary to console
+        if LOGGING_SETTINGS['log_to_console']:
+            logger.info(f"{timestamp} {summarize_events(log_entry['events'])}")
 
-        # Save to file
-        try:
-            with open("enhanced_multimodal_activity_log.jsonl", "a") as f:
-                f.write(json.dumps(log_entry) + "\n")
-        except Exception as e:
-            print(f"Error writing to log file: {e}")
+        # Save to file (batched, flushed and rotated by the writer)
+        if self.activity_log is not None:
+            self.activity_log.write(log_entry)
 
     def start_detection(self, camera_source=0):
         """Start the enhanced multimodal detection system"""
@@ -438,7 +357,7 @@ class EnhancedMultiModalDetector:
                 # Log detections every second
                 current_time = time.time()
                 if current_time - last_log_time >= self.log_interval:
-                    self.log_detections(fused_results)
+                    self.log_detections()
                     last_log_time = current_time
 
                 # Display frame
@@ -456,6 +375,9 @@ class EnhancedMultiModalDetector:
             self.running = False
             cap.release()
             cv2.destroyAllWindows()
+            if self.activity_log is not None:
+                self.activity_log.close()
+            self.smoke_background.save()
 
             # Stop audio detection
             if self.multimodal_available and self.audio_detector and hasattr(self.audio_detector, 'stop_audio_stream'):
@@ -469,7 +391,9 @@ class EnhancedMultiModalDetector:
 
 def main():
     """Main function to run the enhanced detection system"""
-    detector = EnhancedMultiModalDetector()
+    setup_logging()
+    detector = EnhancedMultiModalDetector(roi=RoiMask.from_config(key=0),
+                                          smoke_background=StaticBackground.from_settings(camera=0))
 
     # Start detection with default camera (0)
     # You can change this to use different camera sources
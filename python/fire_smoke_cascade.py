@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Fire/Smoke Detection Cascade
+Cheap screens in front of the full-resolution fire and smoke analysis. A color
+screen on a downscaled frame looks for fire- and smoke-colored pixels; only when
+they persist over several frames does the region analysis run, and then only
+inside the area where the screen found them. Region-level features and the
+optional CNN check work on the survivors. Every stage counts what it receives
+and what it passes on.
+"""
+
+import cv2
+import numpy as np
+from enhanced_detection_config import FIRE_SMOKE_SETTINGS, FIRE_COLOR_RANGES, SMOKE_COLOR_RANGES
+from temporal_evidence import RingWindow
+
+STAGES = ("screen", "persistence", "regions", "cnn")
+KINDS = ("fire", "smoke")
+
+
+class FireSmokeCascade:
+    """Stage gating and pass-through accounting for one camera's fire/smoke analysis"""
+
+    def __init__(self, settings=None):
+        settings = dict(FIRE_SMOKE_SETTINGS, **(settings or {}))
+        self.enabled = settings["cascade"]
+        self.screen_width = settings["screen_width"]
+        self.min_fraction = settings["screen_min_fraction"]
+        self.persist_frames = settings["persist_frames"]
+        self.margin = settings["candidate_margin"]
+        self.ranges = {
+            "fire": [(np.array(lower), np.array(upper)) for lower, upper in FIRE_COLOR_RANGES],
+            "smoke": [(np.array(lower), np.array(upper)) for lower, upper in SMOKE_COLOR_RANGES]
+        }
+        self.history = {kind: RingWindow(settings["persist_window"]) for kind in KINDS}
+        self.counts = {stage: {kind: [0, 0] for kind in KINDS} for stage in STAGES}
+
+    def record(self, stage, kind, received, passed):
+        counts = self.counts[stage][kind]
+        counts[0] += received
+        counts[1] += passed
+
+    def _screen_mask(self, small_hsv, kind):
+        mask = None
+        for lower, upper in self.ranges[kind]:
+            part = cv2.inRange(small_hsv, lower, upper)
+            mask = part if mask is None else cv2.bitwise_or(mask, part)
+        return mask
+
+    def candidates(self, frame, background=None):
+        """Screen and persistence stages: {kind: (x1, y1, x2, y2) area to analyze, or None}
+
+        background is the camera's StaticBackground; the smoke screen ignores its static pixels.
+        """
+        height, width = frame.shape[:2]
+        if not self.enabled:
+            return {kind: (0, 0, width, height) for kind in KINDS}
+
+        scale = width / self.screen_width if width > self.screen_width else 1.0
+        small = frame if scale == 1.0 else cv2.resize(
+            frame, (self.screen_width, max(int(round(height / scale)), 1)), interpolation=cv2.INTER_AREA)
+        small_hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+
+        candidates = {}
+        for kind in KINDS:
+            mask = self._screen_mask(small_hsv, kind)
+            if kind == "smoke" and background is not None and background.ready:
+                mask = cv2.bitwise_and(mask, background.mask(mask.shape))
+            hit = cv2.countNonZero(mask) >= self.min_fraction[kind] * mask.size
+            self.record("screen", kind, 1, int(hit))
+            self.history[kind].push(hit)
+
+            candidates[kind] = None
+            if not hit:
+                continue
+            persistent = self.history[kind].sum >= self.persist_frames
+            self.record("persistence", kind, 1, int(persistent))
+            if not persistent:
+                continue
+
+            # Screen hits scaled back to the frame, widened by the margin
+            x, y, w, h = cv2.boundingRect(cv2.findNonZero(mask))
+            candidates[kind] = (max(int(x * scale) - self.margin, 0),
+                                max(int(y * scale) - self.margin, 0),
+                                min(int(np.ceil((x + w) * scale)) + self.margin, width),
+                                min(int(np.ceil((y + h) * scale)) + self.margin, height))
+        return candidates
+
+    def summary(self):
+        """One line of pass rates, e.g. "screen fire 2% smoke 35% | persistence ..." """
+        parts = []
+        for stage, kinds in self.counts.items():
+            rates = [f"{kind} {passed / received:.0%}" for kind, (received, passed) in kinds.items() if received]
+            if rates:
+                parts.append(f"{stage} {' '.join(rates)}")
+        return " | ".join(parts) or "no frames"
+
+    def stats(self):
+        return {
+            stage: {
+                kind: {"received": received, "passed": passed,
+                       "pass_rate": round(passed / received, 4) if received else None}
+                for kind, (received, passed) in kinds.items()
+            }
+            for stage, kinds in self.counts.items()
+        }
+
+
+def union_rect(rects):
+    """Smallest (x1, y1, x2, y2) covering all rects that are not None, None without any"""
+    rects = [rect for rect in rects if rect is not None]
+    if not rects:
+        return None
+    return (min(rect[0] for rect in rects), min(rect[1] for rect in rects),
+            max(rect[2] for rect in rects), max(rect[3] for rect in rects))
@@ -12,18 +12,39 @@ from tensorflow.keras.preprocessing import image
 from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
 import math
 from collections import deque
+from logging_setup import get_logger, setup_logging, LogThrottle
+from roi_mask import RoiMask
+from enhanced_detection_config import FIRE_SMOKE_SETTINGS
+from fire_smoke_cascade import FireSmokeCascade, KINDS, union_rect
+from region_stats import extract_regions
+from smoke_background import StaticBackground
+from temporal_evidence import TemporalEvidence
+
+logger = get_logger(__name__)
 
 class FireSmokeDetector:
     """Advanced fire and smoke detection using CNN classification"""
     
-    def __init__(self):
-        # Load pre-trained MobileNetV2 for feature extraction
-        self.base_model = MobileNetV2(weights='imagenet', include_top=False, pooling='avg')
+    def __init__(self, roi=None, settings=None, background=None):
+        settings = dict(FIRE_SMOKE_SETTINGS, **(settings or {}))
+        # Static ROI: color masks and regions only cover the monitored area
+        self.roi = roi or RoiMask()
+        # Screens that decide whether and where the region analysis runs
+        self.cascade = FireSmokeCascade(settings)
+        # Learned static surfaces (walls, floors) that smoke analysis skips
+        self.background = background or StaticBackground.from_settings()
+
+        # MobileNetV2 and the classifier head load on the first region that reaches the CNN stage
+        self._base_model = None
+        self._cnn_head = None
+        self.cnn_head_path = settings['cnn_head'] if settings['use_cnn'] else None
+        self.cnn_threshold = settings['cnn_threshold']
+        self.log_throttle = LogThrottle()
         
         # Fire and smoke detection parameters
         self.fire_confidence_threshold = 0.6
         self.smoke_confidence_threshold = 0.7
-        self.min_region_size = 100  # Minimum region size to analyze
+        self.min_region_size = settings['min_region_size']  # Minimum region size to analyze
         
         # Color-based detection parameters
         self.fire_color_ranges = [
@@ -45,13 +66,20 @@ class FireSmokeDetector:
         ]
         
         # Temporal analysis
-        self.fire_history = deque(maxlen=10)
-        self.smoke_history = deque(maxlen=10)
+        self.evidence = TemporalEvidence.from_settings(
+            rules={kind: settings['temporal_rule'] for kind in KINDS})
         
         # Flame flicker detection
         self.flicker_threshold = 0.3
         self.intensity_history = deque(maxlen=5)
         
+    @property
+    def base_model(self):
+        """Pre-trained MobileNetV2 feature extractor, loaded on first use"""
+        if self._base_model is None:
+            self._base_model = MobileNetV2(weights='imagenet', include_top=False, pooling='avg')
+        return self._base_model
+
     def extract_cnn_features(self, region):
         """Extract CNN features from image region"""
         try:
@@ -70,7 +98,7 @@ class FireSmokeDetector:
             features = self.base_model.predict(x, verbose=0)
             return features.flatten()
         except Exception as e:
-            print(f"Error extracting CNN features: {e}")
+            self.log_throttle.warning(logger, "cnn_features", "Error extracting CNN features: %s", e)
             return None
     
     def analyze_color_distribution(self, region):
@@ -130,107 +158,116 @@ class FireSmokeDetector:
         
         return edge_density, texture_uniformity
     
+    def verify_with_cnn(self, frame, kind, regions):
+        """CNN stage: keep regions the classifier head scores at or above cnn_threshold"""
+        if self.cnn_head_path is None or not regions:
+            return regions
+        if self._cnn_head is None:
+            self._cnn_head = tf.keras.models.load_model(self.cnn_head_path)
+        
+        verified = []
+        for region in regions:
+            x1, y1, x2, y2 = region['bbox']
+            features = self.extract_cnn_features(frame[y1:y2, x1:x2])
+            if features is None:
+                continue
+            probability = float(self._cnn_head.predict(features[None], verbose=0)[0][KINDS.index(kind)])
+            if probability >= self.cnn_threshold:
+                region['cnn_probability'] = probability
+                verified.append(region)
+        self.cascade.record('cnn', kind, len(regions), len(verified))
+        return verified
+    
     def detect_fire_smoke_regions(self, frame):
         """Detect fire and smoke regions in frame"""
         fire_regions = []
         smoke_regions = []
         
-        # Convert to HSV for color analysis
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        # The cascade screens pick the parts of the ROI crop worth a full analysis
+        view, (ox, oy) = self.roi.crop(frame)
+        self.background.update(view)
+        candidates = self.cascade.candidates(view, self.background)
+        rect = union_rect(candidates.values())
+        if rect is None:
+            return fire_regions, smoke_regions
+        
+        # One HSV conversion covering all candidate areas; regions are offset back to the frame
+        hsv = cv2.cvtColor(view[rect[1]:rect[3], rect[0]:rect[2]], cv2.COLOR_BGR2HSV)
+        ox, oy = ox + rect[0], oy + rect[1]
+        
+        # One mask per kind (the union of its color ranges), cleaned up morphologically
+        kernel = np.ones((5, 5), np.uint8)
+        masks = {}
+        for kind, ranges in (('fire', self.fire_color_ranges), ('smoke', self.smoke_color_ranges)):
+            mask = np.zeros(hsv.shape[:2], np.uint8)
+            for lower, upper in ranges if candidates[kind] else []:
+                mask = cv2.bitwise_or(mask, cv2.inRange(hsv, lower, upper))
+            mask = self.roi.apply_to_mask(mask, frame.shape, rect)
+            if kind == 'smoke':
+                mask = self.background.apply_to_mask(mask, rect)
+            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+            masks[kind] = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        
+        # Fire and smoke region tables from connected components in one call
+        tables = extract_regions(masks, min_area=self.min_region_size)
+        fire_candidates, smoke_candidates = len(tables['fire']), len(tables['smoke'])
         
         # Detect fire regions
-        for lower, upper in self.fire_color_ranges:
-            mask = cv2.inRange(hsv, lower, upper)
+        for (x, y, x2, y2), area in zip(tables['fire'].frame_boxes((ox, oy)).tolist(), tables['fire'].areas):
+            region = frame[y:y2, x:x2]
             
-            # Morphological operations
-            kernel = np.ones((5, 5), np.uint8)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+            # Analyze region
+            fire_score, _ = self.analyze_color_distribution(region)
+            flicker_score = self.detect_flame_flicker(region)
             
-            # Find contours
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # Combined fire score
+            combined_score = (fire_score * 0.7) + (flicker_score * 0.3)
             
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area > self.min_region_size:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    region = frame[y:y+h, x:x+w]
-                    
-                    if region.size > 0:
-                        # Analyze region
-                        fire_score, _ = self.analyze_color_distribution(region)
-                        flicker_score = self.detect_flame_flicker(region)
-                        
-                        # Combined fire score
-                        combined_score = (fire_score * 0.7) + (flicker_score * 0.3)
-                        
-                        if combined_score > self.fire_confidence_threshold:
-                            fire_regions.append({
-                                'bbox': [x, y, x+w, y+h],
-                                'confidence': combined_score,
-                                'area': area,
-                                'flicker_score': flicker_score
-                            })
+            if combined_score > self.fire_confidence_threshold:
+                fire_regions.append({
+                    'bbox': [x, y, x2, y2],
+                    'confidence': combined_score,
+                    'area': float(area),
+                    'flicker_score': flicker_score
+                })
         
         # Detect smoke regions
-        for lower, upper in self.smoke_color_ranges:
-            mask = cv2.inRange(hsv, lower, upper)
+        for (x, y, x2, y2), area in zip(tables['smoke'].frame_boxes((ox, oy)).tolist(), tables['smoke'].areas):
+            region = frame[y:y2, x:x2]
             
-            # Morphological operations
-            kernel = np.ones((5, 5), np.uint8)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+            # Analyze region
+            _, smoke_score = self.analyze_color_distribution(region)
+            edge_density, texture_uniformity = self.analyze_texture_features(region)
             
-            # Find contours
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # Combined smoke score
+            combined_score = (smoke_score * 0.5) + (texture_uniformity * 0.3) + ((1.0 - edge_density) * 0.2)
             
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area > self.min_region_size:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    region = frame[y:y+h, x:x+w]
-                    
-                    if region.size > 0:
-                        # Analyze region
-                        _, smoke_score = self.analyze_color_distribution(region)
-                        edge_density, texture_uniformity = self.analyze_texture_features(region)
-                        
-                        # Combined smoke score
-                        combined_score = (smoke_score * 0.5) + (texture_uniformity * 0.3) + ((1.0 - edge_density) * 0.2)
-                        
-                        if combined_score > self.smoke_confidence_threshold:
-                            smoke_regions.append({
-                                'bbox': [x, y, x+w, y+h],
-                                'confidence': combined_score,
-                                'area': area,
-                                'texture_uniformity': texture_uniformity
-                            })
+            if combined_score > self.smoke_confidence_threshold:
+                smoke_regions.append({
+                    'bbox': [x, y, x2, y2],
+                    'confidence': combined_score,
+                    'area': float(area),
+                    'texture_uniformity': texture_uniformity
+                })
+        
+        if candidates['fire']:
+            self.cascade.record('regions', 'fire', fire_candidates, len(fire_regions))
+        if candidates['smoke']:
+            self.cascade.record('regions', 'smoke', smoke_candidates, len(smoke_regions))
         
+        # The CNN only sees regions that passed every cheaper stage
+        fire_regions = self.verify_with_cnn(frame, 'fire', fire_regions)
+        smoke_regions = self.verify_with_cnn(frame, 'smoke', smoke_regions)
         return fire_regions, smoke_regions
     
     def validate_detection_temporal(self, fire_regions, smoke_regions):
         """Validate detections using temporal analysis"""
-        # Update history
-        self.fire_history.append(len(fire_regions) > 0)
-        self.smoke_history.append(len(smoke_regions) > 0)
-        
-        # Temporal consistency check
-        if len(self.fire_history) >= 5:
-            recent_fire = list(self.fire_history)[-5:]
-            fire_consistency = sum(recent_fire) / len(recent_fire)
-            
-            # Boost confidence if consistently detected
-            for region in fire_regions:
-                if fire_consistency > 0.6:
-                    region['confidence'] = min(region['confidence'] + 0.2, 1.0)
-        
-        if len(self.smoke_history) >= 5:
-            recent_smoke = list(self.smoke_history)[-5:]
-            smoke_consistency = sum(recent_smoke) / len(recent_smoke)
+        for kind, regions in (('fire', fire_regions), ('smoke', smoke_regions)):
+            state = self.evidence.update(kind, regions, max([r['confidence'] for r in regions], default=0.0))
             
-            # Boost confidence if consistently detected
-            for region in smoke_regions:
-                if smoke_consistency > 0.6:
+            # Boost confidence while consistently detected
+            if state.active:
+                for region in regions:
                     region['confidence'] = min(region['confidence'] + 0.2, 1.0)
         
         return fire_regions, smoke_regions
@@ -249,7 +286,10 @@ class FireSmokeDetector:
             'fire_detected': len(fire_regions) > 0,
             'smoke_detected': len(smoke_regions) > 0,
             'max_fire_confidence': max([r['confidence'] for r in fire_regions], default=0.0),
-            'max_smoke_confidence': max([r['confidence'] for r in smoke_regions], default=0.0)
+            'max_smoke_confidence': max([r['confidence'] for r in smoke_regions], default=0.0),
+            'cascade': self.cascade.stats(),
+            'smoke_background': self.background.stats(),
+            'temporal': self.evidence.history()
         }
     
     def draw_detections(self, frame, results):
@@ -287,6 +327,7 @@ class FireSmokeDetector:
 # Example usage
 if __name__ == "__main__":
     # Test fire/smoke detector
+    setup_logging()
     detector = FireSmokeDetector()
     print("✅ Fire and Smoke Detection Module initialized")
     print("Features:")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Frame Pipeline
+The per-frame gating and inference chain shared by the service's camera threads
+and the camera worker processes: quality rate cap, ROI crop, motion gate,
+admission cap, model kwargs for the quality mode and admission level, tiled or
+plain inference, and the inference cost the admission controller learns from.
+"""
+
+import time
+from collections import namedtuple
+
+# results: ultralytics results in frame coordinates, None for skipped frames
+# skipped: None when the frame was inferred, else "quality", "motion" or "admission"
+# motion: None when the motion gate did not run, else whether it saw motion
+# cost: AdmissionController.record kwargs of an inferred frame, None without admission
+FrameOutcome = namedtuple("FrameOutcome", ["results", "skipped", "motion", "cost"])
+
+
+class FramePipeline:
+    """Decides whether a camera's frame is inferred and runs the model on its ROI"""
+
+    def __init__(self, model, tiler, roi, motion_gate=None, quality=None, admission=None):
+        self.model = model
+        self.tiler = tiler
+        self.roi = roi
+        self.motion_gate = motion_gate
+        self.quality = quality
+        # admission: callable returning the camera's CameraAdmission (or None) once a
+        # frame passed the quality cap and motion gate, i.e. when the camera asks to infer
+        self.admission = admission
+
+    def run(self, frame, predict_kwargs):
+        """FrameOutcome of one frame inferred with the camera's profile kwargs"""
+        if self.quality is not None and not self.quality.should_infer():
+            return FrameOutcome(None, "quality", None, None)
+
+        # Only the ROI's bounding rect is gated and inferred; detections outside the ROI are dropped
+        view, offset = self.roi.crop(frame)
+
+        # Upshifted cameras infer every frame, moving or not
+        motion = None
+        if self.motion_gate is not None and (self.quality is None or self.quality.mode != "high"):
+            motion = self.motion_gate.check(view)[0]
+            if not motion:
+                return FrameOutcome(None, "motion", motion, None)
+
+        # Shed cameras run at a capped rate, smaller input size and without tiling
+        admission = self.admission() if self.admission is not None else None
+        if admission is not None and not admission.allow():
+            return FrameOutcome(None, "admission", motion, None)
+
+        requested = predict_kwargs
+        if self.quality is not None:
+            requested = self.quality.inference_kwargs(requested)
+        kwargs, runner = requested, self.tiler
+        if admission is not None:
+            kwargs = admission.inference_kwargs(requested)
+            runner = self.tiler if admission.tiling else self.model
+
+        tiled_frames = self.tiler.tiled_frames
+        inference_start = time.perf_counter()
+        results = self.roi.restore_results(runner(view, **kwargs), frame, offset)
+        cost = None
+        if admission is not None:
+            cost = {"seconds": time.perf_counter() - inference_start,
+                    "requested_imgsz": requested.get("imgsz", 640), "imgsz": kwargs.get("imgsz"),
+                    "tiled": self.tiler.tiled_frames != tiled_frames}
+        return FrameOutcome(results, None, motion, cost)
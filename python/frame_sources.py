@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Offline Frame Sources
+Reproducible stand-ins for live cameras: recorded video files, image sequences
+and synthetic generated scenes, plus a local MJPEG server that serves any of
+them over HTTP like an IP camera. Sources expose the subset of the
+cv2.VideoCapture interface the detectors use (isOpened, read, get, set, release).
+
+Source specs (camera config "source" values):
+  file:/data/gate.mp4?loop=1&pacing=realtime&start=30
+  images:/data/frames/*.jpg?fps=10&loop=1
+  synthetic:?people=8&pacing=max
+  /data/gate.mp4                      (plain video file path)
+Pacing is "realtime" (wall-clock, drops frames for slow readers like a live
+camera) or "max" (every frame, as fast as the reader consumes them).
+"""
+
+import argparse
+import glob
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import cv2
+import numpy as np
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".m4v", ".webm", ".mpg", ".mpeg")
+PACING_MODES = ("realtime", "max")
+
+
+class FrameSource:
+    """Base class adding looping, pacing and seeking to a frame reader"""
+
+    def __init__(self, fps=30.0, pacing="realtime", loop=False):
+        if pacing not in PACING_MODES:
+            raise ValueError(f"Unknown pacing mode '{pacing}', use one of {PACING_MODES}")
+        self.fps = fps or 30.0
+        self.pacing = pacing
+        self.loop = loop
+        self.position = 0  # index of the next frame to return
+        self._clock_start = None
+        self._clock_position = 0
+
+    # Subclasses implement these
+    def _read_frame(self):
+        raise NotImplementedError
+
+    def _seek_frame(self, index):
+        raise NotImplementedError
+
+    def frame_count(self):
+        return 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.pacing == "realtime":
+            self._wait_for_due_frame()
+
+        ret, frame = self._read_frame()
+        if not ret and self.loop and self.position > 0:
+            self.seek_frame(0)
+            ret, frame = self._read_frame()
+        if ret:
+            self.position += 1
+        return ret, frame
+
+    def _wait_for_due_frame(self):
+        """Sleep until the next frame is due; skip frames the reader missed"""
+        now = time.monotonic()
+        if self._clock_start is None:
+            self._clock_start = now
+            self._clock_position = self.position
+            return
+
+        due_index = self._clock_position + int((now - self._clock_start) * self.fps)
+        if due_index < self.position:
+            due_time = self._clock_start + (self.position - self._clock_position) / self.fps
+            time.sleep(max(0.0, due_time - now))
+        elif due_index > self.position:
+            count = self.frame_count()
+            if count and due_index >= count:
+                # Past the end: wrap around (restarting the clock) or stop at EOF
+                self.seek_frame(due_index % count if self.loop else count, reset_clock=self.loop)
+            else:
+                self.seek_frame(due_index, reset_clock=False)
+
+    def seek_frame(self, index, reset_clock=True):
+        """Jump to a frame index"""
+        self._seek_frame(index)
+        self.position = index
+        if reset_clock:
+            self._clock_start = None
+
+    def seek(self, seconds):
+        """Jump to a position in seconds"""
+        self.seek_frame(int(round(seconds * self.fps)))
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count())
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return 1000.0 * self.position / self.fps
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.seek_frame(int(value))
+            return True
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            self.seek(value / 1000.0)
+            return True
+        return False
+
+    def release(self):
+        pass
+
+
+class SyntheticFrameSource(FrameSource):
+    """Deterministic generated scene with moving people, flickering fire and smoke"""
+
+    def __init__(self, width=640, height=480, people=6, fire=True, smoke=True,
+                 frame_count=None, seed=0, fps=30.0, pacing="max", loop=False):
+        super().__init__(fps, pacing, loop)
+        self.width = width
+        self.height = height
+        self.fire = fire
+        self.smoke = smoke
+        self.total_frames = frame_count  # None means endless
+        self.rng = np.random.default_rng(seed)
+
+        # Background: gradient with a bit of texture so edges and flow are non-trivial
+        gradient = np.linspace(60, 140, width, dtype=np.uint8)
+        self.background = np.dstack([np.tile(gradient, (height, 1))] * 3)
+        noise = self.rng.integers(0, 20, (height, width, 1), dtype=np.uint8)
+        self.background = cv2.add(self.background, np.repeat(noise, 3, axis=2))
+
+        self.people = [
+            {
+                "x": float(self.rng.uniform(0, width - 40)),
+                "y": float(self.rng.uniform(height * 0.3, height - 110)),
+                "vx": float(self.rng.uniform(-4, 4)),
+                "vy": float(self.rng.uniform(-1, 1)),
+                "lying": i % 5 == 4
+            }
+            for i in range(people)
+        ]
+        self.flicker = self.rng.integers(-12, 12, 997)
+
+    def frame_count(self):
+        return self.total_frames or 0
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        return super().get(prop)
+
+    def _seek_frame(self, index):
+        pass  # frames are a pure function of the index
+
+    def _read_frame(self):
+        if self.total_frames is not None and self.position >= self.total_frames:
+            return False, None
+        return True, self.render(self.position)
+
+    def render(self, index):
+        """Draw frame number index"""
+        frame = self.background.copy()
+        span_x = self.width - 40
+        span_y = self.height - 110
+
+        for person in self.people:
+            x = int((person["x"] + person["vx"] * index) % span_x)
+            # Bounce vertically between the top third and the bottom edge
+            y = (person["y"] + person["vy"] * index) % (2 * span_y)
+            y = int(2 * span_y - y if y > span_y else y)
+            if person["lying"]:
+                cv2.rectangle(frame, (x, y + 70), (x + 100, y + 105), (40, 40, 90), -1)
+            else:
+                cv2.circle(frame, (x + 20, y + 12), 12, (150, 170, 200), -1)
+                cv2.rectangle(frame, (x + 5, y + 25), (x + 35, y + 105), (90, 40, 40), -1)
+
+        if self.smoke:
+            radius = 60 + int(10 * np.sin(index / 15.0))
+            overlay = frame.copy()
+            cv2.circle(overlay, (self.width // 4, self.height // 4), radius, (170, 170, 170), -1)
+            frame = cv2.addWeighted(overlay, 0.5, frame, 0.5, 0)
+
+        if self.fire:
+            flicker = int(self.flicker[index % len(self.flicker)])
+            center = (3 * self.width // 4, self.height - 80)
+            cv2.ellipse(frame, center, (35, 55 + flicker), 0, 0, 360, (0, 90, 255), -1)
+            cv2.ellipse(frame, (center[0], center[1] + 10), (18, 30 + flicker // 2), 0, 0, 360,
+                        (80, 220, 255), -1)
+
+        return frame
+
+
+class VideoFileSource(FrameSource):
+    """Recorded video file"""
+
+    def __init__(self, path, pacing="realtime", loop=False, start=0.0):
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        super().__init__(self.capture.get(cv2.CAP_PROP_FPS), pacing, loop)
+        if start:
+            self.seek(start)
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def frame_count(self):
+        return int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def get(self, prop):
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            return self.capture.get(prop)
+        return super().get(prop)
+
+    def _seek_frame(self, index):
+        # Skipping a few frames forward is cheaper with grab() than a keyframe seek
+        skip = index - self.position
+        if 0 < skip <= 8:
+            for _ in range(skip):
+                self.capture.grab()
+        elif skip != 0:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+    def _read_frame(self):
+        return self.capture.read()
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageSequenceSource(FrameSource):
+    """Ordered image files (directory or glob pattern) played as a video"""
+
+    def __init__(self, pattern, fps=30.0, pacing="realtime", loop=False, start=0.0):
+        super().__init__(fps, pacing, loop)
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        self.files = sorted(f for f in glob.glob(pattern)
+                            if f.lower().endswith((".jpg", ".jpeg", ".png", ".bmp")))
+        if start:
+            self.seek(start)
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def frame_count(self):
+        return len(self.files)
+
+    def _seek_frame(self, index):
+        pass  # position is the file index
+
+    def _read_frame(self):
+        if self.position >= len(self.files):
+            return False, None
+        frame = cv2.imread(self.files[self.position])
+        return frame is not None, frame
+
+
+def parse_source_spec(spec):
+    """Return (kind, path, options) for an offline source spec, or None"""
+    if isinstance(spec, dict):
+        options = {k: v for k, v in spec.items() if k not in ("type", "path")}
+        return spec.get("type", "file"), spec.get("path"), options
+    if not isinstance(spec, str):
+        return None
+
+    if spec.startswith(("file:", "images:", "synthetic")):
+        parsed = urlparse(spec)
+        options = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        path = parsed.netloc + parsed.path if parsed.netloc else parsed.path
+        if parsed.scheme in ("synthetic", "") and spec.startswith("synthetic"):
+            if path.isdigit():
+                options.setdefault("people", path)
+            return "synthetic", None, options
+        return parsed.scheme, path, options
+
+    if spec.lower().endswith(VIDEO_EXTENSIONS) and os.path.exists(spec):
+        return "file", spec, {}
+    return None
+
+
+def _flag(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def open_frame_source(spec, pacing=None, loop=None, width=640, height=480):
+    """Open an offline source from a spec, or None for devices and network URLs"""
+    parsed = parse_source_spec(spec)
+    if parsed is None:
+        return None
+
+    kind, path, options = parsed
+    loop = _flag(options.get("loop", False)) if loop is None else loop
+    start = float(options.get("start", 0.0))
+
+    if kind == "synthetic":
+        return SyntheticFrameSource(int(options.get("width", width)), int(options.get("height", height)),
+                                    people=int(options.get("people", 6)),
+                                    seed=int(options.get("seed", 0)),
+                                    fps=float(options.get("fps", 30.0)),
+                                    pacing=pacing or options.get("pacing", "max"), loop=loop)
+    if kind == "images":
+        return ImageSequenceSource(path, fps=float(options.get("fps", 30.0)),
+                                   pacing=pacing or options.get("pacing", "realtime"), loop=loop, start=start)
+    if kind == "file":
+        return VideoFileSource(path, pacing=pacing or options.get("pacing", "realtime"), loop=loop, start=start)
+    raise ValueError(f"Unknown frame source type '{kind}'")
+
+
+def open_capture(source, backend=None):
+    """Open an offline frame source, falling back to cv2.VideoCapture"""
+    frame_source = open_frame_source(source)
+    if frame_source is not None:
+        return frame_source
+    return cv2.VideoCapture(source, backend) if backend is not None else cv2.VideoCapture(source)
+
+
+class MJPEGStandInServer:
+    """Serves an offline source over HTTP as an MJPEG stream, like an IP camera
+
+    Every client gets its own independently paced copy of the source, so N
+    service cameras pointed at the same URL behave like N separate cameras.
+    GET /video (any path) streams MJPEG, GET /shot.jpg returns a single frame.
+    For load tests run it in its own process (python frame_sources.py ...) so
+    decoding and encoding frames does not compete with the service for the GIL.
+    """
+
+    def __init__(self, spec, host="127.0.0.1", port=8090, jpeg_quality=80):
+        self.spec = spec
+        self.jpeg_quality = jpeg_quality
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.handle_client(self)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/video"
+
+    def handle_client(self, handler):
+        source = open_frame_source(self.spec, pacing="realtime", loop=True)
+        if source is None or not source.isOpened():
+            handler.send_error(404, "Source not available")
+            return
+
+        try:
+            if handler.path.startswith("/shot.jpg"):
+                ret, frame = source.read()
+                ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                handler.send_response(200)
+                handler.send_header("Content-Type", "image/jpeg")
+                handler.send_header("Content-Length", str(len(buffer)))
+                handler.end_headers()
+                handler.wfile.write(buffer.tobytes())
+                return
+
+            handler.send_response(200)
+            handler.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+            handler.end_headers()
+            while True:
+                ret, frame = source.read()
+                if not ret:
+                    break
+                ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                handler.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n"
+                                    + f"Content-Length: {len(buffer)}\r\n\r\n".encode()
+                                    + buffer.tobytes() + b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            source.release()
+
+    def start(self):
+        """Serve on a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an offline frame source as an MJPEG IP camera")
+    parser.add_argument("source", help="Source spec, e.g. file:/data/gate.mp4 or synthetic:?people=8")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality")
+    args = parser.parse_args()
+
+    server = MJPEGStandInServer(args.source, args.host, args.port, args.quality)
+    print(f"📹 Serving {args.source} at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Multi-Modal Fusion Engine
+Every modality (YOLO, pose, fire/smoke, crowd, audio) is encoded as a
+fixed-width evidence vector with one score per event type. Fusion is a single
+weighted matrix product over the modality axis, followed by per-event
+thresholds; stacking the evidence of many cameras fuses them all at once.
+
+    evidence (cameras, modalities, events) -> weights @ evidence -> scores (cameras, events)
+"""
+
+import numpy as np
+from enhanced_detection_config import FUSION_WEIGHTS, DETECTION_THRESHOLDS
+
+MODALITIES = ("yolo", "pose", "fire_smoke", "crowd", "audio")
+EVENTS = ("stampede", "medical_emergency", "fire", "smoke", "fallen", "running")
+
+# DETECTION_THRESHOLDS key of each event's fused score threshold
+THRESHOLD_KEYS = {
+    "stampede": "fusion_stampede",
+    "medical_emergency": "fusion_medical",
+    "fire": "fusion_fire",
+    "smoke": "fusion_smoke",
+    "fallen": "fusion_fallen",
+    "running": "fusion_running"
+}
+
+_M = {modality: index for index, modality in enumerate(MODALITIES)}
+_E = {event: index for index, event in enumerate(EVENTS)}
+
+
+class FusionEngine:
+    """Weighted evidence fusion with per-event thresholds"""
+
+    def __init__(self, weights=None, thresholds=None, stampede_person_count=15, fallen_aspect_ratio=1.3,
+                 running_motion=1.5):
+        weights = dict(FUSION_WEIGHTS, **(weights or {}))
+        thresholds = dict(DETECTION_THRESHOLDS, **(thresholds or {}))
+        self.weights = np.array([weights[modality] for modality in MODALITIES], dtype=np.float64)
+        self.thresholds = np.array([thresholds[THRESHOLD_KEYS[event]] for event in EVENTS], dtype=np.float64)
+        # Encoder thresholds: YOLO person count and box shape, crowd motion level
+        self.stampede_person_count = stampede_person_count
+        self.fallen_aspect_ratio = fallen_aspect_ratio
+        self.running_motion = running_motion
+
+    @classmethod
+    def from_settings(cls, weights=None, thresholds=None):
+        """Build from FUSION_WEIGHTS and DETECTION_THRESHOLDS"""
+        merged = dict(DETECTION_THRESHOLDS, **(thresholds or {}))
+        return cls(weights, merged, stampede_person_count=merged["stampede_person_count"],
+                   fallen_aspect_ratio=merged["fallen_aspect_ratio"])
+
+    def evidence(self, person_bboxes=None, pose_results=None, fire_smoke_results=None,
+                 crowd_results=None, audio_results=None, out=None):
+        """(modalities, events) evidence matrix of one camera's detector results
+
+        out is an optional (modalities, events) view to fill, e.g. one camera of a batch.
+        """
+        evidence = np.zeros((len(MODALITIES), len(EVENTS))) if out is None else out
+        if out is not None:
+            evidence[:] = 0.0
+
+        # YOLO: crowd size and lying (wide) person boxes
+        if person_bboxes:
+            person_count = len(person_bboxes)
+            if person_count > self.stampede_person_count:
+                evidence[_M["yolo"], _E["stampede"]] = min(person_count / 30.0, 1.0)
+            # A handful of boxes per frame: a plain loop beats building an array from them
+            fallen_count, ratio = 0, self.fallen_aspect_ratio
+            for person in person_bboxes:
+                x1, y1, x2, y2 = person['bbox'][:4]
+                height = y2 - y1
+                if height > 0 and x2 - x1 > ratio * height:
+                    fallen_count += 1
+            if fallen_count:
+                evidence[_M["yolo"], _E["fallen"]] = min(fallen_count / 3.0, 1.0)
+
+        # Pose: per-person emergency and fall confidences add up
+        for pose_result in pose_results or []:
+            if pose_result.get('emergency_detected', False):
+                evidence[_M["pose"], _E["medical_emergency"]] += pose_result.get('confidence', 0)
+            if pose_result.get('fallen_detected', False):
+                evidence[_M["pose"], _E["fallen"]] += pose_result.get('confidence', 0)
+
+        if fire_smoke_results:
+            if fire_smoke_results.get('fire_detected', False):
+                evidence[_M["fire_smoke"], _E["fire"]] = fire_smoke_results.get('max_fire_confidence', 0)
+            if fire_smoke_results.get('smoke_detected', False):
+                evidence[_M["fire_smoke"], _E["smoke"]] = fire_smoke_results.get('max_smoke_confidence', 0)
+
+        if crowd_results:
+            if crowd_results.get('stampede_detected', False):
+                evidence[_M["crowd"], _E["stampede"]] = crowd_results.get('stampede_confidence', 0)
+            motion_level = crowd_results.get('motion_level', 0)
+            if motion_level > self.running_motion:
+                evidence[_M["crowd"], _E["running"]] = min(motion_level / 3.0, 1.0)
+
+        # Audio: panic sounds back stampedes, distress calls medical emergencies
+        if audio_results:
+            for kind, event in (('panic', 'stampede'), ('distress', 'medical_emergency'), ('fire', 'fire')):
+                if audio_results.get(kind, {}).get('detected', False):
+                    evidence[_M["audio"], _E[event]] = audio_results[kind]['confidence']
+        return evidence
+
+    def fuse(self, evidence):
+        """(scores, detected) for (modalities, events) or (cameras, modalities, events) evidence"""
+        scores = self.weights @ evidence
+        return np.minimum(scores, 1.0), scores > self.thresholds
+
+    def results(self, evidence):
+        """{event: {"detected", "confidence"}} per camera (a list for batched evidence)"""
+        confidences, detected = self.fuse(evidence)
+        if confidences.ndim == 1:
+            return self._as_dict(confidences, detected)
+        return [self._as_dict(row, hits) for row, hits in zip(confidences, detected)]
+
+    @staticmethod
+    def _as_dict(confidences, detected):
+        return {event: {'detected': bool(hit), 'confidence': float(confidence)}
+                for event, confidence, hit in zip(EVENTS, confidences.tolist(), detected.tolist())}
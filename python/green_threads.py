@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Green Thread Patching
+Monkey patching for serving on eventlet or gevent. This module only imports os,
+so it can run before anything that creates locks, threads or sockets (logging,
+cv2, pymongo, Flask, async_server) and every lock ends up green.
+"""
+
+import os
+
+
+def monkey_patch(async_mode=None):
+    """Patch the standard library for green threads; call before any other import
+
+    async_mode defaults to VIDEO_SERVICE_ASYNC_MODE; returns the mode used.
+    """
+    async_mode = async_mode or os.getenv("VIDEO_SERVICE_ASYNC_MODE", "threading")
+    if async_mode == "eventlet":
+        import eventlet
+        eventlet.monkey_patch()
+    elif async_mode == "gevent":
+        from gevent import monkey
+        monkey.patch_all()
+    return async_mode
@@ -11,9 +11,12 @@ import datetime
 from typing import Dict, List, Any
 import os
 from dotenv import load_dotenv
+from logging_setup import get_logger
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 class IncidentService:
     def __init__(self):
         self.backend_url = os.getenv('BACKEND_URL', 'http://localhost:5000/api')
@@ -79,7 +82,7 @@ class IncidentService:
             )
             
             if response.status_code == 201:
-                print(f"Incident created successfully: {incident_type} in {camera_info.get('zone')}")
+                logger.info(f"Incident created successfully: {incident_type} in {camera_info.get('zone')}")
                 
                 # Update recent incidents tracker
                 incident_key = f"{camera_info.get('id')}_{detection_data.get('label', incident_type)}"
@@ -87,11 +90,11 @@ class IncidentService:
                 
                 return True
             else:
-                print(f"Failed to create incident: {response.status_code} - {response.text}")
+                logger.warning(f"Failed to create incident: {response.status_code} - {response.text}")
                 return False
                 
         except Exception as e:
-            print(f"Error creating incident: {e}")
+            logger.error(f"Error creating incident: {e}")
             return False
             
     def map_detection_to_incident_type(self, detection_data: Dict[str, Any]) -> str:
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Inference Profiles
+Per-camera YOLO inference settings: input size, the class subset handed to the
+model (so NMS and post-processing only see the classes a camera cares about)
+and confidence/IoU thresholds. A camera config selects a named profile from
+INFERENCE_PROFILES and may override any of its fields.
+"""
+
+from detection_config import INFERENCE_PROFILES
+from logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_FIELDS = ("imgsz", "classes", "conf", "iou")
+IMGSZ_STRIDE = 32
+
+
+def resolve_classes(classes, model_names):
+    """Profile class spec -> sorted model class ids, None for all classes"""
+    if classes is None or classes == "all":
+        return None
+    if isinstance(classes, (str, int)):
+        classes = [classes]
+
+    ids_by_name = {str(name).lower(): class_id for class_id, name in (model_names or {}).items()}
+    class_ids = set()
+    for item in classes:
+        if isinstance(item, str) and not item.isdigit():
+            if item.lower() not in ids_by_name:
+                raise ValueError(f"Unknown class '{item}'")
+            class_ids.add(ids_by_name[item.lower()])
+            continue
+        class_id = int(item)
+        if model_names and class_id not in model_names:
+            raise ValueError(f"Unknown class id {class_id}")
+        class_ids.add(class_id)
+    if not class_ids:
+        raise ValueError("classes must not be empty, use \"all\" for every class")
+    return sorted(class_ids)
+
+
+def _threshold(profile, key):
+    try:
+        value = float(profile[key])
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number")
+    if not 0.0 <= value <= 1.0:
+        raise ValueError(f"{key} must be between 0 and 1")
+    return value
+
+
+def build_profile(spec=None, model_names=None, fixed_imgsz=None):
+    """Validated profile from a camera's "inference" spec, raises ValueError on bad input
+
+    fixed_imgsz is the input size of a static-shape exported model; an imgsz
+    override that differs from it is ignored with a warning.
+    """
+    spec = dict(spec or {})
+    name = spec.pop("profile", None) or "default"
+    if name not in INFERENCE_PROFILES:
+        raise ValueError(f"Unknown inference profile '{name}' (known: {', '.join(INFERENCE_PROFILES)})")
+    unknown = set(spec) - set(PROFILE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown inference fields: {', '.join(sorted(unknown))}")
+
+    profile = dict(INFERENCE_PROFILES["default"])
+    profile.update(INFERENCE_PROFILES[name])
+    profile.update(spec)
+
+    try:
+        imgsz = int(profile["imgsz"])
+    except (TypeError, ValueError):
+        raise ValueError("imgsz must be an integer")
+    if imgsz < IMGSZ_STRIDE:
+        raise ValueError(f"imgsz must be at least {IMGSZ_STRIDE}")
+    imgsz = -(-imgsz // IMGSZ_STRIDE) * IMGSZ_STRIDE
+    if fixed_imgsz and imgsz != fixed_imgsz:
+        logger.warning(f"⚠️ Exported model runs at {fixed_imgsz}px, ignoring imgsz {imgsz} "
+                       f"(export another size with model_runtime.py)")
+        imgsz = fixed_imgsz
+
+    return {
+        "profile": name,
+        "imgsz": imgsz,
+        "classes": profile["classes"],
+        "class_ids": resolve_classes(profile["classes"], model_names),
+        "conf": _threshold(profile, "conf"),
+        "iou": _threshold(profile, "iou")
+    }
+
+
+def profile_for_model(model, spec=None):
+    """build_profile with the model's class names and fixed input size"""
+    return build_profile(spec, getattr(model, "names", None), getattr(model, "runtime_imgsz", None))
+
+
+def predict_kwargs(profile):
+    """Keyword arguments for model(frame, **kwargs)"""
+    return {
+        "imgsz": profile["imgsz"],
+        "classes": profile["class_ids"],
+        "conf": profile["conf"],
+        "iou": profile["iou"],
+        "verbose": False
+    }
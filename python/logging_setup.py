@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Logging Setup
+Shared logging for the detection services: per-module levels, a non-blocking
+handler that hands records to a background writer (console and rotating file),
+and throttled logging for per-frame code paths. A camera thread never waits on
+stdout or disk; if the writer falls behind, the oldest records are dropped.
+Importing a module never configures logging: entry points (main functions,
+__main__ blocks, worker processes) call setup_logging() first.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from detection_config import SERVICE_LOG_SETTINGS
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s [%(threadName)s] %(message)s"
+
+_setup_lock = threading.Lock()
+_async_handler = None
+
+
+def parse_module_levels(spec):
+    """"camera_workers=DEBUG,werkzeug=WARNING" -> {"camera_workers": "DEBUG", ...}"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def load_settings():
+    """SERVICE_LOG_SETTINGS with LOG_LEVEL, LOG_FILE and LOG_MODULE_LEVELS overrides"""
+    settings = dict(SERVICE_LOG_SETTINGS)
+    settings["level"] = os.getenv("LOG_LEVEL", settings["level"]).upper()
+    settings["file"] = os.getenv("LOG_FILE", settings["file"])
+    settings["module_levels"] = dict(settings["module_levels"],
+                                     **parse_module_levels(os.getenv("LOG_MODULE_LEVELS", "")))
+    return settings
+
+
+class AsyncLogHandler(logging.Handler):
+    """Queues records for a background writer thread; emit never blocks"""
+
+    def __init__(self, handlers, maxlen=10000, flush_interval=0.05):
+        super().__init__()
+        self.targets = handlers
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._records = deque(maxlen=maxlen)
+        self._write_lock = threading.Lock()
+
+    def emit(self, record):
+        # Render now: args may reference per-frame state that changes before the write
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._records) == self._records.maxlen:
+            self.dropped += 1
+        self._records.append(record)
+
+    def drain(self):
+        """Write all queued records to the target handlers"""
+        with self._write_lock:
+            wrote = False
+            while self._records:
+                record = self._records.popleft()
+                for handler in self.targets:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+                wrote = True
+            if wrote:
+                for handler in self.targets:
+                    handler.flush()
+
+    def run(self):
+        while True:
+            try:
+                self.drain()
+            except Exception:
+                pass
+            time.sleep(self.flush_interval)
+
+    def start(self):
+        from async_server import start_native_thread
+        start_native_thread(self.run)
+        atexit.register(self.drain)
+
+
+def setup_logging(settings=None):
+    """Configure the root logger once; later calls return the existing handler"""
+    global _async_handler
+    with _setup_lock:
+        if _async_handler is not None:
+            return _async_handler
+
+        settings = settings or load_settings()
+        formatter = logging.Formatter(LOG_FORMAT)
+        targets = []
+        if settings["console"]:
+            targets.append(logging.StreamHandler(sys.stdout))
+        # Worker processes log to the console only so they never rotate the parent's file
+        if settings["file"] and multiprocessing.parent_process() is None:
+            targets.append(logging.handlers.RotatingFileHandler(
+                settings["file"],
+                maxBytes=int(settings["max_file_size_mb"] * 1024 * 1024),
+                backupCount=settings["backup_count"],
+                encoding="utf-8"
+            ))
+        for handler in targets:
+            handler.setFormatter(formatter)
+
+        _async_handler = AsyncLogHandler(targets, settings["queue_size"], settings["flush_interval"])
+        root = logging.getLogger()
+        root.addHandler(_async_handler)
+        root.setLevel(settings["level"])
+        for name, level in settings["module_levels"].items():
+            logging.getLogger(name).setLevel(level)
+        _async_handler.start()
+        return _async_handler
+
+
+def get_logger(name):
+    """Module logger; scripts run directly are named after their file, not __main__"""
+    if name == "__main__":
+        name = os.path.splitext(os.path.basename(sys.argv[0]))[0] or name
+    return logging.getLogger(name)
+
+
+def dropped_records():
+    """Records discarded because the writer fell behind"""
+    return _async_handler.dropped if _async_handler is not None else 0
+
+
+class LogThrottle:
+    """Lets a repeating log line through at most once per interval for each key"""
+
+    def __init__(self, interval=None):
+        self.interval = SERVICE_LOG_SETTINGS["throttle_interval"] if interval is None else interval
+        self._last = {}
+        self._suppressed = {}
+
+    def allow(self, key):
+        """0 while throttled, otherwise the number of calls since the last allowed one"""
+        now = time.monotonic()
+        if now - self._last.get(key, float("-inf")) < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return 0
+        self._last[key] = now
+        return self._suppressed.pop(key, 0) + 1
+
+    def log(self, logger, level, key, msg, *args):
+        """Log at most once per interval for key; cheap no-op when level is disabled"""
+        if not logger.isEnabledFor(level):
+            return
+        calls = self.allow(key)
+        if calls > 1:
+            logger.log(level, msg + " (+%d more since last report)", *args, calls - 1)
+        elif calls:
+            logger.log(level, msg, *args)
+
+    def debug(self, logger, key, msg, *args):
+        self.log(logger, logging.DEBUG, key, msg, *args)
+
+    def info(self, logger, key, msg, *args):
+        self.log(logger, logging.INFO, key, msg, *args)
+
+    def warning(self, logger, key, msg, *args):
+        self.log(logger, logging.WARNING, key, msg, *args)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+YOLO Model Runtime
+Loads the configured YOLO model on the fastest available CPU backend. The
+PyTorch weights can be exported once to ONNX (ONNX Runtime) or OpenVINO IR,
+optionally quantized to INT8 with a local calibration set; exported models are
+loaded through ultralytics, so callers keep the same results API.
+
+    python model_runtime.py export --backend openvino --int8 --calibration calibration_frames/
+    python model_runtime.py info
+"""
+
+import argparse
+import glob
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+import cv2
+import numpy as np
+from ultralytics import YOLO
+from detection_config import MODEL_SETTINGS
+from logging_setup import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+CPU_BACKENDS = ["openvino", "onnx"]
+BACKEND_MODULES = {"pytorch": "torch", "onnx": "onnxruntime", "openvino": "openvino"}
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def load_settings(**overrides):
+    """MODEL_SETTINGS with YOLO_MODEL_PATH, MODEL_BACKEND and MODEL_PRECISION overrides"""
+    settings = dict(MODEL_SETTINGS)
+    settings["weights"] = os.getenv("YOLO_MODEL_PATH", settings["weights"])
+    settings["backend"] = os.getenv("MODEL_BACKEND", settings["backend"])
+    settings["precision"] = os.getenv("MODEL_PRECISION", settings["precision"])
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    return settings
+
+
+def backend_available(backend):
+    return importlib.util.find_spec(BACKEND_MODULES[backend]) is not None
+
+
+def gpu_available():
+    if not backend_available("pytorch"):
+        return False
+    import torch
+    return torch.cuda.is_available()
+
+
+def exported_model_path(weights, backend, precision, imgsz, export_dir):
+    """Where an exported model lives, e.g. models/yolov8n_640_int8_openvino_model"""
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    if backend == "onnx":
+        return os.path.join(export_dir, f"{stem}_{imgsz}_{precision}.onnx")
+    # ultralytics recognises OpenVINO models by the _openvino_model directory suffix
+    return os.path.join(export_dir, f"{stem}_{imgsz}_{precision}_openvino_model")
+
+
+def letterbox(image, size):
+    """Resize keeping aspect ratio and pad to size x size with gray, as YOLO does"""
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    resized = cv2.resize(image, (int(round(width * scale)), int(round(height * scale))),
+                         interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top = (size - resized.shape[0]) // 2
+    left = (size - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    return canvas
+
+
+def calibration_images(directory, limit):
+    paths = sorted(path for path in glob.glob(os.path.join(directory, "**", "*"), recursive=True)
+                   if path.lower().endswith(IMAGE_EXTENSIONS))
+    if not paths:
+        raise ValueError(f"No calibration images found in {directory}")
+    if len(paths) > limit:
+        paths = [paths[int(i)] for i in np.linspace(0, len(paths) - 1, limit)]
+    return paths
+
+
+class OnnxCalibrationReader:
+    """onnxruntime CalibrationDataReader over letterboxed calibration images"""
+
+    def __init__(self, input_name, paths, imgsz):
+        self.input_name = input_name
+        self.paths = iter(paths)
+        self.imgsz = imgsz
+
+    def get_next(self):
+        for path in self.paths:
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            tensor = cv2.cvtColor(letterbox(image, self.imgsz), cv2.COLOR_BGR2RGB)
+            tensor = np.ascontiguousarray(tensor.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+            return {self.input_name: tensor}
+        return None
+
+    def rewind(self):
+        pass
+
+
+def _quantize_onnx(fp32_path, int8_path, calibration, imgsz, limit):
+    import onnxruntime
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    input_name = onnxruntime.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    reader = OnnxCalibrationReader(input_name, calibration_images(calibration, limit), imgsz)
+    quantize_static(fp32_path, int8_path, reader, quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                    calibrate_method=CalibrationMethod.MinMax, per_channel=True)
+
+
+def _calibration_dataset_yaml(calibration, names, work_dir):
+    """Minimal ultralytics dataset file so OpenVINO/NNCF can calibrate on unlabeled frames"""
+    path = os.path.join(work_dir, "calibration.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"path: {os.path.abspath(calibration)}\ntrain: .\nval: .\nnames:\n")
+        for index in sorted(names):
+            f.write(f"  {index}: {names[index]}\n")
+    return path
+
+
+def export_model(settings=None, backend="openvino", int8=False, calibration=None):
+    """Export the PyTorch weights for a CPU backend, returns the exported model path"""
+    settings = settings or load_settings()
+    precision = "int8" if int8 else "fp32"
+    imgsz = settings["imgsz"]
+    target = exported_model_path(settings["weights"], backend, precision, imgsz, settings["export_dir"])
+    calibration = calibration or settings["calibration_data"]
+    if int8 and not calibration:
+        raise ValueError("INT8 export needs a calibration image directory")
+    os.makedirs(settings["export_dir"], exist_ok=True)
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # ultralytics writes exports next to the weights; export a copy so the source tree stays clean
+        weights_path = getattr(YOLO(settings["weights"]), "ckpt_path", None) or settings["weights"]
+        weights_copy = os.path.join(work_dir, os.path.basename(weights_path))
+        shutil.copy(weights_path, weights_copy)
+        model = YOLO(weights_copy)
+
+        if backend == "onnx":
+            exported = model.export(format="onnx", imgsz=imgsz, simplify=True, dynamic=False)
+            if int8:
+                _quantize_onnx(exported, target, calibration, imgsz, settings["calibration_images"])
+            else:
+                shutil.move(exported, target)
+        elif backend == "openvino":
+            options = {"format": "openvino", "imgsz": imgsz}
+            if int8:
+                options.update(int8=True, data=_calibration_dataset_yaml(calibration, model.names, work_dir),
+                               fraction=1.0)
+            exported = model.export(**options)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            shutil.move(exported, target)
+        else:
+            raise ValueError(f"Unknown export backend {backend}")
+
+    logger.info(f"📦 Exported {settings['weights']} to {target} in {time.perf_counter() - started:.1f}s")
+    return target
+
+
+def candidate_backends(settings):
+    """Backends to try in order for the configured backend and device"""
+    if settings["backend"] != "auto":
+        return [settings["backend"]]
+    if settings["enable_gpu"] and gpu_available():
+        return ["pytorch"]
+    return CPU_BACKENDS + ["pytorch"]
+
+
+def exported_backend(path):
+    """Backend of an already exported model path, None for PyTorch weights"""
+    if path.endswith(".onnx"):
+        return "onnx"
+    if path.rstrip("/\\").endswith("_openvino_model"):
+        return "openvino"
+    return None
+
+
+def _load_exported(backend, path, imgsz):
+    model = YOLO(path, task="detect")
+    # Warm up once so the first camera frame doesn't pay for graph compilation
+    model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), verbose=False)
+    model.runtime_backend, model.runtime_path = backend, path
+    # Exports are static-shape and only run at their export size: inference profiles,
+    # quality low mode, admission shedding and tiling all keep runtime_imgsz when it is set
+    model.runtime_imgsz = imgsz
+    return model
+
+
+def load_detection_model(weights=None, backend=None, precision=None, enable_gpu=None):
+    """YOLO model on the first backend that has an export and loads; falls back to PyTorch
+
+    weights may also point at an exported .onnx file or _openvino_model directory.
+    The returned model has runtime_backend and runtime_path attributes for logging,
+    and runtime_imgsz, the fixed input size of exported models (None for PyTorch).
+    """
+    settings = load_settings(weights=weights, backend=backend, precision=precision, enable_gpu=enable_gpu)
+    if exported_backend(settings["weights"]):
+        model = _load_exported(exported_backend(settings["weights"]), settings["weights"], settings["imgsz"])
+        logger.info(f"🧠 YOLO runtime: {model.runtime_backend} from {settings['weights']}")
+        return model
+
+    for name in candidate_backends(settings):
+        if name == "pytorch":
+            break
+        if not backend_available(name):
+            continue
+        path = exported_model_path(settings["weights"], name, settings["precision"],
+                                   settings["imgsz"], settings["export_dir"])
+        try:
+            if not os.path.exists(path):
+                if not settings["auto_export"]:
+                    continue
+                path = export_model(settings, name, int8=settings["precision"] == "int8")
+            model = _load_exported(name, path, settings["imgsz"])
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load {name} model {path}: {e}")
+            continue
+        logger.info(f"🧠 YOLO runtime: {name} ({settings['precision']}) from {path}")
+        return model
+
+    model = YOLO(settings["weights"])
+    model.runtime_backend, model.runtime_path = "pytorch", settings["weights"]
+    model.runtime_imgsz = None
+    logger.info(f"🧠 YOLO runtime: pytorch from {settings['weights']}")
+    return model
+
+
+def main():
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Export and inspect YOLO runtime backends")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Export the configured weights for a CPU backend")
+    export_parser.add_argument("--backend", choices=CPU_BACKENDS, default="openvino")
+    export_parser.add_argument("--weights", help="PyTorch weights (default: MODEL_SETTINGS / YOLO_MODEL_PATH)")
+    export_parser.add_argument("--imgsz", type=int)
+    export_parser.add_argument("--int8", action="store_true", help="Quantize to INT8 with --calibration images")
+    export_parser.add_argument("--calibration", help="Directory of representative camera frames")
+    commands.add_parser("info", help="Show available backends and exported models")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        settings = load_settings(weights=args.weights, imgsz=args.imgsz)
+        export_model(settings, args.backend, args.int8, args.calibration)
+        return
+
+    settings = load_settings()
+    print(f"Weights: {settings['weights']}  image size: {settings['imgsz']}  "
+          f"backend: {settings['backend']}  precision: {settings['precision']}")
+    for name in ["pytorch"] + CPU_BACKENDS:
+        line = f"  {name:9s} {'installed' if backend_available(name) else 'not installed'}"
+        if name != "pytorch":
+            for precision in ["fp32", "int8"]:
+                path = exported_model_path(settings["weights"], name, precision, settings["imgsz"],
+                                           settings["export_dir"])
+                line += f"  {precision}: {path if os.path.exists(path) else '-'}"
+        print(line)
+    print(f"Auto order: {', '.join(candidate_backends(settings))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Motion Gate
+Cheap per-camera change detector that decides whether a frame needs a YOLO
+pass. Frames are downscaled to a small blurred grayscale image and compared with
+the image from the last inference; while nothing changes the caller reuses the
+last detections. A periodic refresh still runs inference on static scenes, and
+once motion appears every frame is inferred for a short hold period.
+"""
+
+import time
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides per frame whether a camera needs a fresh inference"""
+
+    def __init__(self, width=160, pixel_threshold=25, min_changed_fraction=0.002,
+                 refresh_interval=2.0, hold_seconds=1.0, blur=5):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.refresh_interval = refresh_interval
+        self.hold_seconds = hold_seconds
+        self.blur = blur | 1 if blur else 0  # GaussianBlur needs an odd kernel
+
+        self.frames = 0
+        self.inferred = 0
+        self.skipped = 0
+        self.motion_triggers = 0
+        self.refreshes = 0
+        self.last_change = 0.0
+        self._reference = None      # Small frame the last inference ran on
+        self._last_inference = 0.0
+        self._motion_until = 0.0
+
+    @classmethod
+    def from_settings(cls, settings, overrides=None):
+        """Build from MOTION_GATE_SETTINGS plus a camera's "motion_gate" overrides"""
+        options = dict(settings, **(overrides or {}))
+        options.pop("enabled", None)
+        return cls(**options)
+
+    def _small(self, frame):
+        height, width = frame.shape[:2]
+        size = (self.width, max(int(round(height * self.width / width)), 1))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        if self.blur:
+            small = cv2.GaussianBlur(small, (self.blur, self.blur), 0)
+        return small
+
+    def force(self):
+        """Run inference on the next frame, e.g. after the camera's settings change"""
+        self._reference = None
+
+    def check(self, frame, now=None):
+        """(run_inference, reason); reason is start, motion, hold, refresh or static"""
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        small = self._small(frame)
+
+        if self._reference is None or self._reference.shape != small.shape:
+            reason = "start"
+        else:
+            diff = cv2.absdiff(small, self._reference)
+            self.last_change = int(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+            if self.last_change >= self.min_changed_fraction:
+                if now >= self._motion_until:
+                    self.motion_triggers += 1
+                self._motion_until = now + self.hold_seconds
+                reason = "motion"
+            elif now < self._motion_until:
+                reason = "hold"
+            elif now - self._last_inference >= self.refresh_interval:
+                self.refreshes += 1
+                reason = "refresh"
+            else:
+                self.skipped += 1
+                return False, "static"
+
+        self.inferred += 1
+        self._reference = small
+        self._last_inference = now
+        return True, reason
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "skipped": self.skipped,
+            "hit_rate": self.skipped / self.frames if self.frames else 0.0,
+            "motion_triggers": self.motion_triggers,
+            "refreshes": self.refreshes,
+            "last_change": round(self.last_change, 5)
+        }
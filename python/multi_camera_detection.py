@@ -6,22 +6,103 @@ Supports both local cameras and IP cameras
 """
 
 import cv2
-import json
 import time
 import datetime
 import numpy as np
-from ultralytics import YOLO
 import threading
 import re
+import os
+import math
+import argparse
+from detection_config import EXECUTION_SETTINGS, DISPLAY_SETTINGS, AGGREGATION_SETTINGS, LOG_SETTINGS
+from activity_log import open_activity_log, summarize_events
+from model_runtime import load_detection_model
+from inference_profiles import predict_kwargs, profile_for_model
+from camera_workers import CameraWorkerPool
+from roi_mask import RoiMask
+from temporal_evidence import TemporalEvidence
+from frame_sources import open_capture
+from detection_aggregator import DetectionBus, SlidingWindowAggregator, make_frame_summary
+from logging_setup import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+class MosaicCompositor:
+    """Tiles the latest frame of every camera into one window at a low refresh rate"""
+    
+    def __init__(self, fps=5, tile_size=(480, 360), window_name="Multi-Camera Mosaic"):
+        self.interval = 1.0 / fps
+        self.tile_width, self.tile_height = tile_size
+        self.window_name = window_name
+        self.latest = {}  # camera_id -> (frame, detections, label)
+        self.lock = threading.Lock()
+        self.last_render = 0.0
+    
+    def submit(self, camera_id, frame, detections, label):
+        """Store a reference to a camera's newest raw frame (no copy, no drawing)"""
+        with self.lock:
+            self.latest[camera_id] = (frame, detections, label)
+    
+    def render(self):
+        """Compose all cameras into a single mosaic image"""
+        with self.lock:
+            entries = sorted(self.latest.items(), key=lambda item: str(item[0]))
+        if not entries:
+            return None
+        
+        cols = math.ceil(math.sqrt(len(entries)))
+        rows = math.ceil(len(entries) / cols)
+        mosaic = np.zeros((rows * self.tile_height, cols * self.tile_width, 3), dtype=np.uint8)
+        
+        for index, (camera_id, (frame, detections, label)) in enumerate(entries):
+            scale_x = self.tile_width / frame.shape[1]
+            scale_y = self.tile_height / frame.shape[0]
+            tile = cv2.resize(frame, (self.tile_width, self.tile_height), interpolation=cv2.INTER_AREA)
+            
+            for detection in detections:
+                x1, y1, x2, y2 = detection['bbox']
+                cv2.rectangle(tile, (int(x1 * scale_x), int(y1 * scale_y)),
+                              (int(x2 * scale_x), int(y2 * scale_y)), (0, 255, 0), 2)
+            cv2.putText(tile, label, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+            
+            row, col = divmod(index, cols)
+            y, x = row * self.tile_height, col * self.tile_width
+            mosaic[y:y + self.tile_height, x:x + self.tile_width] = tile
+        
+        return mosaic
+    
+    def maybe_show(self):
+        """Refresh the mosaic window when due, returns False when 'q' is pressed"""
+        now = time.time()
+        if now - self.last_render >= self.interval:
+            self.last_render = now
+            mosaic = self.render()
+            if mosaic is not None:
+                cv2.imshow(self.window_name, mosaic)
+        return not (cv2.waitKey(1) & 0xFF == ord('q'))
 
 class MultiCameraDetector:
     """Multi-camera detection with parallel processing"""
     
-    def __init__(self):
-        self.model = YOLO("yolov8n.pt")
+    def __init__(self, execution_mode=None, display_mode=None, inference_profile="people"):
+        self.model = load_detection_model()
+        # Detections are all treated as people, so only the person class goes through NMS
+        self.inference = predict_kwargs(profile_for_model(self.model, {"profile": inference_profile}))
         self.running = False
+        self.execution_mode = execution_mode or os.getenv('MULTI_CAMERA_EXECUTION_MODE', EXECUTION_SETTINGS["mode"])
+        self.worker_pool = None
+        self.worker_frame_seqs = {}
+        
+        # Display mode: per-camera windows, a single mosaic, or headless (no rendering)
+        self.display_mode = display_mode or os.getenv('MULTI_CAMERA_DISPLAY_MODE', DISPLAY_SETTINGS["mode"])
+        self.compositor = None
+        if self.display_mode == "mosaic":
+            self.compositor = MosaicCompositor(DISPLAY_SETTINGS["mosaic_fps"], DISPLAY_SETTINGS["mosaic_tile_size"])
         self.camera_detections = {}  # Store detections from each camera
         self.camera_info = {}  # Store camera details (name, zone, etc.)
+        self.camera_rois = {}  # Static ROI masks from CAMERA_ROIS
+        self.camera_evidence = {}  # Per-camera temporal state machines of the events
+        self.combined_evidence = TemporalEvidence.from_settings()
         self.combined_detection_history = {
             "stampede": {"confidence": 0.0, "status": "not_detected"},
             "running": {"confidence": 0.0, "status": "not_detected"},
@@ -30,6 +111,10 @@ class MultiCameraDetector:
             "smoke": {"confidence": 0.0, "status": "not_detected"},
             "medical emergency": {"confidence": 0.0, "status": "not_detected"}
         }
+        
+        # Cameras publish immutable frame summaries; the aggregator folds them incrementally
+        self.detection_bus = DetectionBus(AGGREGATION_SETTINGS["max_pending"])
+        self.aggregator = SlidingWindowAggregator(AGGREGATION_SETTINGS["window_seconds"])
     
     def is_ip_camera(self, camera_input):
         """Check if input is an IP camera URL"""
@@ -73,13 +158,15 @@ class MultiCameraDetector:
             "status": "active",
             "last_update": time.time()
         }
+        self.camera_rois[camera_id] = RoiMask.from_config(key=camera_source)
+        self.camera_evidence[camera_id] = TemporalEvidence.from_settings()
     
     def test_camera_connection(self, camera_source):
         """Test if camera connection is working"""
         try:
             if isinstance(camera_source, str) and self.is_ip_camera(camera_source):
                 # Test IP camera
-                cap = cv2.VideoCapture(camera_source)
+                cap = open_capture(camera_source)
                 if cap.isOpened():
                     ret, frame = cap.read()
                     cap.release()
@@ -87,20 +174,22 @@ class MultiCameraDetector:
                 return False
             else:
                 # Test local camera
-                cap = cv2.VideoCapture(camera_source)
+                cap = open_capture(camera_source)
                 if cap.isOpened():
                     ret, frame = cap.read()
                     cap.release()
                     return ret
                 return False
         except Exception as e:
-            print(f"Error testing camera {camera_source}: {e}")
+            logger.error(f"Error testing camera {camera_source}: {e}")
             return False
     
-    def process_camera_frame(self, camera_id, frame):
-        """Process a single frame from a specific camera"""
-        # Run YOLOv8 detection
-        results = self.model(frame, verbose=False)
+    def process_camera_frame(self, camera_id, frame, render=True):
+        """Process a single frame from a specific camera, annotated frame only when render is set"""
+        # Run YOLOv8 detection on the camera's ROI crop
+        roi = self.camera_rois.get(camera_id) or RoiMask()
+        view, offset = roi.crop(frame)
+        results = roi.restore_results(self.model(view, **self.inference), frame, offset)
         
         # Extract detections
         detections = []
@@ -112,7 +201,7 @@ class MultiCameraDetector:
                         confidence = float(box.conf[0])
                         class_id = int(box.cls[0])
                         
-                        if confidence >= 0.3:
+                        if confidence >= self.inference["conf"]:
                             bbox = box.xyxy[0].cpu().numpy()
                             detections.append({
                                 'class': 'person',
@@ -124,34 +213,16 @@ class MultiCameraDetector:
         # Calculate detection metrics for this camera
         person_count = len([d for d in detections if d['class'] == 'person'])
         
-        # Individual camera detection history
-        camera_detection_history = {
-            "stampede": {"confidence": 0.0, "status": "not_detected"},
-            "running": {"confidence": 0.0, "status": "not_detected"},
-            "fallen": {"confidence": 0.0, "status": "not_detected"},
-            "fire": {"confidence": 0.0, "status": "not_detected"},
-            "smoke": {"confidence": 0.0, "status": "not_detected"},
-            "medical emergency": {"confidence": 0.0, "status": "not_detected"}
-        }
-        
-        # Simple detection logic for individual camera
-        if person_count > 5:  # Stampede threshold for individual camera
-            camera_detection_history['stampede'] = {
-                'confidence': min(person_count / 10.0, 1.0),
-                'status': 'detected'
-            }
-        
-        if person_count > 0:  # Running detection
-            camera_detection_history['running'] = {
-                'confidence': 0.5,
-                'status': 'detected'
-            }
-        
-        if person_count > 0:  # Fallen detection (simplified)
-            camera_detection_history['fallen'] = {
-                'confidence': 0.7,  # Increased confidence for better detection
-                'status': 'detected'
-            }
+        # Individual camera detection history: simple per-frame detection logic
+        # filtered by the camera's temporal state machines
+        camera_detection_history = self.camera_evidence[camera_id].update_all({
+            "stampede": (person_count > 5, min(person_count / 10.0, 1.0)),  # Stampede threshold for individual camera
+            "running": (person_count > 0, 0.5),
+            "fallen": (person_count > 0, 0.7),  # Fallen detection (simplified)
+            "fire": (False, 0.0),
+            "smoke": (False, 0.0),
+            "medical emergency": (False, 0.0)
+        })
         
         # Update camera-specific detections with detailed information
         self.camera_detections[camera_id] = {
@@ -162,58 +233,108 @@ class MultiCameraDetector:
             'frame_processed': True
         }
         
+        # Publish an immutable summary for cross-camera aggregation (worker processes have no consumer)
+        if self.aggregator.running:
+            self.detection_bus.publish(make_frame_summary(
+                camera_id, self.camera_info[camera_id]['zone'], person_count, camera_detection_history
+            ))
+        
         # Update camera info
         self.camera_info[camera_id]['last_update'] = time.time()
         
+        if not render:
+            return None
         return results[0].plot() if results else frame
     
     def combine_camera_detections(self):
-        """Combine detections from all cameras into single JSON"""
-        total_person_count = sum(d['person_count'] for d in self.camera_detections.values())
-        
-        # Simple stampede detection (if total people > 10)
-        stampede_detected = total_person_count > 10
-        stampede_confidence = min(total_person_count / 20.0, 1.0)
+        """Combine detections from all cameras into single JSON, returns the aggregate snapshot"""
+        snapshot = self.aggregator.snapshot()
+        cameras = snapshot['cameras'].values()
+        total_person_count = snapshot['total_persons']
         
-        # Update combined detection history
-        self.combined_detection_history['stampede'] = {
-            'confidence': float(stampede_confidence),
-            'status': 'detected' if stampede_detected else 'not_detected'
-        }
+        # Simple detection logic across cameras, filtered by the combined state machines
+        running_detected = any(c['person_count'] > 0 for c in cameras)
+        fallen_detected = any(c['person_count'] > 0 for c in cameras)
+        self.combined_detection_history.update(self.combined_evidence.update_all({
+            'stampede': (total_person_count > 10, min(total_person_count / 20.0, 1.0)),  # Simple stampede detection
+            'running': (running_detected, 0.5),  # Running detection (simplified)
+            'fallen': (fallen_detected, 0.7),  # Fallen detection (simplified)
+            'fire': (False, 0.0),
+            'smoke': (False, 0.0),
+            'medical emergency': (False, 0.0)
+        }))
         
-        # Running detection (simplified)
-        running_detected = any(d['person_count'] > 0 for d in self.camera_detections.values())
-        self.combined_detection_history['running'] = {
-            'confidence': 0.5 if running_detected else 0.0,
-            'status': 'detected' if running_detected else 'not_detected'
-        }
-        
-        # Fallen detection (simplified)
-        fallen_detected = any(d['person_count'] > 0 for d in self.camera_detections.values())
-        self.combined_detection_history['fallen'] = {
-            'confidence': 0.7 if fallen_detected else 0.0,  # Increased confidence
-            'status': 'detected' if fallen_detected else 'not_detected'
-        }
-        
-        # Fire and smoke detection (simplified)
-        self.combined_detection_history['fire'] = {
-            'confidence': 0.0,
-            'status': 'not_detected'
-        }
+        return snapshot
+    
+    def draw_camera_info(self, camera_id, frame):
+        """Overlay camera name, zone and type on a frame"""
+        info = self.camera_info[camera_id]
+        cv2.putText(frame, f"{info['name']}", (10, 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(frame, f"Zone: {info['zone']}", (10, 60), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        cv2.putText(frame, f"Type: {info['type']}", (10, 90), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        return frame
+    
+    def start_worker_pool(self, camera_sources):
+        """Run each camera in its own capture and inference worker processes"""
+        frame_output = {"windows": "annotated", "mosaic": "raw"}.get(self.display_mode, "none")
+        self.worker_pool = CameraWorkerPool(
+            "multi_camera_detection:MultiCameraFrameProcessor",
+            processor_kwargs={"camera_sources": dict(enumerate(camera_sources)), "frame_output": frame_output},
+            ring_slots=EXECUTION_SETTINGS["ring_slots"],
+            max_frame_shape=EXECUTION_SETTINGS["max_frame_shape"],
+            encode_jpeg=False,
+            supervise_interval=EXECUTION_SETTINGS["supervise_interval"],
+            restart_backoff=EXECUTION_SETTINGS["restart_backoff"]
+        )
+        for camera_id, camera_source in enumerate(camera_sources):
+            self.setup_camera_info(camera_id, camera_source)
+            self.worker_pool.add_camera(camera_id, camera_source)
+            logger.info(f"🎥 Camera {camera_id} ({self.camera_info[camera_id]['name']}) started in worker processes")
+    
+    def collect_worker_results(self):
+        """Merge detection results reported by camera worker processes"""
+        for camera_id, result in self.worker_pool.get_results(timeout=0.01):
+            self.camera_detections[camera_id] = result
+            self.camera_info[camera_id]['last_update'] = result['processed_at']
+            if self.aggregator.running:
+                self.detection_bus.publish(make_frame_summary(
+                    camera_id, self.camera_info[camera_id]['zone'], result['person_count'],
+                    result['detection_history'], result['processed_at']
+                ))
+    
+    def show_worker_frames(self):
+        """Display the newest frame of each worker camera, returns False on quit"""
+        if self.display_mode == "headless":
+            return True
         
-        self.combined_detection_history['smoke'] = {
-            'confidence': 0.0,
-            'status': 'not_detected'
-        }
+        for camera_id in list(self.camera_info.keys()):
+            item = self.worker_pool.read_frame(camera_id, self.worker_frame_seqs.get(camera_id, 0))
+            if item is None:
+                continue
+            self.worker_frame_seqs[camera_id], frame = item
+            info = self.camera_info[camera_id]
+            if self.compositor is not None:
+                detections = self.camera_detections.get(camera_id, {}).get('detections', [])
+                self.compositor.submit(camera_id, frame, detections, info['name'])
+            else:
+                cv2.imshow(f"{info['name']} - {info['zone']}", frame)
         
-        self.combined_detection_history['medical emergency'] = {
-            'confidence': 0.0,
-            'status': 'not_detected'
-        }
+        if self.compositor is not None:
+            return self.compositor.maybe_show()
+        return not (cv2.waitKey(1) & 0xFF == ord('q'))
+    
+    def stop_worker_pool(self):
+        """Stop all camera worker processes"""
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
+            self.worker_pool = None
     
     def camera_processing_thread(self, camera_id, camera_source):
         """Thread function for processing a single camera"""
-        cap = cv2.VideoCapture(camera_source)
+        cap = open_capture(camera_source)
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
         
@@ -224,26 +345,28 @@ class MultiCameraDetector:
         camera_zone = self.camera_info[camera_id]['zone']
         camera_type = self.camera_info[camera_id]['type']
         
-        print(f"🎥 Camera {camera_id} ({camera_name}) in {camera_zone} started")
-        print(f"   Type: {camera_type}, Source: {camera_source}")
+        logger.info(f"🎥 Camera {camera_id} ({camera_name}) in {camera_zone} started")
+        logger.info(f"   Type: {camera_type}, Source: {camera_source}")
         
         try:
             while self.running:
                 ret, frame = cap.read()
                 if not ret:
-                    print(f"❌ Camera {camera_id} ({camera_name}) cannot read frames")
+                    logger.warning(f"❌ Camera {camera_id} ({camera_name}) cannot read frames")
                     break
                 
+                # Headless and mosaic modes skip all per-thread rendering
+                if self.display_mode != "windows":
+                    self.process_camera_frame(camera_id, frame, render=False)
+                    if self.compositor is not None:
+                        self.compositor.submit(camera_id, frame, self.camera_detections[camera_id]['detections'], camera_name)
+                    continue
+                
                 # Process frame
                 annotated_frame = self.process_camera_frame(camera_id, frame)
                 
                 # Add camera info to frame
-                cv2.putText(annotated_frame, f"{camera_name}", (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(annotated_frame, f"Zone: {camera_zone}", (10, 60), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                cv2.putText(annotated_frame, f"Type: {camera_type}", (10, 90), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+                self.draw_camera_info(camera_id, annotated_frame)
                 
                 # Show video window for this camera
                 cv2.imshow(f'{camera_name} - {camera_zone}', annotated_frame)
@@ -253,18 +376,57 @@ class MultiCameraDetector:
                     break
                     
         except Exception as e:
-            print(f"❌ Error in camera {camera_id} ({camera_name}): {e}")
+            logger.exception(f"❌ Error in camera {camera_id} ({camera_name}): {e}")
         finally:
             cap.release()
-            print(f"✅ Camera {camera_id} ({camera_name}) stopped")
+            # A stopped camera no longer counts towards the cross-camera totals
+            self.aggregator.remove_camera(camera_id)
+            logger.info(f"✅ Camera {camera_id} ({camera_name}) stopped")
+
+class MultiCameraFrameProcessor:
+    """Worker-process frame processor wrapping MultiCameraDetector"""
+    
+    def __init__(self, camera_sources=None, frame_output="annotated"):
+        self.detector = MultiCameraDetector(execution_mode="threads", display_mode="headless")
+        self.camera_sources = camera_sources or {}
+        self.frame_output = frame_output  # "annotated", "raw" or "none"
+    
+    def process(self, camera_id, frame):
+        """Detect on one frame, returns (output_frame, camera_detections)"""
+        if camera_id not in self.detector.camera_info:
+            self.detector.setup_camera_info(camera_id, self.camera_sources.get(camera_id, camera_id))
+        
+        if self.frame_output == "annotated":
+            output_frame = self.detector.process_camera_frame(camera_id, frame)
+            self.detector.draw_camera_info(camera_id, output_frame)
+        else:
+            self.detector.process_camera_frame(camera_id, frame, render=False)
+            output_frame = frame if self.frame_output == "raw" else None
+        
+        result = dict(self.detector.camera_detections[camera_id])
+        result['detections'] = [dict(d, bbox=[float(v) for v in d['bbox']]) for d in result['detections']]
+        return output_frame, result
+
+def parse_camera_source(camera_input):
+    """Convert a command-line camera source into a device index or URL"""
+    return int(camera_input) if camera_input.isdigit() else camera_input
 
 def main():
     """Main function for multi-camera detection"""
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Multi-camera real-time detection")
+    parser.add_argument("--headless", action="store_true", help="Skip all rendering (no windows)")
+    parser.add_argument("--mosaic", action="store_true", help="Show all cameras tiled in a single window")
+    parser.add_argument("--sources", nargs="+", help="Camera sources (device numbers or IP camera URLs)")
+    args = parser.parse_args()
+    
     print("🚀 Starting Multi-Camera Real-Time Detection")
     print("=" * 50)
     
     # Initialize multi-camera detector
-    detector = MultiCameraDetector()
+    display_mode = "headless" if args.headless else "mosaic" if args.mosaic else None
+    detector = MultiCameraDetector(display_mode=display_mode)
+    print(f"🖥️  Display mode: {detector.display_mode}")
     
     # Ask user for camera inputs
     print("🔍 Please select two camera sources:")
@@ -276,7 +438,7 @@ def main():
     print("  Enter IP camera URL (e.g., http://192.168.0.101:4747/video)")
     print("  Or enter local camera number (0, 1, or 2)")
     
-    camera_sources = []
+    camera_sources = [parse_camera_source(source) for source in args.sources or []]
     while len(camera_sources) < 2:
         try:
             camera_input = input(f"Enter camera source {len(camera_sources) + 1}: ").strip()
@@ -308,23 +470,36 @@ def main():
         except ValueError:
             print("❌ Please enter a valid camera source")
     
-    print(f"🎥 Using cameras: {camera_sources[0]} and {camera_sources[1]}")
+    print(f"🎥 Using cameras: {', '.join(str(source) for source in camera_sources)}")
     
-    # Start camera processing threads
+    # Start cross-camera aggregation and camera processing threads (or worker processes)
+    detector.aggregator.start(detector.detection_bus)
     detector.running = True
     camera_threads = {}
     
-    for i, camera_source in enumerate(camera_sources):
-        thread = threading.Thread(target=detector.camera_processing_thread, args=(i, camera_source))
-        camera_threads[i] = thread
-        thread.start()
+    if detector.execution_mode == "processes":
+        detector.start_worker_pool(camera_sources)
+    else:
+        for i, camera_source in enumerate(camera_sources):
+            thread = threading.Thread(target=detector.camera_processing_thread, args=(i, camera_source))
+            camera_threads[i] = thread
+            thread.start()
     
     last_log_time = time.time()
+    activity_log = open_activity_log(dict(LOG_SETTINGS, filename="multi_camera_activity_log.jsonl"), "multi_camera")
     
     try:
         while True:
+            # Worker processes report results and frames back to the main process
+            if detector.worker_pool is not None:
+                detector.collect_worker_results()
+                if not detector.show_worker_frames():
+                    break
+            elif detector.compositor is not None and not detector.compositor.maybe_show():
+                break
+            
             # Combine detections from all cameras
-            detector.combine_camera_detections()
+            snapshot = detector.combine_camera_detections()
             
             # Log every second
             current_time = time.time()
@@ -337,35 +512,43 @@ def main():
                     "cameras": camera_sources,
                     "camera_details": {},
                     "individual_detections": {},
-                    "combined_events": detector.combined_detection_history.copy()
+                    "combined_events": detector.combined_detection_history.copy(),
+                    "aggregate": {
+                        "total_persons": snapshot['total_persons'],
+                        "zone_persons": snapshot['zone_persons'],
+                        "window_mean_persons": round(snapshot['window_mean_persons'], 2),
+                        "window_peak_persons": snapshot['window_peak_persons'],
+                        "event_maxima": snapshot['event_maxima']
+                    }
                 }
                 
-                # Add individual camera details and detections
-                for camera_id in detector.camera_detections.keys():
+                # Add individual camera details and detections from the same snapshot
+                for camera_id, camera_summary in snapshot['cameras'].items():
                     if camera_id in detector.camera_info:
                         # Camera details
                         log_entry["camera_details"][f"camera_{camera_id}"] = {
                             "name": detector.camera_info[camera_id]['name'],
-                            "zone": detector.camera_info[camera_id]['zone'],
+                            "zone": camera_summary['zone'],
                             "type": detector.camera_info[camera_id]['type'],
                             "status": detector.camera_info[camera_id]['status'],
-                            "person_count": detector.camera_detections[camera_id]['person_count'],
-                            "last_update": detector.camera_info[camera_id]['last_update']
+                            "person_count": camera_summary['person_count'],
+                            "last_update": camera_summary['timestamp']
                         }
                         
                         # Individual camera detections
-                        if 'detection_history' in detector.camera_detections[camera_id]:
-                            log_entry["individual_detections"][f"camera_{camera_id}"] = \
-                                detector.camera_detections[camera_id]['detection_history']
+                        log_entry["individual_detections"][f"camera_{camera_id}"] = {
+                            event_type: {
+                                "confidence": confidence,
+                                "status": "detected" if confidence > 0 else "not_detected"
+                            }
+                            for event_type, confidence in camera_summary['events'].items()
+                        }
                 
-                print(json.dumps(log_entry, indent=2))
+                print(f"{timestamp} persons {snapshot['total_persons']}: "
+                      f"{summarize_events(log_entry['combined_events'])}")
                 
-                # Save to file
-                try:
-                    with open("multi_camera_activity_log.jsonl", "a", encoding="utf-8") as f:
-                        f.write(json.dumps(log_entry) + '\n')
-                except Exception as e:
-                    print(f"Error writing to log file: {e}")
+                # Save to file (batched, flushed and rotated by the writer)
+                activity_log.write(log_entry)
                 
                 last_log_time = current_time
             
@@ -379,8 +562,12 @@ def main():
         detector.running = False
         for thread in camera_threads.values():
             thread.join()
+        detector.stop_worker_pool()
+        detector.aggregator.stop()
+        activity_log.close()
         
-        cv2.destroyAllWindows()
+        if detector.display_mode != "headless":
+            cv2.destroyAllWindows()
         print("✅ Multi-camera detection stopped")
 
 if __name__ == "__main__":
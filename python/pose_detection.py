@@ -9,6 +9,7 @@ import mediapipe as mp
 import numpy as np
 import math
 from collections import deque
+from temporal_evidence import RingWindow
 
 class PoseDetector:
     """Medical emergency pose detection using MediaPipe"""
@@ -34,6 +35,7 @@ class PoseDetector:
         
         # Temporal analysis
         self.pose_history = deque(maxlen=30)  # 30 frames history
+        self.emergency_scores = RingWindow(10)  # Running average of the last 10 scores
         self.inactivity_timers = {}  # Track inactivity per person
         
     def calculate_pose_angles(self, landmarks):
@@ -156,15 +158,12 @@ class PoseDetector:
             'angles': angles
         }
         self.pose_history.append(pose_data)
+        self.emergency_scores.push(emergency_score)
         
         # Temporal consistency check
-        if len(self.pose_history) >= 10:
-            recent_scores = [p['emergency_score'] for p in list(self.pose_history)[-10:]]
-            avg_score = sum(recent_scores) / len(recent_scores)
-            
+        if self.emergency_scores.full and self.emergency_scores.mean() > 0.3:
             # Boost score if consistently high
-            if avg_score > 0.3:
-                emergency_score = min(emergency_score + 0.2, 1.0)
+            emergency_score = min(emergency_score + 0.2, 1.0)
         
         return {
             "detected": emergency_score > 0.4,
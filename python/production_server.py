@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Production Server for the Video Streaming Service
+Serves the Flask/SocketIO app on eventlet or gevent green threads so each MJPEG
+viewer and WebSocket client costs a green thread instead of an OS thread.
+YOLO inference keeps running on native threads (or worker processes).
+"""
+
+import os
+import sys
+
+# Must happen before logging, cv2, Flask, pymongo or the service create locks, sockets and threads
+os.environ.setdefault("VIDEO_SERVICE_ASYNC_MODE", "eventlet")
+from green_threads import monkey_patch
+monkey_patch()
+
+import argparse
+from async_server import ASYNC_MODE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Production server for the video streaming service")
+    parser.add_argument("--host", default=os.getenv("VIDEO_SERVICE_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("VIDEO_SERVICE_PORT", 5001)))
+    args = parser.parse_args()
+
+    if ASYNC_MODE not in ("eventlet", "gevent"):
+        print(f"❌ Unsupported async mode '{ASYNC_MODE}', use eventlet or gevent")
+        sys.exit(1)
+
+    from logging_setup import setup_logging
+    setup_logging()
+    from video_streaming_service import app, socketio, stream_limiter, socket_limiter
+
+    print(f"🚀 Video Streaming Service ({ASYNC_MODE}) on http://{args.host}:{args.port}")
+    print(f"   Max video viewers: {stream_limiter.limit or 'unlimited'}, "
+          f"max WebSocket clients: {socket_limiter.limit or 'unlimited'}")
+    socketio.run(app, host=args.host, port=args.port, debug=False, use_reloader=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Quality Controller
+Per-camera inference quality modes. Cameras normally run in "low" mode: a
+reduced model input size and a capped inference rate. A candidate event (an
+event score at or above its pre-threshold) upshifts the camera to "high" mode,
+full input size and every frame, until no candidate has been seen for the hold
+period. Time spent in each mode is accounted per camera.
+"""
+
+import math
+import threading
+import time
+
+MODES = ("low", "high")
+
+
+class QualityController:
+    """Low/high quality mode of one camera with event-triggered upshift"""
+
+    def __init__(self, low_imgsz=320, low_fps=5.0, high_fps=0, hold_seconds=10.0,
+                 pre_thresholds=None, fixed_imgsz=None):
+        self.low_imgsz = None if fixed_imgsz else max(int(math.ceil(low_imgsz / 32)) * 32, 32)
+        self.low_fps = low_fps
+        self.high_fps = high_fps
+        self.hold_seconds = hold_seconds
+        self.pre_thresholds = dict(pre_thresholds or {})
+
+        self.mode = "low"
+        self.upshifts = 0
+        self.last_trigger = None
+        self.mode_seconds = {mode: 0.0 for mode in MODES}
+        self._high_until = 0.0
+        self._last_update = None
+        self._last_inference = None
+        # The service feeds events from the server loop while the camera thread infers
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, overrides=None, fixed_imgsz=None):
+        """Build from QUALITY_CONTROL_SETTINGS plus a camera's "quality" overrides"""
+        options = dict(settings, **(overrides or {}))
+        options.pop("enabled", None)
+        return cls(fixed_imgsz=fixed_imgsz, **options)
+
+    def observe(self, scores, now=None):
+        """Upshift (or extend the hold) when a score reaches its pre-threshold, returns the event"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for event, score in scores.items():
+                threshold = self.pre_thresholds.get(event)
+                if threshold is None or score < threshold:
+                    continue
+                self._high_until = max(self._high_until, now + self.hold_seconds)
+                self.last_trigger = event
+                if self.mode != "high":
+                    self.upshifts += 1
+                    self._switch("high", now)
+                return event
+        return None
+
+    def update(self, now=None):
+        """Account time in the current mode and decay to low once the hold expires"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.mode == "high" and now >= self._high_until:
+                self._switch("low", now)
+            else:
+                self._account(now)
+            return self.mode
+
+    def set_mode(self, mode, now=None):
+        """Pin a mode; camera workers follow the service's controller this way"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown quality mode '{mode}'")
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._high_until = math.inf if mode == "high" else 0.0
+            if mode != self.mode:
+                self._switch(mode, now)
+
+    def _switch(self, mode, now):
+        self._account(now)
+        self.mode = mode
+        self._last_inference = None  # First frame in the new mode is always inferred
+
+    def _account(self, now):
+        if self._last_update is not None:
+            self.mode_seconds[self.mode] += now - self._last_update
+        self._last_update = now
+
+    def should_infer(self, now=None):
+        """Inference rate cap of the current mode (0 fps = every frame)"""
+        now = time.monotonic() if now is None else now
+        fps = self.high_fps if self.mode == "high" else self.low_fps
+        if fps and self._last_inference is not None and now - self._last_inference < 1.0 / fps:
+            return False
+        self._last_inference = now
+        return True
+
+    def inference_kwargs(self, kwargs):
+        """Model kwargs for the current mode: low mode caps the input size"""
+        if self.mode == "high" or self.low_imgsz is None or kwargs.get("imgsz", 640) <= self.low_imgsz:
+            return kwargs
+        return dict(kwargs, imgsz=self.low_imgsz)
+
+    def stats(self, now=None):
+        """Mode and time per mode; read-only, mode changes are left to update()"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._account(now)
+        total = sum(self.mode_seconds.values())
+        return {
+            "mode": self.mode,
+            "upshifts": self.upshifts,
+            "last_trigger": self.last_trigger,
+            "seconds": {mode: round(seconds, 3) for mode, seconds in self.mode_seconds.items()},
+            "high_fraction": round(self.mode_seconds["high"] / total, 4) if total else 0.0
+        }
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Camera ROI Masks
+Per-camera polygon regions of interest. Polygons are rasterized once per frame
+size; detectors crop frames to the mask's bounding rectangle before inference,
+restrict color and motion analysis to the mask and drop detections whose anchor
+point falls outside it. Without polygons a mask covers the whole frame.
+
+    "roi": {"polygons": [[[0, 0.35], [1, 0.35], [1, 1], [0, 1]]], "anchor": "bottom"}
+
+Coordinates are pixels, or fractions of the frame size when every value is <= 1.
+"""
+
+import cv2
+import numpy as np
+from detection_config import CAMERA_ROIS
+
+
+class RoiLayout:
+    """Rasterized mask for one frame size"""
+
+    def __init__(self, mask):
+        points = cv2.findNonZero(mask)
+        if points is None:
+            raise ValueError("ROI polygons do not cover any pixel of the frame")
+        x, y, w, h = cv2.boundingRect(points)
+        self.mask = mask
+        self.rect = (x, y, x + w, y + h)
+        self.crop_mask = mask[y:y + h, x:x + w]
+        # A rectangular ROI needs no per-pixel masking inside its crop
+        self.crop_is_full = bool(cv2.countNonZero(self.crop_mask) == w * h)
+        self.coverage = cv2.countNonZero(mask) / mask.size
+        self.crop_fraction = (w * h) / mask.size
+
+
+class RoiMask:
+    """Polygon region of interest for one camera"""
+
+    def __init__(self, polygons=None, anchor="center"):
+        self.polygons = [np.asarray(polygon, dtype=np.float64) for polygon in polygons or []]
+        if any(polygon.ndim != 2 or polygon.shape[0] < 3 or polygon.shape[1] != 2 for polygon in self.polygons):
+            raise ValueError("ROI polygons need at least three [x, y] points")
+        if anchor not in ("center", "bottom"):
+            raise ValueError(f"Unknown ROI anchor '{anchor}'")
+        self.anchor = anchor
+        self.normalized = bool(self.polygons) and all(polygon.max() <= 1.0 for polygon in self.polygons)
+        self._layouts = {}
+
+    @classmethod
+    def from_config(cls, spec=None, key=None):
+        """Mask from a camera config "roi" entry, falling back to CAMERA_ROIS[key]"""
+        if spec is None and key is not None:
+            spec = CAMERA_ROIS.get(str(key))
+        if not spec:
+            return cls()
+        if isinstance(spec, dict):
+            return cls(spec.get("polygons"), spec.get("anchor", "center"))
+        return cls(spec)
+
+    @property
+    def enabled(self):
+        return bool(self.polygons)
+
+    def layout(self, shape):
+        """Cached RoiLayout for a frame shape"""
+        height, width = shape[:2]
+        layout = self._layouts.get((height, width))
+        if layout is None:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            scale = np.array([width, height], dtype=np.float64) if self.normalized else 1.0
+            cv2.fillPoly(mask, [np.round(polygon * scale).astype(np.int32) for polygon in self.polygons], 255)
+            layout = self._layouts[(height, width)] = RoiLayout(mask)
+        return layout
+
+    def crop(self, frame):
+        """(view of the frame inside the ROI bounding rect, (x, y) offset)"""
+        if not self.enabled:
+            return frame, (0, 0)
+        x1, y1, x2, y2 = self.layout(frame.shape).rect
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def crop_mask(self, shape):
+        """uint8 mask matching crop(), None when every crop pixel is inside the ROI"""
+        if not self.enabled:
+            return None
+        layout = self.layout(shape)
+        return None if layout.crop_is_full else layout.crop_mask
+
+    def apply_to_mask(self, binary_mask, shape, rect=None):
+        """Clear a cropped binary mask (e.g. an HSV color mask) outside the ROI
+
+        rect is the (x1, y1, x2, y2) part of the crop the mask covers, None for all of it.
+        """
+        crop_mask = self.crop_mask(shape)
+        if crop_mask is None:
+            return binary_mask
+        if rect is not None:
+            crop_mask = crop_mask[rect[1]:rect[3], rect[0]:rect[2]]
+        return cv2.bitwise_and(binary_mask, crop_mask)
+
+    def masked_mean(self, values, shape):
+        """Mean of a cropped single-channel array over ROI pixels only"""
+        crop_mask = self.crop_mask(shape)
+        return float(np.mean(values)) if crop_mask is None else cv2.mean(values, mask=crop_mask)[0]
+
+    def area(self, shape):
+        """Pixels inside the ROI for a frame shape"""
+        if not self.enabled:
+            return shape[0] * shape[1]
+        return cv2.countNonZero(self.layout(shape).mask)
+
+    def keep_boxes(self, boxes, shape):
+        """Bool array: which frame-coordinate xyxy boxes have their anchor inside the ROI"""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if not self.enabled or len(boxes) == 0:
+            return np.ones(len(boxes), dtype=bool)
+        mask = self.layout(shape).mask
+        xs = np.clip(((boxes[:, 0] + boxes[:, 2]) / 2).astype(int), 0, mask.shape[1] - 1)
+        anchor_y = boxes[:, 3] - 1 if self.anchor == "bottom" else (boxes[:, 1] + boxes[:, 3]) / 2
+        ys = np.clip(anchor_y.astype(int), 0, mask.shape[0] - 1)
+        return mask[ys, xs] > 0
+
+    def restore_results(self, results, frame, offset):
+        """Map YOLO results on a crop back onto the full frame, dropping boxes outside the ROI"""
+        if not self.enabled:
+            return results
+        ox, oy = offset
+        for result in results:
+            result.orig_img = frame
+            result.orig_shape = frame.shape[:2]
+            if result.boxes is None:
+                continue
+            data = result.boxes.data.clone() if hasattr(result.boxes.data, "clone") else result.boxes.data.copy()
+            data[:, [0, 2]] += ox
+            data[:, [1, 3]] += oy
+            xyxy = data[:, :4].cpu().numpy() if hasattr(data, "cpu") else np.asarray(data[:, :4])
+            result.update(boxes=data[np.flatnonzero(self.keep_boxes(xyxy, frame.shape)).tolist()])
+        return results
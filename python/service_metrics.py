@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Service Metrics
+Minimal Prometheus-compatible counters, gauges and histograms for the video
+streaming service, rendered in the text exposition format on /metrics.
+Updates are plain attribute arithmetic on pre-resolved label children, so
+instrumenting the per-frame hot path costs well under a microsecond.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Seconds; spans fast post-processing up to slow CPU inference and network calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class: a named metric family with optional labels"""
+
+    type_name = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+
+    def labels(self, *values):
+        """Child for the given label values; resolve once and keep it on hot paths"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values):
+        self._children.pop(tuple(str(v) for v in values), None)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self._default.value += amount
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value):
+        self._default.value = value
+
+
+class CallbackMetric(_Metric):
+    """Gauge or counter read at scrape time; callback returns a number or {labels: number}"""
+
+    def __init__(self, name, help_text, callback, labelnames=(), type_name="gauge"):
+        self.callback = callback
+        self.type_name = type_name
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        try:
+            values = self.callback()
+        except Exception:
+            return lines
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def _render_child(self, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ordered collection of metric families"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def process_memory_bytes():
+    """Resident set size of this process"""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+class ServiceMetrics:
+    """All metrics exported by the video streaming service"""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.started_at = time.time()
+        register = self.registry.register
+
+        self.frames_captured = register(Counter(
+            "video_camera_frames_captured_total", "Frames read from each camera", ["camera"]))
+        self.read_failures = register(Counter(
+            "video_camera_read_failures_total", "Failed frame reads per camera", ["camera"]))
+        self.capture_fps = register(Gauge(
+            "video_camera_capture_fps", "Frames per second read from each camera", ["camera"]))
+        self.frames_dropped = register(Counter(
+            "video_camera_frames_dropped_total", "Captured frames never run through inference", ["camera"]))
+        self.motion_gate_frames = register(Counter(
+            "video_motion_gate_frames_total", "Frames inferred or skipped by the motion gate",
+            ["camera", "decision"]))
+        self.inference_seconds = register(Histogram(
+            "video_inference_seconds", "YOLO inference latency per frame", ["camera"]))
+        self.frame_processing_seconds = register(Histogram(
+            "video_frame_processing_seconds", "Inference, post-processing and drawing per frame", ["camera"]))
+        self.frame_latency_seconds = register(Histogram(
+            "video_frame_latency_seconds", "Capture to detections published latency", ["camera"]))
+        self.mongo_write_seconds = register(Histogram(
+            "video_mongo_write_seconds", "MongoDB detection write latency"))
+        self.mongo_write_errors = register(Counter(
+            "video_mongo_write_errors_total", "Failed MongoDB detection writes"))
+        self.socketio_emits = register(Counter(
+            "video_socketio_emits_total", "SocketIO events emitted", ["event"]))
+        self.backend_alerts = register(Counter(
+            "video_backend_alerts_total", "Detection alerts sent to the backend by outcome", ["result"]))
+        self.backend_alert_seconds = register(Histogram(
+            "video_backend_alert_seconds", "Backend alert request latency"))
+
+    def register_callback(self, name, help_text, callback, labelnames=(), type_name="gauge"):
+        """Add a gauge (or counter) computed at scrape time"""
+        return self.registry.register(CallbackMetric(name, help_text, callback, labelnames, type_name))
+
+    def register_process_metrics(self):
+        self.register_callback("process_resident_memory_bytes", "Resident memory size in bytes",
+                               process_memory_bytes)
+        self.register_callback("process_cpu_seconds_total", "User and system CPU time in seconds",
+                               lambda: sum(os.times()[:2]), type_name="counter")
+        self.register_callback("process_threads", "Number of Python threads", threading.active_count)
+        self.register_callback("process_start_time_seconds", "Process start time (Unix epoch)",
+                               lambda: self.started_at)
+
+    def render(self):
+        return self.registry.render()
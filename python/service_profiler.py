@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Live Service Profiling
+Stack-sampling CPU profiler and tracemalloc snapshot diffs that can be run
+against a live process from an admin route, without restarting it under a
+profiler. Sampling output is in collapsed-stack format, ready for
+flamegraph.pl or speedscope.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of all OS threads at a fixed rate"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self):
+        return self._lock.locked()
+
+    def sample(self, seconds=10.0, hz=100, match=None):
+        """Collect stacks for seconds; returns (Counter of collapsed stacks, stats dict)
+
+        match keeps only threads whose stack contains a function of that name
+        (e.g. process_camera_stream). Runs one profile at a time.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            stacks = Counter()
+            names = {}
+            interval = 1.0 / hz
+            own_id = threading.get_ident()
+            samples = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+
+            while time.perf_counter() < deadline:
+                names.update((t.ident, t.name) for t in threading.enumerate())
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    stack = self._collapse(frame)
+                    if match and not any(entry.endswith(f":{match}") for entry in stack):
+                        continue
+                    thread_name = names.get(thread_id, f"thread-{thread_id}").replace(";", "_").replace(" ", "_")
+                    stacks[";".join([thread_name] + stack)] += 1
+                samples += 1
+                time.sleep(interval)
+
+            stats = {
+                "seconds": time.perf_counter() - started,
+                "samples": samples,
+                "effective_hz": samples / max(time.perf_counter() - started, 1e-9),
+                "stacks": len(stacks)
+            }
+            return stacks, stats
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _collapse(frame):
+        """Root-first list of "file:function" entries"""
+        entries = []
+        while frame is not None:
+            code = frame.f_code
+            entries.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        entries.reverse()
+        return entries
+
+    @staticmethod
+    def to_collapsed(stacks):
+        """Brendan Gregg collapsed format: one "frame;frame;frame count" line per stack"""
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+    @staticmethod
+    def top_functions(stacks, limit=25):
+        """Functions ranked by self samples (leaf frame) and total samples"""
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for entry in set(frames):
+                total_counts[entry] += count
+        return [
+            {"function": entry, "self": self_counts[entry], "total": total_counts[entry]}
+            for entry, _ in self_counts.most_common(limit)
+        ]
+
+
+class MemoryTracker:
+    """tracemalloc snapshots, each diffed against the previous one"""
+
+    def __init__(self):
+        self.previous = None
+        self.previous_time = None
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self, frames=10):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.previous = None
+        self.previous_time = None
+
+    def stop(self):
+        tracemalloc.stop()
+        self.previous = None
+        self.previous_time = None
+
+    def snapshot(self, key_type="lineno", limit=25):
+        """Top allocation sites, with growth since the previous snapshot"""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        now = time.time()
+        current, peak = tracemalloc.get_traced_memory()
+        report = {
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "key_type": key_type
+        }
+
+        if self.previous is None:
+            report["top"] = [self._format_stat(stat) for stat in snapshot.statistics(key_type)[:limit]]
+        else:
+            report["interval_seconds"] = now - self.previous_time
+            report["growth"] = [self._format_stat(stat, diff=True)
+                                for stat in snapshot.compare_to(self.previous, key_type)[:limit]]
+
+        self.previous = snapshot
+        self.previous_time = now
+        return report
+
+    @staticmethod
+    def _format_stat(stat, diff=False):
+        entry = {
+            "site": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            "size_bytes": stat.size,
+            "count": stat.count
+        }
+        if diff:
+            entry["size_diff_bytes"] = stat.size_diff
+            entry["count_diff"] = stat.count_diff
+        return entry
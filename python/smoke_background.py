@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Smoke Background Model
+Learned per-camera background of static surfaces. Smoke colors (low saturation,
+mid value) also match walls, floors and concrete; smoke analysis only covers
+pixels that differed from the background within the last few updates. The model
+is a small blurred grayscale running average, updated every few frames, and is
+saved to disk so a restarted camera does not have to learn it again.
+"""
+
+import os
+import time
+import cv2
+import numpy as np
+from enhanced_detection_config import SMOKE_BACKGROUND_SETTINGS
+
+AGE_LIMIT = np.iinfo(np.uint16).max
+
+
+class StaticBackground:
+    """Running-average background and per-pixel time since the last change"""
+
+    def __init__(self, path=None, enabled=True, width=160, update_every=5, learning_rate=0.05,
+                 foreground_learning_rate=0.005, pixel_threshold=12, recent_updates=30,
+                 margin=2, save_interval=60.0, blur=5):
+        self.path = path
+        self.enabled = enabled
+        self.width = width
+        self.update_every = max(int(update_every), 1)
+        self.learning_rate = learning_rate
+        # Changed pixels are learned slowly, so lingering smoke stays foreground for a long time
+        self.foreground_learning_rate = foreground_learning_rate
+        self.pixel_threshold = pixel_threshold
+        # Also the warm-up: a new background counts every pixel as changed for this many updates
+        self.recent_updates = recent_updates
+        self.save_interval = save_interval
+        self.blur = blur | 1 if blur else 0  # GaussianBlur needs an odd kernel
+        self.kernel = np.ones((2 * margin + 1, 2 * margin + 1), np.uint8) if margin else None
+
+        self.frames = 0
+        self.updates = 0
+        self.restored = False
+        self.shape = None           # Shape of the frames the model covers
+        self._background = None     # float32 small grayscale
+        self._age = None            # uint16 updates since each pixel last changed
+        self._masks = {}            # Recent-change masks per requested size, until the next update
+        self._last_save = time.monotonic()
+        if enabled and path:
+            self.load()
+
+    @classmethod
+    def from_settings(cls, settings=None, camera=None, overrides=None):
+        """Build from SMOKE_BACKGROUND_SETTINGS; cameras with an id persist to state_dir/<id>.npz"""
+        options = dict(settings or SMOKE_BACKGROUND_SETTINGS, **(overrides or {}))
+        state_dir = options.pop("state_dir", None)
+        path = os.path.join(state_dir, f"{camera}.npz") if state_dir and camera is not None else None
+        return cls(path=path, **options)
+
+    @property
+    def ready(self):
+        """True once the background has seen enough updates to tell static pixels apart"""
+        return self.enabled and self._background is not None and self.updates >= self.recent_updates
+
+    def _small(self, frame):
+        height, width = frame.shape[:2]
+        size = (min(self.width, width), max(int(round(height * min(self.width, width) / width)), 1))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        if self.blur:
+            small = cv2.GaussianBlur(small, (self.blur, self.blur), 0)
+        return small.astype(np.float32)
+
+    def update(self, frame):
+        """Learn from every update_every-th frame (the same view the smoke masks are built on)"""
+        if not self.enabled:
+            return
+        self.frames += 1
+        if self._background is not None and self.shape == frame.shape[:2] \
+                and (self.frames - 1) % self.update_every:
+            return
+        small = self._small(frame)
+        self._masks = {}
+        if self._background is None or self._background.shape != small.shape:
+            # New camera or a different resolution: start learning from scratch
+            self.shape = frame.shape[:2]
+            self._background = small
+            self._age = np.zeros(small.shape, np.uint16)
+            self.updates = 0
+            self.restored = False
+            return
+        self.shape = frame.shape[:2]
+
+        changed = cv2.absdiff(small, self._background) > self.pixel_threshold
+        self._age = np.where(changed, 0, np.minimum(self._age, AGE_LIMIT - 1) + 1).astype(np.uint16)
+        rate = np.where(changed, self.foreground_learning_rate, self.learning_rate).astype(np.float32)
+        self._background += rate * (small - self._background)
+        self.updates += 1
+
+        if self.path and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def mask(self, shape):
+        """uint8 mask (255 = changed recently) of the given (height, width), all 255 until ready"""
+        shape = tuple(shape[:2])
+        if not self.ready:
+            return np.full(shape, 255, np.uint8)
+        mask = self._masks.get(shape)
+        if mask is None:
+            mask = np.where(self._age < self.recent_updates, 255, 0).astype(np.uint8)
+            if self.kernel is not None:
+                mask = cv2.dilate(mask, self.kernel)  # Smoke edges blend into the background
+            mask = cv2.resize(mask, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+            self._masks[shape] = mask
+        return mask
+
+    def apply_to_mask(self, binary_mask, rect=None):
+        """Clear static pixels in a mask of the learned view, or of its (x1, y1, x2, y2) rect"""
+        if not self.ready:
+            return binary_mask
+        changed = self.mask(self.shape)
+        if rect is not None:
+            changed = changed[rect[1]:rect[3], rect[0]:rect[2]]
+        return cv2.bitwise_and(binary_mask, changed)
+
+    def changed_fraction(self):
+        """Share of the view smoke analysis still covers"""
+        if not self.ready:
+            return 1.0
+        return float(np.count_nonzero(self._age < self.recent_updates)) / self._age.size
+
+    def load(self):
+        """Restore a saved background; a missing or unreadable file starts a fresh one"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                background = data["background"].astype(np.float32)
+                age = data["age"].astype(np.uint16)
+                height, width, updates = (int(value) for value in data["meta"])
+        except (OSError, ValueError, KeyError):
+            return False
+        if background.shape != age.shape:
+            return False
+        self._background, self._age = background, age
+        self.shape, self.updates = (height, width), updates
+        self.restored = True
+        return True
+
+    def save(self):
+        """Write the model atomically (no-op without a path or before the first update)"""
+        self._last_save = time.monotonic()
+        if not self.path or self._background is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, background=self._background, age=self._age,
+                 meta=np.asarray([self.shape[0], self.shape[1], self.updates], dtype=np.int64))
+        os.replace(tmp_path, self.path)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "restored": self.restored,
+            "updates": self.updates,
+            "changed_fraction": round(self.changed_fraction(), 4)
+        }
@@ -95,6 +95,8 @@ def start_service():
     
     try:
         # Import and run the service
+        from logging_setup import setup_logging
+        setup_logging()
         from video_streaming_service import app, socketio
         
         print("\nService starting on http://localhost:5001")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Temporal Evidence
+Per-event state machines shared by the detectors. Each event keeps a ring
+counter of its recent per-frame hits, an exponentially decaying confidence and
+an active/inactive state with hysteresis: it switches on once `on` of the last
+`window` frames were hits, and off only when the hits fall to `off` or fewer
+after being on for at least `hold` frames. Every update is O(1), independent of
+the window size.
+"""
+
+from enhanced_detection_config import TEMPORAL_SETTINGS
+
+
+class RingWindow:
+    """Last `size` numbers with an O(1) running sum"""
+
+    __slots__ = ("size", "count", "sum", "_values", "_next")
+
+    def __init__(self, size):
+        self.size = max(int(size), 1)
+        self.count = 0
+        self.sum = 0.0
+        self._values = [0.0] * self.size
+        self._next = 0
+
+    def push(self, value):
+        value = float(value)
+        self.sum += value - self._values[self._next]
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        if self._next == 0:
+            self.sum = sum(self._values)  # Once per lap, so float drift cannot build up
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def newest(self, age=0):
+        """Value pushed `age` pushes ago (0 = the latest)"""
+        return self._values[(self._next - 1 - age) % self.size]
+
+    def delta(self):
+        """Latest value minus the oldest one still in the window"""
+        return self.newest() - self.newest(self.count - 1) if self.count else 0.0
+
+    def clear(self):
+        self.__init__(self.size)
+
+
+class EventRule:
+    """Debounce and hysteresis of one event"""
+
+    def __init__(self, window=3, on=2, off=0, hold=0):
+        if not 0 <= off < on <= window:
+            raise ValueError(f"Event rule needs 0 <= off < on <= window (got {off}, {on}, {window})")
+        self.window = window
+        self.on = on        # Hits in the window that switch the event on
+        self.off = off      # Hits at or below which it switches off again
+        self.hold = hold    # Frames an event stays on at least
+
+
+class EventState:
+    """Ring counter, decayed confidence and on/off state of one event"""
+
+    __slots__ = ("rule", "hits", "confidence", "active", "active_frames", "activations")
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.hits = RingWindow(rule.window)
+        self.confidence = 0.0
+        self.active = False
+        self.active_frames = 0
+        self.activations = 0
+
+    @property
+    def status(self):
+        return "detected" if self.active else "not_detected"
+
+    def consistency(self):
+        """Share of hits over a full window, None while the window is still filling"""
+        return self.hits.mean() if self.hits.full else None
+
+    def as_dict(self):
+        return {"confidence": round(self.confidence, 4), "status": self.status}
+
+
+class TemporalEvidence:
+    """Temporal state machines for a detector's events"""
+
+    def __init__(self, rules=None, decay=0.9, min_confidence=0.01):
+        rules = dict(rules or {})
+        self.default_rule = self._rule(rules.pop("default", None) or EventRule())
+        self.rules = {event: self._rule(rule) for event, rule in rules.items()}
+        self.decay = decay
+        self.min_confidence = min_confidence  # Decayed confidences below this read as 0
+        self.events = {}
+
+    @classmethod
+    def from_settings(cls, settings=None, rules=None):
+        """Build from TEMPORAL_SETTINGS; rules override its event_rules"""
+        settings = settings or TEMPORAL_SETTINGS
+        merged = dict(settings.get("event_rules") or {}, **(rules or {}))
+        return cls(merged, decay=settings["confidence_decay"])
+
+    @staticmethod
+    def _rule(rule):
+        return rule if isinstance(rule, EventRule) else EventRule(**rule)
+
+    def state(self, event):
+        state = self.events.get(event)
+        if state is None:
+            state = self.events[event] = EventState(self.rules.get(event, self.default_rule))
+        return state
+
+    def update(self, event, detected, confidence=0.0):
+        """Feed one frame's observation of an event, returns its EventState"""
+        state = self.state(event)
+        rule = state.rule
+        detected = bool(detected)
+        state.hits.push(detected)
+
+        # Confidence jumps up with observations and decays by `decay` per frame without
+        decayed = state.confidence * self.decay
+        state.confidence = max(float(confidence), decayed) if detected else decayed
+        if state.confidence < self.min_confidence:
+            state.confidence = 0.0
+
+        if state.active:
+            state.active_frames += 1
+            if state.hits.sum <= rule.off and state.active_frames >= rule.hold:
+                state.active = False
+        elif state.hits.sum >= rule.on:
+            state.active = True
+            state.active_frames = 1
+            state.activations += 1
+        return state
+
+    def update_all(self, observations):
+        """{event: (detected, confidence)} -> {event: {"confidence", "status"}}"""
+        return {event: self.update(event, detected, confidence).as_dict()
+                for event, (detected, confidence) in observations.items()}
+
+    def history(self):
+        """Current {event: {"confidence", "status"}} of every event seen so far"""
+        return {event: state.as_dict() for event, state in self.events.items()}
+
+    def reset(self):
+        self.events = {}
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the buffered activity log writer (run with pytest)
+"""
+
+import gzip
+import json
+import time
+from collections import deque
+
+import numpy as np
+import pytest
+from activity_log import ActivityLogWriter, dumps_line
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_timer_flushes_quiet_writer(tmp_path):
+    """One line and no further writes still reaches the file within flush_interval"""
+    path = tmp_path / "activity.jsonl"
+    writer = ActivityLogWriter(str(path), flush_interval=0.05)
+    writer.write({"timestamp": 1, "events": {}})
+    assert wait_for(lambda: path.exists() and path.read_bytes())
+    assert json.loads(path.read_text()) == {"timestamp": 1, "events": {}}
+    writer.close()
+
+
+def test_rotation_keeps_backup_count_gzipped_segments(tmp_path):
+    path = tmp_path / "activity.jsonl"
+    writer = ActivityLogWriter(str(path), max_bytes=100, backup_count=2, flush_bytes=0, flush_interval=0)
+    for ts in range(12):
+        writer.write({"timestamp": ts, "pad": "x" * 40})  # ~55 bytes: rotates every second line
+    writer.close()
+
+    segments = [tmp_path / "activity.jsonl.1.gz", tmp_path / "activity.jsonl.2.gz"]
+    assert wait_for(lambda: all(s.exists() for s in segments) and not list(tmp_path.glob("*.pending")))
+    assert not (tmp_path / "activity.jsonl.3.gz").exists()
+    newest = [json.loads(line)["timestamp"] for line in gzip.open(segments[0], "rt")]
+    oldest = [json.loads(line)["timestamp"] for line in gzip.open(segments[1], "rt")]
+    assert (oldest, newest) == ([8, 9], [10, 11])
+
+
+def test_json_default_only_converts_known_containers():
+    entry = {"n": np.float32(0.5), "a": np.arange(2), "s": {3}, "d": deque([4]), "t": (5,)}
+    assert json.loads(dumps_line(entry)) == {"n": 0.5, "a": [0, 1], "s": [3], "d": [4], "t": [5]}
+    with pytest.raises(TypeError):
+        dumps_line({"g": (x for x in range(2))})
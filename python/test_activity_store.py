@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the indexed activity event store (run with pytest)
+"""
+
+from activity_store import ActivityStore, SourceLog
+
+
+def entry(ts, fire=0.0, smoke=0.0):
+    status = lambda confidence: "detected" if confidence else "not_detected"
+    return {"timestamp": ts, "events": {"fire": {"confidence": fire, "status": status(fire)},
+                                        "smoke": {"confidence": smoke, "status": status(smoke)}}}
+
+
+def test_query_seal_query(tmp_path):
+    """Querying the open segment, sealing it and querying again returns every match"""
+    store = ActivityStore(str(tmp_path), segment_entries=3)
+    log = store.source("advanced", default_camera="0")
+    log.append(entry(100, fire=0.9))
+    log.append(entry(101))
+    assert [r["ts"] for r in store.query(event="fire")] == [100]
+
+    log.append(entry(102, fire=0.8))  # Third entry seals the segment
+    assert log.active is None and len(log.sealed) == 1
+    assert [r["ts"] for r in store.query(event="fire")] == [100, 102]
+
+    log.append(entry(103, fire=0.7))
+    assert [r["ts"] for r in store.query(event="fire", camera="0")] == [100, 102, 103]
+    store.close()
+
+
+def test_not_detected_events_are_not_indexed(tmp_path):
+    store = ActivityStore(str(tmp_path))
+    log = store.source("advanced", default_camera="0")
+    log.append({"timestamp": 100, "events": {"fire": {"confidence": 0.4, "status": "not_detected"}}})
+    log.append(entry(101, smoke=0.6))
+    assert store.query(event="fire") == []
+    assert [(r["camera"], r["event"]) for r in store.query(camera="0")] == [("0", "smoke")]
+    store.close()
+
+
+def test_reopen_restores_sealed_and_open_segments(tmp_path):
+    """A restarted writer finds sealed segments in the manifest and rebuilds the open one"""
+    store = ActivityStore(str(tmp_path), segment_entries=2)
+    log = store.source("advanced", default_camera="0")
+    for ts in range(100, 105):
+        log.append(entry(ts, fire=0.5))
+    store.close()
+
+    # A torn last line from a crash mid-write is dropped on reopen
+    with open(log.active.path, "ab") as f:
+        f.write(b'{"timestamp": 105, "events": {"fire"')
+
+    reopened = SourceLog(str(tmp_path / "advanced"), default_camera="0", segment_entries=2)
+    assert len(reopened.sealed) == 2 and reopened.active.entries == 1
+    assert [ts for ts, *_ in reopened.query_events(event="fire")] == [100, 101, 102, 103, 104]
+    assert [ts for ts, _ in reopened.query_entries(start=102, end=103)] == [102, 103]
+
+    reopened.append(entry(106, fire=0.5))
+    assert [ts for ts, *_ in reopened.query_events(event="fire", start=104)] == [104, 106]
+    reopened.close()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for priority-aware admission control (run with pytest)
+"""
+
+import time
+from admission_control import AdmissionController, CameraAdmission
+
+
+class Clock:
+    """Drives offers at 10 fps per camera; each simulated second ends in a rebalance"""
+
+    def __init__(self, controller, cameras):
+        self.controller = controller
+        self.cameras = cameras
+        self.now = time.monotonic()
+
+    def second(self):
+        for _ in range(10):
+            for camera_id in self.cameras:
+                self.controller.offer(camera_id, now=self.now)
+            self.now += 0.1
+
+
+def levels(controller):
+    return {camera_id: camera["level"] for camera_id, camera in controller.stats()["cameras"].items()}
+
+
+def test_low_priority_sheds_first_and_recovers_with_hysteresis():
+    changes = []
+    controller = AdmissionController(budget=1.0, interval=1.0, smoothing=1.0, recover_ratio=0.85,
+                                     listener=lambda camera_id, decision: changes.append((camera_id, decision.level)))
+    controller.register("lobby", "low")
+    controller.register("vault", "critical")
+    clock = Clock(controller, ["lobby", "vault"])
+    controller.record("vault", 0.04)
+
+    controller.record("lobby", 0.03)
+    for _ in range(2):
+        clock.second()
+    assert levels(controller) == {"lobby": "full", "vault": "full"}
+
+    controller.record("lobby", 0.1)   # 1.0 + 0.4 s/s; a 320 input quarters the lobby's cost
+    clock.second()
+    assert levels(controller) == {"lobby": "low_resolution", "vault": "full"}
+    assert changes == [("lobby", "low_resolution")]
+
+    controller.record("lobby", 0.05)  # Fits the budget, not the 0.85 recovery budget
+    clock.second()
+    assert levels(controller)["lobby"] == "low_resolution"
+
+    controller.record("lobby", 0.03)
+    clock.second()
+    assert levels(controller)["lobby"] == "full"
+    assert changes[-1] == ("lobby", "full")
+
+
+def test_protected_priority_is_never_shed():
+    controller = AdmissionController(budget=0.5, interval=1.0, smoothing=1.0)
+    controller.register("vault", "critical")
+    controller.record("vault", 1.0)
+    clock = Clock(controller, ["vault"])
+    for _ in range(2):
+        clock.second()
+    assert levels(controller) == {"vault": "full"}
+    assert controller.stats()["demand"] > controller.budget
+
+
+def test_camera_admission_caps_rate_and_input_size():
+    admission = CameraAdmission(level="low_fps", fps=2.0, imgsz=320, tiling=False)
+    assert [admission.allow(now=t) for t in (0.0, 0.2, 0.5, 0.6)] == [True, False, True, False]
+    assert admission.inference_kwargs({"imgsz": 640}) == {"imgsz": 320}
+    assert admission.inference_kwargs({"imgsz": 256}) == {"imgsz": 256}
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared-memory frame ring used by camera worker processes (run with pytest)
+"""
+
+import numpy as np
+import pytest
+from camera_workers import CameraWorkerPool, SharedFrameRing
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing(slots=2, slot_bytes=64)
+    yield ring
+    ring.close()
+
+
+def test_read_latest_returns_newest_after_seq(ring):
+    assert ring.read_latest() is None
+    for value in (1, 2, 3):
+        ring.write(np.full((2, 4), value, dtype=np.uint8), timestamp=float(value))
+
+    seq, timestamp, frame = ring.read_latest()
+    assert (seq, timestamp, frame.shape) == (3, 3.0, (2, 4)) and (frame == 3).all()
+    assert ring.read_latest(after_seq=3) is None
+
+    attached = SharedFrameRing.attach(ring.name)
+    assert attached.read_latest()[0] == 3
+    attached.close()
+
+
+def test_in_flight_slot_is_not_read(ring):
+    """A slot the writer is still filling is marked -1; readers skip it instead of tearing"""
+    ring.write(np.zeros(8, dtype=np.uint8))
+    ring._meta[1, 0] = -1
+    assert ring.read_latest() is None
+
+
+def test_oversized_write_is_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.write(np.zeros(65, dtype=np.uint8))
+
+
+def test_jpeg_ring_is_a_fraction_of_the_raw_slot():
+    pool = CameraWorkerPool("detection_postprocess:YoloDetectionProcessor", max_frame_shape=(10, 10, 3),
+                            jpeg_slot_ratio=0.2)
+    assert (pool.slot_bytes, pool.jpeg_slot_bytes) == (300, 60)
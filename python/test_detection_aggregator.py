@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for cross-camera sliding-window aggregation (run with pytest)
+"""
+
+from detection_aggregator import CameraFrameSummary, DetectionBus, SlidingWindowAggregator
+
+
+def summary(camera_id, ts, persons, zone="lobby", fire=0.0):
+    return CameraFrameSummary(camera_id, zone, ts, persons, (("fire", fire),))
+
+
+def test_window_mean_and_peak_expire():
+    aggregator = SlidingWindowAggregator(window_seconds=5.0)
+    aggregator.apply(summary("a", 100.0, 4, fire=0.9))
+    aggregator.apply(summary("b", 101.0, 2, zone="hall"))
+    aggregator.apply(summary("a", 103.0, 1))
+
+    snapshot = aggregator.snapshot(now=104.0)
+    assert snapshot["total_persons"] == 3
+    assert snapshot["zone_persons"] == {"lobby": 1, "hall": 2}
+    assert snapshot["window_mean_persons"] == (4 + 6 + 3) / 3
+    assert snapshot["window_peak_persons"] == 6
+    assert snapshot["event_maxima"]["fire"] == 0.9
+
+    snapshot = aggregator.snapshot(now=107.0)  # 100 and 101 fell out of the window
+    assert snapshot["window_mean_persons"] == 3 and snapshot["window_peak_persons"] == 3
+    assert snapshot["event_maxima"]["fire"] == 0.0
+
+
+def test_zone_change_moves_count():
+    aggregator = SlidingWindowAggregator()
+    aggregator.apply(summary("a", 100.0, 3))
+    aggregator.apply(summary("a", 101.0, 2, zone="hall"))
+    assert aggregator.snapshot(now=101.0)["zone_persons"] == {"lobby": 0, "hall": 2}
+
+
+def test_removed_camera_ignores_queued_summaries():
+    aggregator = SlidingWindowAggregator()
+    aggregator.apply(summary("a", 100.0, 3))
+    aggregator.apply(summary("b", 100.0, 1))
+    aggregator.remove_camera("a", timestamp=102.0)
+    aggregator.apply(summary("a", 101.0, 3))  # Published before the camera thread exited
+
+    snapshot = aggregator.snapshot(now=102.0)
+    assert snapshot["total_persons"] == 1 and set(snapshot["cameras"]) == {"b"}
+
+    aggregator.apply(summary("a", 103.0, 2))  # Restarted camera
+    assert aggregator.snapshot(now=103.0)["total_persons"] == 3
+
+
+def test_bus_drops_oldest_when_full():
+    bus = DetectionBus(max_pending=2)
+    for ts in range(3):
+        bus.publish(summary("a", float(ts), ts))
+    assert bus.dropped == 1
+    assert [bus.get(timeout=0).timestamp for _ in range(2)] == [1.0, 2.0]
+    assert bus.get(timeout=0) is None
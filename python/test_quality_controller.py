@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for per-camera quality modes (run with pytest)
+"""
+
+import pytest
+from quality_controller import QualityController
+
+
+def controller(**options):
+    return QualityController(low_imgsz=320, low_fps=5.0, high_fps=0, hold_seconds=10.0,
+                             pre_thresholds={"fire": 0.3}, **options)
+
+
+def test_upshift_holds_then_decays():
+    quality = controller()
+    quality.update(now=0.0)
+    assert quality.observe({"fire": 0.1}, now=1.0) is None and quality.mode == "low"
+    assert quality.observe({"fire": 0.5}, now=2.0) == "fire" and quality.mode == "high"
+
+    assert quality.update(now=11.0) == "high"
+    quality.observe({"fire": 0.4}, now=11.0)  # Extends the hold to 21 s
+    assert quality.update(now=20.0) == "high"
+    assert quality.update(now=21.0) == "low"
+    assert quality.upshifts == 1
+    assert quality.mode_seconds == pytest.approx({"low": 2.0, "high": 19.0})
+
+
+def test_stats_never_switch_modes():
+    """A metrics scrape after the hold expired must leave the decay to update()"""
+    quality = controller()
+    quality.update(now=0.0)
+    quality.observe({"fire": 0.5}, now=1.0)
+    stats = quality.stats(now=30.0)
+    assert stats["mode"] == "high" and quality.mode == "high"
+    assert stats["seconds"] == {"low": 1.0, "high": 29.0}
+    assert quality.update(now=31.0) == "low"
+
+
+def test_pinned_mode_ignores_hold():
+    """Camera workers follow the service through set_mode and never decay on their own"""
+    quality = controller()
+    quality.set_mode("high", now=0.0)
+    assert quality.update(now=1000.0) == "high"
+    quality.set_mode("low", now=1001.0)
+    assert quality.mode == "low"
+    with pytest.raises(ValueError):
+        quality.set_mode("medium")
+
+
+def test_rate_cap_and_input_size():
+    quality = controller()
+    assert [quality.should_infer(now=t) for t in (0.0, 0.1, 0.2, 0.25)] == [True, False, True, False]
+    assert quality.inference_kwargs({"imgsz": 640})["imgsz"] == 320
+
+    quality.observe({"fire": 1.0}, now=0.3)
+    assert quality.should_infer(now=0.3) and quality.should_infer(now=0.31)
+    assert quality.inference_kwargs({"imgsz": 640})["imgsz"] == 640
+
+    fixed = controller(fixed_imgsz=640)
+    assert fixed.inference_kwargs({"imgsz": 640})["imgsz"] == 640
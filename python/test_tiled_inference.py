@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for the cross-tile NMS of tiled inference
+"""
+
+import numpy as np
+from tiled_inference import merge_detections
+
+
+def boxes(*rows):
+    return np.array(rows, dtype=np.float32)
+
+
+def test_merge_detections():
+    """Check duplicate and edge-fragment handling of merge_detections"""
+    print("Testing Tiled Inference NMS")
+    print("=" * 50)
+
+    # Test 1: overlapping duplicates from two tiles collapse to the best box
+    print("\n1. Overlapping duplicates:")
+    data = boxes([100, 100, 200, 300, 0.9, 0], [102, 98, 201, 305, 0.7, 0])
+    merged = merge_detections(data)
+    print(f"  {len(data)} boxes -> {merged.tolist()}")
+    assert len(merged) == 1 and merged[0, 4] == np.float32(0.9)
+
+    # Test 2: a higher-scoring edge fragment gives way to the full box around it
+    print("\n2. Edge fragment scoring above the full box:")
+    data = boxes([600, 0, 640, 100, 0.9, 0], [560, 0, 680, 100, 0.8, 0])
+    merged = merge_detections(data, edge_mask=np.array([True, False]))
+    print(f"  {len(data)} boxes -> {merged.tolist()}")
+    assert merged.tolist() == [[560, 0, 680, 100, np.float32(0.8), 0]]
+
+    # Test 3: a lower-scoring edge fragment is dropped by the full box
+    print("\n3. Edge fragment scoring below the full box:")
+    data = boxes([560, 0, 680, 100, 0.9, 0], [600, 0, 640, 100, 0.6, 0])
+    merged = merge_detections(data, edge_mask=np.array([False, True]))
+    print(f"  {len(data)} boxes -> {merged.tolist()}")
+    assert merged.tolist() == [[560, 0, 680, 100, np.float32(0.9), 0]]
+
+    # Test 4: a full box inside a larger one is a separate person, not a fragment
+    print("\n4. Small full box inside a larger full box:")
+    data = boxes([600, 0, 640, 100, 0.9, 0], [560, 0, 680, 100, 0.8, 0])
+    merged = merge_detections(data)
+    print(f"  {len(data)} boxes -> {merged.tolist()}")
+    assert len(merged) == 2
+
+    # Test 5: containment never crosses classes
+    print("\n5. Edge fragment of another class:")
+    data = boxes([600, 0, 640, 100, 0.9, 1], [560, 0, 680, 100, 0.8, 0])
+    merged = merge_detections(data, edge_mask=np.array([True, False]))
+    print(f"  {len(data)} boxes -> {merged.tolist()}")
+    assert len(merged) == 2
+
+    print("\n" + "=" * 50)
+    print("Test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_merge_detections()
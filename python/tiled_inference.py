@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tiled Inference
+High-resolution YOLO inference for dense crowds. Large frames are split into
+overlapping tiles that go through the model in one batch together with the
+whole frame; boxes are mapped back to frame coordinates and merged with
+cross-tile NMS. Tiling only switches on while the person count is high, so
+normal frames keep the cost of a single inference.
+"""
+
+from functools import lru_cache
+import numpy as np
+from detection_config import TILED_INFERENCE_SETTINGS
+
+PERSON_CLASS_ID = 0
+
+
+@lru_cache(maxsize=32)
+def tile_layout(width, height, tile_size, overlap):
+    """Tile rectangles (x1, y1, x2, y2) covering a frame, cached per resolution"""
+    def starts(length):
+        size = min(tile_size, length)
+        step = max(int(size * (1.0 - overlap)), 1)
+        count = max(int(np.ceil((length - size) / step)) + 1, 1)
+        return size, [int(round(x)) for x in np.linspace(0, length - size, count)]
+
+    tile_w, xs = starts(width)
+    tile_h, ys = starts(height)
+    return tuple((x, y, x + tile_w, y + tile_h) for y in ys for x in xs)
+
+
+def _box_data(result):
+    """(N, 6) x1, y1, x2, y2, conf, cls array from an ultralytics result"""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    data = boxes.data
+    data = data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)
+    return data[:, :6].astype(np.float32)
+
+
+def merge_detections(data, iou_threshold=0.5, edge_ios=0.6, edge_mask=None):
+    """Class-aware greedy NMS over boxes from all tiles and the full frame
+
+    Boxes flagged in edge_mask touch an interior tile border and may be a cut-off
+    part of a person; they are also dropped when most of their own area lies
+    inside another box of the same class (intersection over the edge box's area
+    > edge_ios), even when that box scores lower. Only edge boxes are removed by
+    containment, so a fragment never suppresses the full box around it.
+    """
+    if len(data) == 0:
+        return data
+    if edge_mask is None:
+        edge_mask = np.zeros(len(data), dtype=bool)
+    x1, y1, x2, y2, scores, classes = data.T
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    suppressed = np.zeros(len(data), dtype=bool)
+    keep = []
+
+    for i in np.argsort(-scores):
+        if suppressed[i]:
+            continue
+        suppressed[i] = True
+        same_class = classes == classes[i]
+        inter = (np.clip(np.minimum(x2[i], x2) - np.maximum(x1[i], x1), 0, None) *
+                 np.clip(np.minimum(y2[i], y2) - np.maximum(y1[i], y1), 0, None))
+        if edge_mask[i] and np.any(~suppressed & same_class & (inter / max(areas[i], 1e-9) > edge_ios)):
+            continue  # A fragment of a remaining box: keep that box instead
+        keep.append(i)
+        iou = inter / np.maximum(areas[i] + areas - inter, 1e-9)
+        contained = inter / np.maximum(areas, 1e-9)  # Share of each box inside box i
+        duplicate = (iou > iou_threshold) | (edge_mask & (contained > edge_ios))
+        suppressed |= duplicate & same_class
+    return data[np.sort(keep)]
+
+
+class TiledDetector:
+    """Drop-in for model(frame, **kwargs) that tiles large frames of dense scenes"""
+
+    def __init__(self, model, settings=None):
+        settings = dict(TILED_INFERENCE_SETTINGS, **(settings or {}))
+        self.model = model
+        self.enabled = settings["enabled"]
+        self.tile_size = getattr(model, "runtime_imgsz", None) or settings["tile_size"]
+        self.overlap = settings["overlap"]
+        self.min_frame_side = settings["min_frame_side"]
+        self.density_on = settings["density_on"]
+        self.density_off = settings["density_off"]
+        self.nms_iou = settings["nms_iou"]
+        self.edge_ios = settings["edge_ios"]
+        self.edge_margin = settings["edge_margin"]
+        # Exported models are built for batch 1 and get the images one at a time
+        self.batch = getattr(model, "runtime_backend", "pytorch") == "pytorch"
+
+        self.active = False
+        self.person_count = 0
+        self.tiled_frames = 0
+        self.full_frames = 0
+
+    def __call__(self, frame, **kwargs):
+        height, width = frame.shape[:2]
+        if not (self.enabled and self.active and max(height, width) >= self.min_frame_side):
+            results = self.model(frame, **kwargs)
+            self.full_frames += 1
+            self._update_density(_box_data(results[0]) if results else np.zeros((0, 6)))
+            return results
+
+        results = self._tiled(frame, width, height, kwargs)
+        self.tiled_frames += 1
+        self._update_density(_box_data(results[0]))
+        return results
+
+    def _update_density(self, data):
+        """Hysteresis on the person count: tile from density_on, stop below density_off"""
+        self.person_count = int(np.count_nonzero(data[:, 5] == PERSON_CLASS_ID))
+        if self.active:
+            self.active = self.person_count >= self.density_off
+        else:
+            self.active = self.person_count >= self.density_on
+
+    def _tiled(self, frame, width, height, kwargs):
+        layout = tile_layout(width, height, self.tile_size, self.overlap)
+        images = [frame] + [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in layout]
+        kwargs = dict(kwargs, imgsz=self.tile_size)
+        if self.batch:
+            results = self.model(images, **kwargs)
+        else:
+            results = [self.model(image, **kwargs)[0] for image in images]
+
+        parts = [_box_data(results[0])]
+        edges = [np.zeros(len(parts[0]), dtype=bool)]
+        margin = self.edge_margin
+        for (x1, y1, x2, y2), result in zip(layout, results[1:]):
+            data = _box_data(result)
+            data[:, [0, 2]] += x1
+            data[:, [1, 3]] += y1
+            # Borders shared with a neighbouring tile, not the frame border
+            edges.append(((x1 > 0) & (data[:, 0] <= x1 + margin)) |
+                         ((y1 > 0) & (data[:, 1] <= y1 + margin)) |
+                         ((x2 < width) & (data[:, 2] >= x2 - margin)) |
+                         ((y2 < height) & (data[:, 3] >= y2 - margin)))
+            parts.append(data)
+
+        merged = merge_detections(np.concatenate(parts), self.nms_iou, self.edge_ios, np.concatenate(edges))
+        import torch
+        full = results[0]
+        full.update(boxes=torch.from_numpy(np.ascontiguousarray(merged)))
+        return [full]
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "person_count": self.person_count,
+            "tiled_frames": self.tiled_frames,
+            "full_frames": self.full_frames
+        }
@@ -13,26 +13,52 @@ from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import threading
-import queue
 import os
-from ultralytics import YOLO
-from detection_config import TARGET_CLASSES, CLASS_MAPPING
+from detection_config import TARGET_CLASSES, CLASS_MAPPING, EXECUTION_SETTINGS, SERVER_SETTINGS, INFERENCE_PROFILES, \
+    MOTION_GATE_SETTINGS, CAMERA_ROIS, QUALITY_CONTROL_SETTINGS, ADMISSION_SETTINGS
+from detection_postprocess import extract_detections, detect_fallen_people, draw_detections
+from model_runtime import load_detection_model
+from inference_profiles import predict_kwargs, profile_for_model
+from motion_gate import MotionGate
+from tiled_inference import TiledDetector
+from roi_mask import RoiMask
+from frame_pipeline import FramePipeline
+from quality_controller import QualityController
+from admission_control import AdmissionController, LEVELS as ADMISSION_LEVELS
+from camera_workers import CameraWorkerPool
+from frame_sources import open_frame_source
+from service_metrics import ServiceMetrics
+from service_profiler import SamplingProfiler, MemoryTracker
+from async_server import ASYNC_MODE, ConnectionLimiter, FrameBroadcaster, MainLoopOutbox, start_native_thread
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import requests
 import re
+import hmac
+from functools import wraps
 from incident_service import incident_service
+from logging_setup import get_logger, setup_logging, LogThrottle, dropped_records
 
 # Load environment variables
 load_dotenv()
 
+if __name__ == '__main__':
+    setup_logging()  # Before the module-level service setup below starts logging
+logger = get_logger(__name__)
+
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:3000", "http://localhost:5173", "http://localhost:5174"], supports_credentials=True)
-socketio = SocketIO(app, cors_allowed_origins=["http://localhost:3000", "http://localhost:5173", "http://localhost:5174"])
+socketio = SocketIO(app, cors_allowed_origins=["http://localhost:3000", "http://localhost:5173", "http://localhost:5174"],
+                    async_mode=ASYNC_MODE)
+
+# Concurrent connection limits for video viewers and WebSocket clients
+stream_limiter = ConnectionLimiter(int(os.getenv('VIDEO_SERVICE_MAX_STREAMS', SERVER_SETTINGS["max_stream_connections"])))
+socket_limiter = ConnectionLimiter(int(os.getenv('VIDEO_SERVICE_MAX_SOCKETS', SERVER_SETTINGS["max_socket_connections"])))
+socket_clients = set()
 
 class VideoStreamingService:
     def __init__(self):
-        self.model = YOLO("yolov8n.pt")
+        self.model = load_detection_model()
         self.cameras = {}
         self.detection_results = {}
         self.running = False
@@ -58,9 +84,93 @@ class VideoStreamingService:
         self.RUNNING_SPEED_THRESHOLD = 1.5
         self.FALL_ASPECT_RATIO_THRESHOLD = 1.3  # Lowered from 1.8 to detect more fallen people
 
-        # Auto-configure Camo Studio on startup
-        self.auto_configure_camo_studio()
+        # Resolved per-camera inference profiles: camera_id -> (profile, model kwargs)
+        self.inference_profiles = {}
+        # Static ROI masks from camera config (or CAMERA_ROIS)
+        self.camera_rois = {}
+
+        # Motion gates skip inference on unchanged frames; worker cameras report their stats
+        self.motion_gate_enabled = os.getenv('VIDEO_SERVICE_MOTION_GATE', '1') != '0' and \
+            MOTION_GATE_SETTINGS["enabled"]
+        self.worker_gate_stats = {}
+
+        # Cameras run at low quality until a candidate event upshifts them
+        self.quality_control_enabled = os.getenv('VIDEO_SERVICE_QUALITY_CONTROL', '1') != '0' and \
+            QUALITY_CONTROL_SETTINGS["enabled"]
+        self.quality_controllers = {}
+
+        # Global inference budget; low-priority cameras are shed first under overload
+        self.admission = None
+        if os.getenv('VIDEO_SERVICE_ADMISSION', '1') != '0' and ADMISSION_SETTINGS["enabled"]:
+            budget = os.getenv('VIDEO_SERVICE_INFERENCE_BUDGET')
+            self.admission = AdmissionController.from_settings(
+                ADMISSION_SETTINGS, budget=float(budget) if budget else ADMISSION_SETTINGS["budget"],
+                fixed_imgsz=getattr(self.model, "runtime_imgsz", None), listener=self.on_admission_change)
+
+        # Prometheus-style metrics served on /metrics
+        self.metrics = ServiceMetrics()
+        self.detection_emits = self.metrics.socketio_emits.labels("detection_update")
+
+        # Per-frame log lines are rate limited per camera
+        self.log_throttle = LogThrottle()
+
+        # Annotated frames are encoded once per frame and shared by all viewers
+        self.frame_broadcaster = FrameBroadcaster(SERVER_SETTINGS["jpeg_quality"])
+
+        # With green-thread servers, camera threads hand storage and emits to the event loop
+        self.outbox = None
+        if ASYNC_MODE != "threading":
+            self.outbox = MainLoopOutbox(self.deliver_detections, socketio.sleep)
+            socketio.start_background_task(self.outbox.run)
+
+        # Execution mode: one thread per camera, or worker processes per camera
+        self.execution_mode = os.getenv('VIDEO_SERVICE_EXECUTION_MODE', EXECUTION_SETTINGS["mode"])
+        self.worker_pool = None
+        if self.execution_mode == "processes":
+            self.setup_worker_pool()
+
+        self.register_metric_callbacks()
+
+        # Auto-configure Camo Studio on startup (shard workers get cameras from the coordinator)
+        self.shard_worker_id = None
+        self.shard_assignment_version = None  # Echoed to the coordinator in /api/shard/health
+        if os.getenv('VIDEO_SERVICE_AUTODETECT', '1') != '0':
+            self.auto_configure_camo_studio()
         
+    def register_metric_callbacks(self):
+        """Gauges read from live service state when /metrics is scraped"""
+        def queue_depths():
+            depths = {"outbox": len(self.outbox) if self.outbox is not None else 0}
+            if self.worker_pool is not None:
+                depths["worker_results"] = self.worker_pool.result_queue.qsize()
+            return depths
+
+        self.metrics.register_callback("video_queue_depth", "Items waiting in internal queues",
+                                       queue_depths, ["queue"])
+        self.metrics.register_callback("video_outbox_dropped_total",
+                                       "Detection updates dropped because the event loop fell behind",
+                                       lambda: self.outbox.dropped if self.outbox is not None else 0,
+                                       type_name="counter")
+        self.metrics.register_callback("video_quality_mode_seconds_total",
+                                       "Seconds each camera spent in low and high quality mode",
+                                       self.quality_mode_seconds, ["camera", "mode"], type_name="counter")
+        self.metrics.register_callback("video_admission_level",
+                                       "Admission shedding level per camera (0 = not shed)",
+                                       self.admission_levels, ["camera"])
+        self.metrics.register_callback("video_active_cameras", "Cameras currently streaming",
+                                       lambda: len(self.cameras))
+        self.metrics.register_callback("video_stream_connections", "Open MJPEG viewer connections",
+                                       lambda: stream_limiter.active)
+        self.metrics.register_callback("video_websocket_connections", "Connected WebSocket clients",
+                                       lambda: socket_limiter.active)
+        self.metrics.register_callback("video_incident_cooldown_entries",
+                                       "Camera/event pairs in the incident cooldown window",
+                                       lambda: len(incident_service.recent_incidents))
+        self.metrics.register_callback("video_log_records_dropped_total",
+                                       "Log records dropped because the log writer fell behind",
+                                       dropped_records, type_name="counter")
+        self.metrics.register_process_metrics()
+
     def setup_mongodb(self):
         """Setup MongoDB connection"""
         try:
@@ -68,34 +178,96 @@ class VideoStreamingService:
             self.mongo_client = MongoClient(mongo_uri)
             self.db = self.mongo_client.get_default_database()
             self.video_detections = self.db.videodetections
-            print("MongoDB connected successfully")
+            logger.info("MongoDB connected successfully")
         except Exception as e:
-            print(f"MongoDB connection failed: {e}")
+            logger.warning(f"MongoDB connection failed: {e}")
             self.mongo_client = None
 
+    def setup_worker_pool(self):
+        """Start the multi-process camera worker pool and its result consumer"""
+        self.worker_pool = CameraWorkerPool(
+            "detection_postprocess:YoloDetectionProcessor",
+            processor_kwargs={
+                "model_path": self.model.runtime_path,
+                "confidence_threshold": self.CONFIDENCE_THRESHOLD,
+                "fall_aspect_ratio_threshold": self.FALL_ASPECT_RATIO_THRESHOLD
+            },
+            ring_slots=EXECUTION_SETTINGS["ring_slots"],
+            max_frame_shape=EXECUTION_SETTINGS["max_frame_shape"],
+            jpeg_slot_ratio=EXECUTION_SETTINGS["jpeg_slot_ratio"],
+            supervise_interval=EXECUTION_SETTINGS["supervise_interval"],
+            restart_backoff=EXECUTION_SETTINGS["restart_backoff"]
+        )
+        self.worker_pool.start()
+
+        if ASYNC_MODE == "threading":
+            consumer = threading.Thread(target=self.consume_worker_results)
+            consumer.daemon = True
+            consumer.start()
+        else:
+            socketio.start_background_task(self.consume_worker_results)
+        logger.info("Camera worker pool started (process-per-camera mode)")
+
+    def consume_worker_results(self):
+        """Publish detection results coming back from camera worker processes"""
+        # On green threads poll without blocking so the event loop keeps running
+        timeout = 0.5 if ASYNC_MODE == "threading" else 0
+        last_seqs = {}
+        while self.worker_pool is not None:
+            results = self.worker_pool.get_results(timeout=timeout)
+            for camera_id, result in results:
+                if camera_id in self.cameras:
+                    # Sequence gaps are frames the inference worker skipped
+                    seq = result["frame_seq"]
+                    previous = last_seqs.get(camera_id, seq - 1)
+                    last_seqs[camera_id] = seq
+                    self.metrics.frames_captured.labels(camera_id).inc(max(seq - previous, 1))
+                    if seq - previous > 1:
+                        self.metrics.frames_dropped.labels(camera_id).inc(seq - previous - 1)
+                    if result.get("motion_gate") is not None:
+                        self.worker_gate_stats[camera_id] = result["motion_gate"]
+                        decision = "skipped" if result.get("inference_skipped") else "inferred"
+                        self.metrics.motion_gate_frames.labels(camera_id, decision).inc()
+                    self.update_quality(camera_id)
+                    # Frames the admission cap dropped still count as demand
+                    if self.admission is not None and (result.get("admission_skipped") or
+                                                       not result.get("inference_skipped")):
+                        self.admission.offer(camera_id)
+                        if result.get("cost") is not None:
+                            self.admission.record(camera_id, **result["cost"])
+                    if result.get("inference_skipped"):
+                        continue  # Same detections as the last result, nothing to store or emit
+                    self.metrics.frame_processing_seconds.labels(camera_id).observe(
+                        result["processed_at"] - result["captured_at"])
+                    self.deliver_detections(camera_id, result["detections"])
+                    self.metrics.frame_latency_seconds.labels(camera_id).observe(
+                        time.time() - result["captured_at"])
+            if not results and timeout == 0:
+                socketio.sleep(0.01)
+
     def auto_configure_camo_studio(self):
         """Automatically detect and configure Camo Studio camera"""
-        print("🔍 Auto-detecting Camo Studio camera...")
+        logger.info("🔍 Auto-detecting Camo Studio camera...")
 
         camo_device = self.detect_camo_studio_device()
         if camo_device:
             self.camera_configs["camo_studio_01"]["source"] = camo_device["index"]
             self.camera_configs["camo_studio_01"]["name"] = camo_device["name"]
-            print(f"✅ Camo Studio auto-configured: {camo_device['name']} at device {camo_device['index']}")
+            logger.info(f"✅ Camo Studio auto-configured: {camo_device['name']} at device {camo_device['index']}")
         else:
-            print("❌ No Camo Studio camera detected. Please ensure:")
-            print("   1. Camo Studio app is running on your phone")
-            print("   2. Phone is connected via USB or WiFi")
-            print("   3. Camo Studio virtual camera is installed")
+            logger.warning("❌ No Camo Studio camera detected. Please ensure:")
+            logger.warning("   1. Camo Studio app is running on your phone")
+            logger.warning("   2. Phone is connected via USB or WiFi")
+            logger.warning("   3. Camo Studio virtual camera is installed")
             self.camera_configs["camo_studio_01"]["status"] = "error"
             
     def test_camera_connection(self, source):
         """Test if camera source is accessible"""
         try:
             if isinstance(source, str) and source.startswith('http'):
-                # Test IP camera/DroidCam
-                response = requests.get(source, timeout=5)
-                return response.status_code == 200
+                # Test IP camera/DroidCam (stream=True: MJPEG bodies never end)
+                with requests.get(source, timeout=5, stream=True) as response:
+                    return response.status_code == 200
             else:
                 # Test local camera with improved handling for virtual cameras
                 cap = cv2.VideoCapture(source)
@@ -115,7 +287,7 @@ class VideoStreamingService:
                     return False
                 return False
         except Exception as e:
-            print(f"Error testing camera {source}: {e}")
+            logger.error(f"Error testing camera {source}: {e}")
             return False
 
     def detect_available_cameras(self, max_devices=10):
@@ -158,7 +330,7 @@ class VideoStreamingService:
                     cap.release()
 
             except Exception as e:
-                print(f"Error testing device {device_index}: {e}")
+                logger.error(f"Error testing device {device_index}: {e}")
                 continue
 
         return available_devices
@@ -191,7 +363,7 @@ class VideoStreamingService:
                                 # Check if this looks like Camo Studio
                                 if width >= 1280 and height >= 720:  # HD resolution
                                     cap.release()
-                                    print(f"Found Camo Studio camera at device {device_index}")
+                                    logger.info(f"Found Camo Studio camera at device {device_index}")
                                     return {
                                         "index": device_index,
                                         "name": f"Camo Studio Camera (Device {device_index})",
@@ -214,11 +386,33 @@ class VideoStreamingService:
     def start_camera(self, camera_id):
         """Start a specific camera stream"""
         if camera_id not in self.camera_configs:
-            print(f"Camera {camera_id} not found in configurations")
+            logger.warning(f"Camera {camera_id} not found in configurations")
             return False
 
         config = self.camera_configs[camera_id]
-        print(f"Starting camera {camera_id} with source: {config['source']}")
+        logger.info(f"Starting camera {camera_id} with source: {config['source']}")
+
+        try:
+            self.set_inference_profile(camera_id)
+            self.camera_rois[camera_id] = RoiMask.from_config(config.get("roi"), camera_id)
+            quality_options = self.quality_options(config)
+            self.quality_controllers[camera_id] = QualityController.from_settings(
+                quality_options, fixed_imgsz=getattr(self.model, "runtime_imgsz", None)) if quality_options else None
+            if self.admission is not None:
+                self.admission.register(camera_id, config.get("priority"))
+        except (ValueError, TypeError) as e:
+            logger.error(f"Invalid configuration for camera {camera_id}: {e}")
+            config["status"] = "error"
+            return False
+
+        # In process mode the capture worker owns the device
+        if self.worker_pool is not None:
+            return self.start_worker_camera(camera_id, config)
+
+        # Offline sources: video files, image sequences and synthetic scenes
+        frame_source = open_frame_source(config["source"])
+        if frame_source is not None:
+            return self.start_frame_source_camera(camera_id, config, frame_source)
 
         # For Camo Studio cameras, try multiple approaches
         if "camo" in camera_id.lower():
@@ -226,7 +420,7 @@ class VideoStreamingService:
 
         # Test connection first for other cameras
         if not self.test_camera_connection(config["source"]):
-            print(f"Camera {camera_id} connection test failed")
+            logger.warning(f"Camera {camera_id} connection test failed")
             return False
 
         try:
@@ -245,29 +439,72 @@ class VideoStreamingService:
                 self.cameras[camera_id] = {
                     "capture": cap,
                     "config": config,
-                    "thread": None,
-                    "frame_queue": queue.Queue(maxsize=2)
+                    "thread": None
                 }
 
                 # Start processing thread
-                thread = threading.Thread(target=self.process_camera_stream, args=(camera_id,))
-                thread.daemon = True
-                thread.start()
-                self.cameras[camera_id]["thread"] = thread
+                self.cameras[camera_id]["thread"] = start_native_thread(self.process_camera_stream, (camera_id,))
 
                 config["status"] = "active"
-                print(f"Camera {camera_id} started successfully")
+                logger.info(f"Camera {camera_id} started successfully")
                 return True
         except Exception as e:
-            print(f"Error starting camera {camera_id}: {e}")
+            logger.error(f"Error starting camera {camera_id}: {e}")
 
         config["status"] = "error"
         return False
 
+    def start_frame_source_camera(self, camera_id, config, frame_source):
+        """Start a camera backed by an offline frame source"""
+        if not frame_source.isOpened():
+            logger.warning(f"Frame source for camera {camera_id} could not be opened")
+            config["status"] = "error"
+            return False
+
+        self.cameras[camera_id] = {
+            "capture": frame_source,
+            "config": config,
+            "thread": None
+        }
+        self.cameras[camera_id]["thread"] = start_native_thread(self.process_camera_stream, (camera_id,))
+
+        config["status"] = "active"
+        logger.info(f"Camera {camera_id} started from offline source")
+        return True
+
+    def start_worker_camera(self, camera_id, config):
+        """Start a camera through the multi-process worker pool"""
+        if config["source"] is None:
+            logger.warning(f"Camera {camera_id} has no source configured")
+            config["status"] = "error"
+            return False
+
+        if camera_id in self.cameras:
+            return True
+
+        self.worker_pool.add_camera(camera_id, config["source"], config.get("backend"),
+                                    processor_options={"inference": config.get("inference") or {},
+                                                       "motion_gate": self.motion_gate_options(config),
+                                                       "tiling": self.tiling_options(config),
+                                                       "roi": config.get("roi") or CAMERA_ROIS.get(camera_id),
+                                                       "quality": self.quality_options(config),
+                                                       "quality_mode": "low",
+                                                       "admission": self.admission_decision(camera_id)})
+        self.cameras[camera_id] = {
+            "capture": None,
+            "config": config,
+            "thread": None,
+            "worker": True
+        }
+
+        config["status"] = "active"
+        logger.info(f"Camera {camera_id} started in worker processes")
+        return True
+
     def start_camo_studio_camera(self, camera_id, config):
         """Special handling for Camo Studio cameras"""
         source = config["source"]
-        print(f"Attempting to start Camo Studio camera with device index: {source}")
+        logger.info(f"Attempting to start Camo Studio camera with device index: {source}")
 
         try:
             # Try different backends for virtual cameras
@@ -275,7 +512,7 @@ class VideoStreamingService:
 
             for backend in backends:
                 try:
-                    print(f"Trying backend: {backend}")
+                    logger.info(f"Trying backend: {backend}")
                     cap = cv2.VideoCapture(source, backend)
 
                     if cap.isOpened():
@@ -287,20 +524,17 @@ class VideoStreamingService:
                         for attempt in range(5):  # Try 5 times
                             ret, frame = cap.read()
                             if ret and frame is not None:
-                                print(f"Successfully connected to Camo Studio camera with backend {backend}")
+                                logger.info(f"Successfully connected to Camo Studio camera with backend {backend}")
 
                                 self.cameras[camera_id] = {
                                     "capture": cap,
                                     "config": config,
-                                    "thread": None,
-                                    "frame_queue": queue.Queue(maxsize=2)
+                                    "thread": None
                                 }
 
                                 # Start processing thread
-                                thread = threading.Thread(target=self.process_camera_stream, args=(camera_id,))
-                                thread.daemon = True
-                                thread.start()
-                                self.cameras[camera_id]["thread"] = thread
+                                self.cameras[camera_id]["thread"] = start_native_thread(
+                                    self.process_camera_stream, (camera_id,))
 
                                 config["status"] = "active"
                                 return True
@@ -310,109 +544,278 @@ class VideoStreamingService:
                     cap.release()
 
                 except Exception as e:
-                    print(f"Backend {backend} failed: {e}")
+                    logger.warning(f"Backend {backend} failed: {e}")
                     continue
 
-            print(f"All backends failed for Camo Studio camera {camera_id}")
+            logger.warning(f"All backends failed for Camo Studio camera {camera_id}")
             config["status"] = "error"
             return False
 
         except Exception as e:
-            print(f"Error starting Camo Studio camera {camera_id}: {e}")
+            logger.error(f"Error starting Camo Studio camera {camera_id}: {e}")
             config["status"] = "error"
             return False
         
+    def set_inference_profile(self, camera_id, spec=None):
+        """Validate and apply a camera's inference spec, raises ValueError
+
+        Without spec the camera config's "inference" entry is used. Running
+        cameras pick the new profile up on their next frame.
+        """
+        config = self.camera_configs[camera_id]
+        spec = dict(config.get("inference") or {}) if spec is None else dict(spec)
+        profile = profile_for_model(self.model, spec)
+        config["inference"] = spec
+        self.inference_profiles[camera_id] = (profile, predict_kwargs(profile))
+
+        camera = self.cameras.get(camera_id, {})
+        if camera.get("worker"):
+            self.worker_pool.configure_camera(camera_id, inference=spec)
+        elif camera.get("motion_gate") is not None:
+            camera["motion_gate"].force()
+        return profile
+
+    def motion_gate_options(self, config):
+        """Gate settings for a camera config, None when gating is off for it"""
+        overrides = config.get("motion_gate", {})
+        if not self.motion_gate_enabled or overrides is False:
+            return None
+        return dict(MOTION_GATE_SETTINGS, **(overrides if isinstance(overrides, dict) else {}))
+
+    def quality_options(self, config):
+        """Quality control settings for a camera config, None when it always runs at full quality"""
+        overrides = config.get("quality", {})
+        if not self.quality_control_enabled or overrides is False:
+            return None
+        return dict(QUALITY_CONTROL_SETTINGS, **(overrides if isinstance(overrides, dict) else {}))
+
+    def update_quality(self, camera_id, scores=None):
+        """Feed candidate event scores to a camera's quality controller and apply mode changes"""
+        controller = self.quality_controllers.get(camera_id)
+        if controller is None:
+            return None
+        previous = controller.mode
+        if scores:
+            controller.observe(scores)
+        mode = controller.update()
+        if mode != previous:
+            if mode == "high":
+                logger.info(f"🔼 Camera {camera_id} upshifted to full quality ({controller.last_trigger})")
+            else:
+                logger.info(f"🔽 Camera {camera_id} back to low quality")
+            if self.cameras.get(camera_id, {}).get("worker"):
+                self.worker_pool.configure_camera(camera_id, quality_mode=mode)
+        return mode
+
+    def quality_stats(self):
+        """Quality mode and time spent per mode for running cameras"""
+        return {camera_id: controller.stats() for camera_id, controller in list(self.quality_controllers.items())
+                if controller is not None and camera_id in self.cameras}
+
+    def quality_mode_seconds(self):
+        return {(camera_id, mode): seconds for camera_id, stats in self.quality_stats().items()
+                for mode, seconds in stats["seconds"].items()}
+
+    def admission_decision(self, camera_id):
+        """Current shedding decision of a camera as a dict, None when admission is off"""
+        if self.admission is None or camera_id not in self.admission.cameras:
+            return None
+        return self.admission.cameras[camera_id].decision.as_dict()
+
+    def on_admission_change(self, camera_id, decision):
+        """Log a new shedding decision and hand it to the camera's worker"""
+        if decision.level == "full":
+            logger.info(f"📈 Camera {camera_id} admitted at full quality")
+        else:
+            logger.warning(f"📉 Camera {camera_id} shed to {decision.level} "
+                           f"(fps={decision.fps}, imgsz={decision.imgsz}, tiling={decision.tiling})")
+        if self.cameras.get(camera_id, {}).get("worker"):
+            self.worker_pool.configure_camera(camera_id, admission=decision.as_dict())
+
+    def admission_levels(self):
+        if self.admission is None:
+            return {}
+        return {camera_id: ADMISSION_LEVELS.index(camera["level"])
+                for camera_id, camera in self.admission.stats()["cameras"].items()}
+
+    def tiling_options(self, config):
+        """Tiled inference overrides from a camera config ("tiling": false disables it)"""
+        tiling = config.get("tiling", {})
+        return {"enabled": False} if tiling is False else dict(tiling or {})
+
+    def tiling_stats(self):
+        """Tiled inference state per camera (thread execution mode)"""
+        return {camera_id: camera["tiler"].stats() for camera_id, camera in list(self.cameras.items())
+                if camera.get("tiler") is not None}
+
+    def motion_gate_stats(self):
+        """Gate hit rates per camera"""
+        stats = dict(self.worker_gate_stats)
+        for camera_id, camera in list(self.cameras.items()):
+            if camera.get("motion_gate") is not None:
+                stats[camera_id] = camera["motion_gate"].stats()
+        return stats
+
     def stop_camera(self, camera_id):
         """Stop a specific camera stream"""
         if camera_id in self.cameras:
             camera = self.cameras[camera_id]
             if camera["capture"]:
                 camera["capture"].release()
+            if camera.get("worker"):
+                self.worker_pool.remove_camera(camera_id)
             self.camera_configs[camera_id]["status"] = "inactive"
             del self.cameras[camera_id]
-            print(f"Camera {camera_id} stopped")
+            self.worker_gate_stats.pop(camera_id, None)
+            self.quality_controllers.pop(camera_id, None)
+            if self.admission is not None:
+                self.admission.unregister(camera_id)
+            self.frame_broadcaster.remove(camera_id)
+            logger.info(f"Camera {camera_id} stopped")
             
+    def assign_cameras(self, camera_configs, worker_id=None, version=None):
+        """Replace this worker's camera set with the coordinator's assignment"""
+        assigned = {config["id"]: config for config in camera_configs}
+        self.shard_worker_id = worker_id
+
+        # Release cameras that moved to another worker
+        for camera_id in list(self.camera_configs):
+            if camera_id not in assigned:
+                self.stop_camera(camera_id)
+                del self.camera_configs[camera_id]
+                self.detection_results.pop(camera_id, None)
+                self.inference_profiles.pop(camera_id, None)
+                self.camera_rois.pop(camera_id, None)
+
+        started = []
+        for camera_id, config in assigned.items():
+            autostart = config.pop("autostart", False)
+            if camera_id not in self.camera_configs:
+                self.camera_configs[camera_id] = dict(config, status="inactive")
+            elif camera_id not in self.cameras:
+                self.camera_configs[camera_id].update(config, status="inactive")
+            else:
+                # Running cameras take a new inference profile live; other changes
+                # (source, roi, quality, ...) are applied by restarting the camera
+                current = self.camera_configs[camera_id]
+                changed = sorted(key for key in (set(config) | set(current)) - {"status", "inference"}
+                                 if config.get(key) != current.get(key))
+                if changed:
+                    logger.info(f"🔄 Restarting camera {camera_id} for changed {', '.join(changed)}")
+                    self.stop_camera(camera_id)
+                    current.clear()
+                    current.update(config, status="inactive")
+                    autostart = True
+                elif config.get("inference", {}) != current.get("inference", {}):
+                    try:
+                        self.set_inference_profile(camera_id, config.get("inference"))
+                    except ValueError as e:
+                        logger.error(f"Ignoring invalid inference profile for camera {camera_id}: {e}")
+
+            if autostart and camera_id not in self.cameras and self.start_camera(camera_id):
+                started.append(camera_id)
+
+        self.shard_assignment_version = version
+        logger.info(f"📦 Shard assignment {version}: {len(assigned)} camera(s), started {started}")
+        return list(assigned), started
+
     def process_camera_stream(self, camera_id):
         """Process video stream from a specific camera"""
         camera = self.cameras[camera_id]
         cap = camera["capture"]
         config = camera["config"]
+
+        # Resolve metric children once; per-frame updates are plain increments
+        frames_captured = self.metrics.frames_captured.labels(camera_id)
+        capture_fps = self.metrics.capture_fps.labels(camera_id)
+        inference_seconds = self.metrics.inference_seconds.labels(camera_id)
+        processing_seconds = self.metrics.frame_processing_seconds.labels(camera_id)
+        latency_seconds = self.metrics.frame_latency_seconds.labels(camera_id)
+        gate_inferred = self.metrics.motion_gate_frames.labels(camera_id, "inferred")
+        gate_skipped = self.metrics.motion_gate_frames.labels(camera_id, "skipped")
+        fps_window_start = time.perf_counter()
+
+        gate_options = self.motion_gate_options(config)
+        gate = camera["motion_gate"] = MotionGate.from_settings(gate_options) if gate_options else None
+        tiler = camera["tiler"] = TiledDetector(self.model, self.tiling_options(config))
+        quality = self.quality_controllers.get(camera_id)
+        admission = (lambda: self.admission.offer(camera_id)) if self.admission is not None else None
+        pipeline = FramePipeline(self.model, tiler, self.camera_rois[camera_id], gate, quality, admission)
+        detections = []
         
         while camera_id in self.cameras:
             ret, frame = cap.read()
             if not ret:
-                print(f"Failed to read from camera {camera_id}")
+                self.metrics.read_failures.labels(camera_id).inc()
+                logger.warning(f"Failed to read from camera {camera_id}")
                 break
-                
-            # Run YOLO detection
-            results = self.model(frame, conf=self.CONFIDENCE_THRESHOLD)
+            captured_at = time.perf_counter()
+            frames_captured.inc()
+            if frames_captured.value % 30 == 0:
+                capture_fps.set(30 / max(captured_at - fps_window_start, 1e-6))
+                fps_window_start = captured_at
+
+            # Run YOLO detection with the camera's current inference profile, unless the
+            # quality rate cap, motion gate or admission cap skips the frame
+            if quality is not None:
+                self.update_quality(camera_id)
+            profile, requested_kwargs = self.inference_profiles[camera_id]
+            outcome = pipeline.run(frame, requested_kwargs)
+            if outcome.motion is not None:
+                (gate_inferred if outcome.motion else gate_skipped).inc()
+            if outcome.skipped is not None:
+                # Show the last detections without inference, storage or emits
+                self.frame_broadcaster.publish(camera_id, self.draw_detections(frame, detections))
+                time.sleep(0.033)
+                continue
+            inference_seconds.observe(time.perf_counter() - captured_at)
+            if outcome.cost is not None:
+                self.admission.record(camera_id, **outcome.cost)
             
             # Process detections
-            detections = self.process_detections(results, frame, camera_id)
-            
-            # Store detection results
-            self.detection_results[camera_id] = {
-                "timestamp": time.time(),
-                "detections": detections,
-                "camera_info": config
-            }
+            detections = self.process_detections(outcome.results, frame, camera_id, profile["conf"])
             
             # Draw bounding boxes on frame
-            print(f"DEBUG: Drawing {len(detections)} detections on frame for camera {camera_id}")
             annotated_frame = self.draw_detections(frame, detections)
+            processing_seconds.observe(time.perf_counter() - captured_at)
             
-            # Add frame to queue for streaming
-            if not camera["frame_queue"].full():
-                try:
-                    camera["frame_queue"].put_nowait(annotated_frame)
-                except queue.Full:
-                    pass
-                    
-            # Store in MongoDB
-            self.store_detection_results(camera_id, detections)
-            
-            # Emit real-time detection data via WebSocket
-            self.emit_detection_data(camera_id, detections)
+            # Share the frame with all video viewers
+            self.frame_broadcaster.publish(camera_id, annotated_frame)
+
+            # Store, persist and broadcast detection results
+            self.publish_detections(camera_id, detections)
+            latency_seconds.observe(time.perf_counter() - captured_at)
             
             time.sleep(0.033)  # ~30 FPS
-            
-    def process_detections(self, results, frame, camera_id):
+
+    def publish_detections(self, camera_id, detections):
+        """Record latest detections, store them in MongoDB and emit them"""
+        if self.outbox is not None:
+            self.outbox.put(camera_id, detections)
+        else:
+            self.deliver_detections(camera_id, detections)
+
+    def deliver_detections(self, camera_id, detections):
+        """Update latest results, persist and broadcast (runs on the server loop)"""
+        self.detection_results[camera_id] = {
+            "timestamp": time.time(),
+            "detections": detections,
+            "camera_info": self.camera_configs.get(camera_id, {})
+        }
+
+        # Store in MongoDB
+        self.store_detection_results(camera_id, detections)
+
+        # Emit real-time detection data via WebSocket
+        self.emit_detection_data(camera_id, detections)
+
+    def process_detections(self, results, frame, camera_id, confidence_threshold=None):
         """Process YOLO detection results"""
-        detections = []
-        raw_detections_count = 0
-
-        for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    # Get bounding box coordinates
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    confidence = box.conf[0].cpu().numpy()
-                    class_id = int(box.cls[0].cpu().numpy())
-                    raw_detections_count += 1
-
-                    # Debug: Print what YOLO is actually detecting
-                    if raw_detections_count <= 5:  # Only print first 5 to avoid spam
-                        print(f"YOLO detected: class_id={class_id}, confidence={confidence:.2f}")
-
-                    # For now, let's detect ALL objects above confidence threshold, not just mapped ones
-                    if confidence >= self.CONFIDENCE_THRESHOLD:
-                        # Get class name from YOLO model
-                        class_name = self.model.names.get(class_id, f"class_{class_id}")
-
-                        # Use mapped label if available, otherwise use original class name
-                        label = CLASS_MAPPING.get(class_id, class_name)
-
-                        detection = {
-                            "label": label,
-                            "confidence": float(confidence),
-                            "bbox": [float(x1), float(y1), float(x2-x1), float(y2-y1)],
-                            "camera_id": camera_id,
-                            "timestamp": time.time(),
-                            "original_class": class_name,
-                            "class_id": class_id
-                        }
-                        detections.append(detection)
+        if confidence_threshold is None:
+            confidence_threshold = self.CONFIDENCE_THRESHOLD
+        detections, raw_detections_count = extract_detections(
+            results, self.model.names, camera_id, confidence_threshold
+        )
 
         # Add fallen person detection based on person bounding boxes
         fallen_detections = self.detect_fallen_people(results)
@@ -422,89 +825,25 @@ class VideoStreamingService:
 
         # Debug: Print detection summary
         if raw_detections_count > 0:
-            print(f"Camera {camera_id}: {raw_detections_count} raw detections, {len(detections)} processed detections")
+            self.log_throttle.debug(logger, ("detections", camera_id), "Camera %s: %d raw detections, %d processed detections",
+                                   camera_id, raw_detections_count, len(detections))
 
         return detections
 
     def detect_fallen_people(self, results):
         """Detect fallen people based on bounding box aspect ratio"""
-        fallen_detections = []
-
-        for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    class_id = int(box.cls[0].cpu().numpy())
-
-                    # Only check person class (class_id = 0 in COCO)
-                    if class_id == 0:  # person class
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = box.conf[0].cpu().numpy()
-
-                        width = x2 - x1
-                        height = y2 - y1
-
-                        if width > 0 and height > 0:
-                            aspect_ratio = width / height
-
-                            # Check if person is lying down (wide bounding box)
-                            if aspect_ratio > self.FALL_ASPECT_RATIO_THRESHOLD:
-                                # Improved confidence calculation for better sensitivity
-                                base_confidence = 0.6
-                                ratio_bonus = (aspect_ratio - self.FALL_ASPECT_RATIO_THRESHOLD) * 0.4
-                                fallen_confidence = min(base_confidence + ratio_bonus, 1.0)
-
-                                fallen_detection = {
-                                    "label": "fallen",
-                                    "confidence": float(fallen_confidence),
-                                    "bbox": [float(x1), float(y1), float(width), float(height)],
-                                    "camera_id": "unknown",  # Will be set by caller
-                                    "timestamp": time.time(),
-                                    "aspect_ratio": float(aspect_ratio)
-                                }
-                                fallen_detections.append(fallen_detection)
-
-        return fallen_detections
+        return detect_fallen_people(results, self.FALL_ASPECT_RATIO_THRESHOLD)
 
     def draw_detections(self, frame, detections):
         """Draw bounding boxes and labels on frame"""
-        annotated_frame = frame.copy()
-        
-        for detection in detections:
-            x, y, w, h = detection["bbox"]
-            x, y, w, h = int(x), int(y), int(w), int(h)
-            
-            # Choose color based on detection type
-            color_map = {
-                "fire": (0, 0, 255),      # Red
-                "smoke": (128, 128, 128),  # Gray
-                "running": (0, 255, 0),    # Green
-                "fallen": (255, 0, 0),     # Blue
-                "medical emergency": (255, 0, 255),  # Magenta
-                "stampede": (0, 255, 255), # Cyan
-                "person": (0, 255, 0),     # Green for people
-                "laptop": (255, 255, 0),   # Yellow for laptops
-                "chair": (128, 255, 128),  # Light green for furniture
-                "tv": (255, 128, 0),       # Orange for electronics
-            }
-
-            color = color_map.get(detection["label"], (255, 255, 255))  # White for unknown
-            
-            # Draw bounding box
-            cv2.rectangle(annotated_frame, (x, y), (x + w, y + h), color, 2)
-            
-            # Draw label
-            label = f"{detection['label']}: {detection['confidence']:.2f}"
-            cv2.putText(annotated_frame, label, (x, y - 10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-
-        return annotated_frame
+        return draw_detections(frame, detections)
 
     def store_detection_results(self, camera_id, detections):
         """Store detection results in MongoDB"""
         if not self.mongo_client or not detections:
             return
 
+        write_start = time.perf_counter()
         try:
             # Prepare frame result
             frame_result = {
@@ -535,8 +874,10 @@ class VideoStreamingService:
                 }
                 self.video_detections.insert_one(new_doc)
 
+            self.metrics.mongo_write_seconds.observe(time.perf_counter() - write_start)
         except Exception as e:
-            print(f"Error storing detection results: {e}")
+            self.metrics.mongo_write_errors.inc()
+            self.log_throttle.warning(logger, "mongo_error", "Error storing detection results: %s", e)
 
     def emit_detection_data(self, camera_id, detections):
         """Emit real-time detection data via WebSocket"""
@@ -572,6 +913,12 @@ class VideoStreamingService:
                 detection_summary["stampede"]["confidence"] = min(1.0, person_count / 30.0)
                 detection_summary["stampede"]["status"] = "detected"
 
+            # Candidate events below the alert thresholds upshift the camera's quality
+            candidate_scores = {label: summary["confidence"] for label, summary in detection_summary.items()}
+            people_in_view = sum(1 for detection in detections if detection["label"] == "person")
+            candidate_scores["stampede"] = max(candidate_scores["stampede"], people_in_view / self.STAMPEDE_THRESHOLD)
+            self.update_quality(camera_id, candidate_scores)
+
             # Prepare detection update data
             detection_update = {
                 "camera_id": camera_id,
@@ -582,8 +929,10 @@ class VideoStreamingService:
             }
 
             # Emit to connected clients
-            print(f"DEBUG: Emitting detection_update for camera {camera_id}: {len(detections)} detections")
+            self.log_throttle.debug(logger, ("emit", camera_id), "Emitting detection_update for camera %s: %d detections",
+                                   camera_id, len(detections))
             socketio.emit('detection_update', detection_update)
+            self.detection_emits.inc()
 
             # Process for incident creation
             incident_service.process_detection_update(detection_update)
@@ -592,7 +941,7 @@ class VideoStreamingService:
             self.send_alert_to_backend(detection_update)
 
         except Exception as e:
-            print(f"Error emitting detection data: {e}")
+            logger.exception("Error emitting detection data: %s", e)
 
     def update_droidcam_ip(self, camera_id, ip_address, camera_name=None):
         """Update DroidCam IP address and optionally name"""
@@ -634,9 +983,9 @@ class VideoStreamingService:
             camo_device = self.detect_camo_studio_device()
             if camo_device:
                 device_index = camo_device["index"]
-                print(f"Auto-detected Camo Studio at device {device_index}")
+                logger.info(f"Auto-detected Camo Studio at device {device_index}")
             else:
-                print("No Camo Studio camera detected")
+                logger.info("No Camo Studio camera detected")
                 return False
 
         # Ensure device_index is an integer
@@ -645,7 +994,7 @@ class VideoStreamingService:
 
             # Verify this is actually Camo Studio by testing the camera
             if device_index == 0:
-                print("Device index 0 detected - verifying this is Camo Studio...")
+                logger.info("Device index 0 detected - verifying this is Camo Studio...")
                 # Test if device 0 has HD resolution (indicates Camo Studio)
                 test_cap = cv2.VideoCapture(device_index)
                 if test_cap.isOpened():
@@ -654,23 +1003,23 @@ class VideoStreamingService:
                     test_cap.release()
 
                     if width >= 1280 and height >= 720:
-                        print(f"✅ Device 0 confirmed as Camo Studio: {width}x{height}")
+                        logger.info(f"✅ Device 0 confirmed as Camo Studio: {width}x{height}")
                     else:
-                        print(f"⚠️  Device 0 appears to be built-in camera: {width}x{height}")
-                        print("Proceeding anyway as requested...")
+                        logger.warning(f"⚠️  Device 0 appears to be built-in camera: {width}x{height}")
+                        logger.warning("Proceeding anyway as requested...")
                 else:
-                    print("❌ Could not test device 0")
+                    logger.warning("❌ Could not test device 0")
                     return False
 
             self.camera_configs[camera_id]["source"] = device_index
             if camera_name:
                 self.camera_configs[camera_id]["name"] = camera_name
 
-            print(f"Camo Studio configured: device {device_index}")
+            logger.info(f"Camo Studio configured: device {device_index}")
             return True
 
         except ValueError:
-            print(f"Invalid device index: {device_index}")
+            logger.warning(f"Invalid device index: {device_index}")
             return False
 
     def send_alert_to_backend(self, detection_update):
@@ -702,22 +1051,29 @@ class VideoStreamingService:
                 }
 
                 # Send POST request to backend
+                request_start = time.perf_counter()
                 response = requests.post(
                     backend_url,
                     json=alert_data,
                     headers={'Content-Type': 'application/json'},
                     timeout=5
                 )
+                self.metrics.backend_alert_seconds.observe(time.perf_counter() - request_start)
 
                 if response.status_code == 200:
-                    print(f"✅ Alert sent to backend for events: {[event[0] for event in high_confidence_events]}")
+                    self.metrics.backend_alerts.labels("sent").inc()
+                    self.log_throttle.info(logger, ("alert_sent", detection_update.get('camera_id')),
+                                           "✅ Alert sent to backend for events: %s",
+                                           [event[0] for event in high_confidence_events])
                 else:
-                    print(f"❌ Failed to send alert to backend: {response.status_code}")
+                    self.metrics.backend_alerts.labels("failed").inc()
+                    self.log_throttle.warning(logger, "alert_failed", "❌ Failed to send alert to backend: %s", response.status_code)
 
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error sending alert to backend: {e}")
+            self.metrics.backend_alerts.labels("error").inc()
+            self.log_throttle.warning(logger, "alert_error", "❌ Error sending alert to backend: %s", e)
         except Exception as e:
-            print(f"❌ Unexpected error sending alert: {e}")
+            logger.exception("❌ Unexpected error sending alert: %s", e)
 
 # Global service instance
 video_service = VideoStreamingService()
@@ -725,7 +1081,7 @@ video_service = VideoStreamingService()
 @app.route('/api/cameras', methods=['GET'])
 def get_cameras():
     """Get list of available cameras"""
-    print("DEBUG: GET /api/cameras called")
+    logger.debug("GET /api/cameras called")
     return jsonify({
         "success": True,
         "data": list(video_service.camera_configs.values())
@@ -749,21 +1105,79 @@ def stop_camera(camera_id):
         "message": f"Camera {camera_id} stopped"
     })
 
+@app.route('/api/cameras/<camera_id>/inference', methods=['GET'])
+def get_camera_inference(camera_id):
+    """Get a camera's inference profile (input size, classes, thresholds)"""
+    if camera_id not in video_service.camera_configs:
+        return jsonify({"success": False, "message": f"Camera {camera_id} not found"}), 404
+    spec = video_service.camera_configs[camera_id].get("inference") or {}
+    try:
+        profile = profile_for_model(video_service.model, spec)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({
+        "success": True,
+        "data": {"spec": spec, "profile": profile, "profiles": INFERENCE_PROFILES}
+    })
+
+@app.route('/api/cameras/<camera_id>/inference', methods=['PUT', 'POST'])
+def update_camera_inference(camera_id):
+    """Change a camera's inference profile without restarting it
+
+    Fields in the body override the current spec; null removes an override and
+    selecting a "profile" starts from that profile's defaults.
+    """
+    if camera_id not in video_service.camera_configs:
+        return jsonify({"success": False, "message": f"Camera {camera_id} not found"}), 404
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Body must be a JSON object of profile fields"}), 400
+    spec = {} if "profile" in data else dict(video_service.camera_configs[camera_id].get("inference") or {})
+    spec.update(data)
+    spec = {key: value for key, value in spec.items() if value is not None}
+    try:
+        profile = video_service.set_inference_profile(camera_id, spec)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    logger.info(f"🎯 Camera {camera_id} inference profile: {profile}")
+    return jsonify({
+        "success": True,
+        "data": {"spec": spec, "profile": profile}
+    })
+
 def generate_video_stream(camera_id):
     """Generate video stream for a specific camera"""
+    if video_service.cameras.get(camera_id, {}).get("worker"):
+        yield from generate_worker_video_stream(camera_id)
+        return
+
+    last_seq = 0
     while camera_id in video_service.cameras:
-        camera = video_service.cameras[camera_id]
         try:
-            frame = camera["frame_queue"].get(timeout=1)
-            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if ret:
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-        except queue.Empty:
-            continue
+            item = video_service.frame_broadcaster.get_jpeg(camera_id, last_seq)
         except Exception as e:
-            print(f"Error in video stream for {camera_id}: {e}")
+            logger.error(f"Error in video stream for {camera_id}: {e}")
             break
+        if item is None:
+            socketio.sleep(SERVER_SETTINGS["stream_poll_interval"])
+            continue
+
+        last_seq, jpeg = item
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+
+def generate_worker_video_stream(camera_id):
+    """Stream JPEG frames encoded by a camera's worker process"""
+    last_seq = 0
+    while camera_id in video_service.cameras:
+        item = video_service.worker_pool.read_jpeg(camera_id, last_seq)
+        if item is None:
+            socketio.sleep(SERVER_SETTINGS["stream_poll_interval"])
+            continue
+
+        last_seq, jpeg = item
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
 
 @app.route('/api/video_feed/<camera_id>')
 def video_feed(camera_id):
@@ -771,9 +1185,156 @@ def video_feed(camera_id):
     if camera_id not in video_service.cameras:
         return jsonify({"error": "Camera not found or not active"}), 404
 
-    return Response(generate_video_stream(camera_id),
+    if not stream_limiter.acquire():
+        return jsonify({"error": "Too many concurrent video viewers"}), 503
+
+    def limited_stream():
+        try:
+            yield from generate_video_stream(camera_id)
+        finally:
+            stream_limiter.release()
+
+    return Response(limited_stream(),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+# Admin diagnostics, disabled unless VIDEO_SERVICE_ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv('VIDEO_SERVICE_ADMIN_TOKEN', '')
+MAX_PROFILE_SECONDS = 60
+MAX_PROFILE_HZ = 1000
+sampling_profiler = SamplingProfiler()
+memory_tracker = MemoryTracker()
+
+def admin_required(view):
+    """Require the admin token in X-Admin-Token or an Authorization bearer header"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({"success": False, "message": "Admin routes are disabled"}), 403
+        supplied = request.headers.get('X-Admin-Token', '')
+        auth_header = request.headers.get('Authorization', '')
+        if auth_header.startswith('Bearer '):
+            supplied = auth_header[len('Bearer '):]
+        if not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+            return jsonify({"success": False, "message": "Invalid admin token"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+# Shard assignment, disabled unless VIDEO_SERVICE_SHARD_TOKEN is set (shared with the coordinator)
+SHARD_TOKEN = os.getenv('VIDEO_SERVICE_SHARD_TOKEN', '')
+
+def shard_token_required(view):
+    """Require the coordinator's shard token in X-Shard-Token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not SHARD_TOKEN:
+            return jsonify({"success": False, "message": "Shard assignment is disabled"}), 403
+        supplied = request.headers.get('X-Shard-Token', '')
+        if not hmac.compare_digest(supplied.encode(), SHARD_TOKEN.encode()):
+            return jsonify({"success": False, "message": "Invalid shard token"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def positive_arg(name, default, cast, maximum):
+    """Query argument as a number in (0, maximum], larger values are clamped; ValueError otherwise"""
+    raw = request.args.get(name, default)
+    try:
+        value = cast(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got '{raw}'")
+    if not value > 0:  # Also rejects NaN
+        raise ValueError(f"{name} must be greater than 0 (at most {maximum})")
+    return min(value, maximum)
+
+@app.route('/api/admin/profile', methods=['GET', 'POST'])
+@admin_required
+def profile_service():
+    """Sample thread stacks for N seconds, returns collapsed stacks or JSON"""
+    try:
+        seconds = positive_arg('seconds', 10, float, MAX_PROFILE_SECONDS)
+        hz = positive_arg('hz', 100, int, MAX_PROFILE_HZ)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    match = request.args.get('match') or None
+    try:
+        stacks, stats = sampling_profiler.sample(seconds, hz, match)
+    except RuntimeError as e:
+        return jsonify({"success": False, "message": str(e)}), 409
+
+    if request.args.get('format', 'collapsed') == 'json':
+        return jsonify({
+            "success": True,
+            "data": {
+                "stats": stats,
+                "top_functions": sampling_profiler.top_functions(stacks),
+                "collapsed": sampling_profiler.to_collapsed(stacks)
+            }
+        })
+    return Response(sampling_profiler.to_collapsed(stacks), mimetype='text/plain')
+
+@app.route('/api/admin/tracemalloc/start', methods=['POST'])
+@admin_required
+def start_tracemalloc():
+    """Start tracing allocations (frames = traceback depth)"""
+    try:
+        frames = positive_arg('frames', 10, int, 100)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    memory_tracker.start(frames)
+    return jsonify({"success": True, "message": "tracemalloc started"})
+
+@app.route('/api/admin/tracemalloc/snapshot', methods=['GET'])
+@admin_required
+def tracemalloc_snapshot():
+    """Top allocation sites, diffed against the previous snapshot"""
+    try:
+        limit = positive_arg('limit', 25, int, 1000)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    try:
+        report = memory_tracker.snapshot(request.args.get('key', 'lineno'), limit)
+    except RuntimeError as e:
+        return jsonify({"success": False, "message": str(e)}), 409
+    except ValueError as e:  # Unknown key type
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({"success": True, "data": report})
+
+@app.route('/api/admin/tracemalloc/stop', methods=['POST'])
+@admin_required
+def stop_tracemalloc():
+    """Stop tracing allocations and drop the baseline snapshot"""
+    memory_tracker.stop()
+    return jsonify({"success": True, "message": "tracemalloc stopped"})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of service metrics"""
+    return Response(video_service.metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/server/stats', methods=['GET'])
+def get_server_stats():
+    """Get server mode and concurrent connection counts"""
+    return jsonify({
+        "success": True,
+        "data": {
+            "async_mode": socketio.async_mode,
+            "video_streams": {"active": stream_limiter.active, "limit": stream_limiter.limit,
+                              "rejected": stream_limiter.rejected},
+            "websockets": {"active": socket_limiter.active, "limit": socket_limiter.limit,
+                           "rejected": socket_limiter.rejected},
+            "active_cameras": list(video_service.cameras),
+            "motion_gate": video_service.motion_gate_stats(),
+            "tiling": video_service.tiling_stats(),
+            "quality": video_service.quality_stats()
+        }
+    })
+
+@app.route('/api/admission', methods=['GET'])
+def get_admission():
+    """Inference budget, measured demand and each camera's shedding decision"""
+    if video_service.admission is None:
+        return jsonify({"success": True, "data": {"enabled": False}})
+    return jsonify({"success": True, "data": dict(video_service.admission.stats(), enabled=True)})
+
 @app.route('/api/cameras/<camera_id>/detections', methods=['GET'])
 def get_camera_detections(camera_id):
     """Get latest detection results for a camera"""
@@ -787,6 +1348,44 @@ def get_camera_detections(camera_id):
         "message": "No detection data available for this camera"
     })
 
+@app.route('/api/workers', methods=['GET'])
+def get_worker_status():
+    """Get camera worker process status (process execution mode only)"""
+    if video_service.worker_pool is None:
+        return jsonify({
+            "success": False,
+            "message": "Camera workers are not enabled (execution mode: threads)"
+        })
+    return jsonify({
+        "success": True,
+        "data": video_service.worker_pool.stats()
+    })
+
+@app.route('/api/shard/health', methods=['GET'])
+def get_shard_health():
+    """Heartbeat endpoint polled by the shard coordinator"""
+    return jsonify({
+        "success": True,
+        "data": {
+            "worker_id": video_service.shard_worker_id,
+            "assignment_version": video_service.shard_assignment_version,
+            "cameras": list(video_service.camera_configs),
+            "active_cameras": list(video_service.cameras)
+        }
+    })
+
+@app.route('/api/shard/assign', methods=['POST'])
+@shard_token_required
+def assign_shard_cameras():
+    """Receive this worker's camera assignment from the shard coordinator"""
+    data = request.get_json() or {}
+    cameras, started = video_service.assign_cameras(data.get('cameras', []), data.get('worker_id'),
+                                                    data.get('version'))
+    return jsonify({
+        "success": True,
+        "data": {"cameras": cameras, "started": started}
+    })
+
 @app.route('/api/cameras/droidcam/configure', methods=['POST'])
 def configure_droidcam():
     """Configure DroidCam IP address"""
@@ -810,9 +1409,9 @@ def configure_droidcam():
 @app.route('/api/cameras/ipwebcam/configure', methods=['POST'])
 def configure_ipwebcam():
     """Configure IP Webcam URL"""
-    print("DEBUG: POST /api/cameras/ipwebcam/configure called")
+    logger.debug("POST /api/cameras/ipwebcam/configure called")
     data = request.get_json()
-    print(f"DEBUG: Request data: {data}")
+    logger.debug("Request data: %s", data)
     webcam_url = data.get('webcam_url')
     camera_id = data.get('camera_id', 'ipwebcam_01')
     camera_name = data.get('camera_name')
@@ -832,9 +1431,9 @@ def configure_ipwebcam():
 @app.route('/api/cameras/camo-studio/configure', methods=['POST'])
 def configure_camo_studio():
     """Configure Camo Studio camera device"""
-    print("DEBUG: POST /api/cameras/camo-studio/configure called")
+    logger.debug("POST /api/cameras/camo-studio/configure called")
     data = request.get_json() or {}
-    print(f"DEBUG: Request data: {data}")
+    logger.debug("Request data: %s", data)
 
     device_index = data.get('device_index')  # None means auto-detect
     camera_id = data.get('camera_id', 'camo_studio_01')
@@ -857,7 +1456,7 @@ def configure_camo_studio():
 @app.route('/api/cameras/detect-devices', methods=['POST'])
 def detect_camera_devices():
     """Detect available camera devices"""
-    print("DEBUG: POST /api/cameras/detect-devices called")
+    logger.debug("POST /api/cameras/detect-devices called")
     try:
         devices = video_service.detect_available_cameras()
         return jsonify({
@@ -866,7 +1465,7 @@ def detect_camera_devices():
             "message": f"Found {len(devices)} available camera devices"
         })
     except Exception as e:
-        print(f"Error detecting camera devices: {e}")
+        logger.error(f"Error detecting camera devices: {e}")
         return jsonify({
             "success": False,
             "devices": [],
@@ -928,19 +1527,26 @@ def get_detection_history(camera_id):
 @socketio.on('connect')
 def handle_connect():
     """Handle WebSocket connection"""
-    print(f"Client connected: {request.sid}")
+    if not socket_limiter.acquire():
+        logger.warning(f"Rejected client {request.sid}: WebSocket connection limit reached")
+        return False
+    socket_clients.add(request.sid)
+    logger.info(f"Client connected: {request.sid}")
     emit('connected', {'message': 'Connected to video streaming service'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle WebSocket disconnection"""
-    print(f"Client disconnected: {request.sid}")
+    if request.sid in socket_clients:
+        socket_clients.discard(request.sid)
+        socket_limiter.release()
+    logger.info(f"Client disconnected: {request.sid}")
 
 @socketio.on('subscribe_camera')
 def handle_camera_subscription(data):
     """Handle camera subscription for real-time updates"""
     camera_id = data.get('camera_id')
-    print(f"Client {request.sid} subscribed to camera {camera_id}")
+    logger.info(f"Client {request.sid} subscribed to camera {camera_id}")
     # Join room for camera-specific updates
     # socketio.join_room(camera_id)
 
@@ -985,6 +1591,14 @@ def logout():
     })
 
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Video Streaming Service")
+    parser.add_argument("--host", default=os.getenv('VIDEO_SERVICE_HOST', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=int(os.getenv('VIDEO_SERVICE_PORT', 5001)))
+    parser.add_argument("--no-debug", action="store_true", help="Disable the Flask debugger and reloader")
+    args = parser.parse_args()
+
     print("Starting Video Streaming Service...")
     print("Available endpoints:")
     print("  GET  /api/cameras - List all cameras")
@@ -994,6 +1608,12 @@ if __name__ == '__main__':
     print("  GET  /api/cameras/<id>/detections - Latest detections")
     print("  POST /api/cameras/droidcam/configure - Configure DroidCam")
     print("  GET  /api/detection_history/<id> - Detection history")
+    print("  GET  /api/server/stats - Server mode and connection counts")
+    print("  GET  /metrics - Prometheus metrics")
+    print("  GET  /api/admin/profile?seconds=N - Sampling profile (admin token)")
+    print("  GET  /api/admin/tracemalloc/snapshot - Allocation growth (admin token)")
+    print("  GET  /api/shard/health - Shard worker heartbeat")
+    print("  POST /api/shard/assign - Shard worker camera assignment (shard token)")
     print("  GET  /api/auth/check-auth - Check authentication")
     print("  POST /api/auth/login - Login")
     print("  POST /api/auth/logout - Logout")
@@ -1002,4 +1622,5 @@ if __name__ == '__main__':
     print("  - MongoDB storage")
     print("  - Incident creation system")
     print("  - Real-time WebSocket updates")
-    socketio.run(app, host='0.0.0.0', port=5001, debug=True)
+    socketio.run(app, host=args.host, port=args.port, debug=not args.no_debug,
+                 allow_unsafe_werkzeug=True)